@@ -36,9 +36,13 @@ Usage:
     from intlib.integrations import AudioAnalyzer, AIGenerator, PatternBuilder
 """
 
+import json
 import os
+import sqlite3
 import sys
-from typing import Optional, List, Tuple, Dict, Any
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from functools import lru_cache
+from typing import Optional, List, Tuple, Dict, Any, Iterable, Iterator
 import numpy as np
 
 # Try to import optional dependencies
@@ -69,6 +73,54 @@ except ImportError:
 # AUDIO ANALYSIS (inspired by librosa, aubio, Meyda)
 # =============================================================================
 
+NOTE_NAMES = ['C', 'C#', 'D', 'D#', 'E', 'F',
+              'F#', 'G', 'G#', 'A', 'A#', 'B']
+
+# Krumhansl-Kessler key profiles
+MAJOR_PROFILE = np.array([6.35, 2.23, 3.48, 2.33, 4.38, 4.09,
+                          2.52, 5.19, 2.39, 3.66, 2.29, 2.88])
+MINOR_PROFILE = np.array([6.33, 2.68, 3.52, 5.38, 2.60, 3.53,
+                          2.54, 4.75, 3.98, 2.69, 3.34, 3.17])
+
+# Frames per FFT call in AudioAnalyzer._simple_chroma
+CHROMA_BLOCK_FRAMES = 512
+
+
+def _standardize(values: np.ndarray, axis: int) -> np.ndarray:
+    """Zero mean and unit norm along an axis, zero where constant"""
+    values = values - values.mean(axis=axis, keepdims=True)
+    norm = np.linalg.norm(values, axis=axis, keepdims=True)
+    return np.divide(values, norm, out=np.zeros_like(values), where=norm > 0)
+
+
+# Every profile rotated to every tonic, row 2 * tonic + (0 major, 1 minor)
+KEY_TEMPLATES = _standardize(
+    np.array([
+        np.roll(profile, tonic)
+        for tonic in range(12)
+        for profile in (MAJOR_PROFILE, MINOR_PROFILE)
+    ]),
+    1,
+)
+
+
+@lru_cache(maxsize=16)
+def chroma_matrix(fft_size: int, sample_rate: int) -> np.ndarray:
+    """
+    The (12, bins) matrix that folds rfft bins onto pitch classes.
+    
+    Each bin above DC goes to the pitch class of its nearest note, so the
+    chroma of every frame is one matrix product.  Cached per
+    (fft_size, sample_rate), the result is read-only.
+    """
+    freqs = np.fft.rfftfreq(fft_size, 1.0 / sample_rate)
+    matrix = np.zeros((12, len(freqs)))
+    bins = np.flatnonzero(freqs > 0)
+    midi_notes = 69 + 12 * np.log2(freqs[bins] / 440.0)
+    matrix[np.round(midi_notes).astype(int) % 12, bins] = 1.0
+    matrix.flags.writeable = False
+    return matrix
+
 class AudioAnalyzer:
     """
     Real-time audio analysis with features from librosa, aubio, and Meyda.
@@ -171,34 +223,10 @@ class AudioAnalyzer:
         chroma = self.get_chroma(audio)
         mean_chroma = np.mean(chroma, axis=1)
         
-        # Krumhansl-Kessler key profiles
-        major_profile = np.array([6.35, 2.23, 3.48, 2.33, 4.38, 4.09,
-                                  2.52, 5.19, 2.39, 3.66, 2.29, 2.88])
-        minor_profile = np.array([6.33, 2.68, 3.52, 5.38, 2.60, 3.53,
-                                  2.54, 4.75, 3.98, 2.69, 3.34, 3.17])
-        
-        note_names = ['C', 'C#', 'D', 'D#', 'E', 'F', 
-                      'F#', 'G', 'G#', 'A', 'A#', 'B']
-        
-        best_key = 'C'
-        best_mode = 'major'
-        best_correlation = -1
-        
-        for i in range(12):
-            rolled_chroma = np.roll(mean_chroma, -i)
-            major_corr = np.corrcoef(rolled_chroma, major_profile)[0, 1]
-            minor_corr = np.corrcoef(rolled_chroma, minor_profile)[0, 1]
-            
-            if major_corr > best_correlation:
-                best_correlation = major_corr
-                best_key = note_names[i]
-                best_mode = 'major'
-            if minor_corr > best_correlation:
-                best_correlation = minor_corr
-                best_key = note_names[i]
-                best_mode = 'minor'
-        
-        return best_key, best_mode
+        # Correlation with all 24 keys in one product
+        scores = KEY_TEMPLATES @ _standardize(mean_chroma, 0)
+        best = int(np.argmax(scores))
+        return NOTE_NAMES[best // 2], ('major', 'minor')[best % 2]
     
     # === PRIVATE METHODS ===
     
@@ -349,26 +377,27 @@ class AudioAnalyzer:
         return onsets
     
     def _simple_chroma(self, audio: np.ndarray) -> np.ndarray:
-        """Simplified chroma features"""
-        # FFT
-        spectrum = np.abs(np.fft.rfft(audio))
-        freqs = np.fft.rfftfreq(len(audio), 1/self.sample_rate)
-        
-        # Map to chroma bins
-        chroma = np.zeros(12)
-        
-        for i, freq in enumerate(freqs):
-            if freq > 0:
-                # Convert frequency to MIDI note
-                midi_note = 69 + 12 * np.log2(freq / 440.0)
-                pitch_class = int(round(midi_note)) % 12
-                chroma[pitch_class] += spectrum[i]
+        """Simplified chroma features, (12, frames) like librosa"""
+        if len(audio) < self.frame_size:
+            audio = np.pad(audio, (0, self.frame_size - len(audio)))
+        frames = np.lib.stride_tricks.sliding_window_view(
+            audio, self.frame_size
+        )[::self.hop_length]
+        window = np.hanning(self.frame_size)
+        matrix = chroma_matrix(self.frame_size, self.sample_rate)
+        
+        # Blocks of frames keep the complex spectra small for long files
+        chroma = np.empty((12, len(frames)))
+        for start in range(0, len(frames), CHROMA_BLOCK_FRAMES):
+            block = frames[start:start + CHROMA_BLOCK_FRAMES]
+            spectrum = np.abs(np.fft.rfft(block * window, axis=1))
+            chroma[:, start:start + len(block)] = matrix @ spectrum.T
         
         # Normalize
         if np.max(chroma) > 0:
             chroma /= np.max(chroma)
         
-        return chroma.reshape(12, 1)
+        return chroma
 
 
 # =============================================================================
@@ -1281,12 +1310,142 @@ def quick_analyze(file_path: str) -> Dict[str, Any]:
     analyzer = AudioAnalyzer(sample_rate=sr)
     features = analyzer.analyze(audio)
     features['key'], features['mode'] = analyzer.detect_key(audio)
-    features['bpm'] = analyzer.detect_bpm(audio)
+    if 'bpm' not in features:
+        features['bpm'] = analyzer.detect_bpm(audio)
     features['duration'] = len(audio) / sr
     
     return features
 
 
+# Bump when quick_analyze results change, so cached results are recomputed
+ANALYSIS_VERSION = 1
+
+
+class AnalysisCache:
+    """
+    Features of analyzed files in a SQLite file, keyed by path, size,
+    modification time and ANALYSIS_VERSION.
+    """
+    
+    def __init__(self, path: str):
+        self.connection = sqlite3.connect(path)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS analysis ("
+            "path TEXT PRIMARY KEY, size INTEGER, mtime REAL, "
+            "version INTEGER, features TEXT)"
+        )
+    
+    def get(self, path: str, stat: os.stat_result) -> Optional[Dict[str, Any]]:
+        """Cached features of path, None if missing or out of date"""
+        row = self.connection.execute(
+            "SELECT size, mtime, version, features FROM analysis "
+            "WHERE path = ?", (path,)
+        ).fetchone()
+        if row is None or row[:3] != (
+            stat.st_size, stat.st_mtime, ANALYSIS_VERSION
+        ):
+            return None
+        return json.loads(row[3])
+    
+    def put(self, path: str, stat: os.stat_result, features: Dict[str, Any]):
+        """Store features of path, committed by the next commit()"""
+        self.connection.execute(
+            "INSERT OR REPLACE INTO analysis VALUES (?, ?, ?, ?, ?)",
+            (path, stat.st_size, stat.st_mtime, ANALYSIS_VERSION,
+             json.dumps(features, default=float)),
+        )
+    
+    def commit(self):
+        self.connection.commit()
+    
+    def close(self):
+        self.connection.commit()
+        self.connection.close()
+
+
+def _batch_worker(file_path: str) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """quick_analyze in a worker process, returning (features, error)"""
+    try:
+        return quick_analyze(file_path), None
+    except Exception as e:
+        return None, f"{type(e).__name__}: {e}"
+
+
+def batch_analyze(
+    file_paths: Iterable[str],
+    workers: Optional[int] = None,
+    cache_path: Optional[str] = None,
+    commit_every: int = 100,
+) -> Iterator[Tuple[str, Optional[Dict[str, Any]], Optional[str]]]:
+    """
+    quick_analyze many files in a process pool, yielding results as they
+    finish.
+    
+    Cached results of unchanged files are yielded first, without starting
+    any analysis.  Files that fail are not cached, so they are retried on
+    the next call: quick_analyze also fails when an optional dependency
+    is missing, which says nothing about the file.
+    
+    Args:
+        file_paths: Audio files to analyze
+        workers: Analysis processes, os.cpu_count() if None
+        cache_path: SQLite file to cache features in, no cache if None
+        commit_every: Results per cache transaction
+    
+    Yields:
+        (file_path, features, error), features is None if error is set
+    """
+    cache = AnalysisCache(cache_path) if cache_path else None
+    try:
+        todo = []
+        for file_path in file_paths:
+            try:
+                stat = os.stat(file_path)
+            except OSError as e:
+                yield file_path, None, str(e)
+                continue
+            features = cache.get(file_path, stat) if cache else None
+            if features is not None:
+                yield file_path, features, None
+            else:
+                todo.append((file_path, stat))
+        
+        if not todo:
+            return
+        
+        workers = workers or os.cpu_count() or 1
+        pending = {}
+        done_count = 0
+        queue = iter(todo)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            try:
+                while True:
+                    # Only a few files queued per worker at a time
+                    for item in queue:
+                        future = executor.submit(_batch_worker, item[0])
+                        pending[future] = item
+                        if len(pending) >= workers * 4:
+                            break
+                    if not pending:
+                        break
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        file_path, stat = pending.pop(future)
+                        features, error = future.result()
+                        if cache and features is not None:
+                            cache.put(file_path, stat, features)
+                            done_count += 1
+                            if done_count % commit_every == 0:
+                                cache.commit()
+                        yield file_path, features, error
+            finally:
+                for future in pending:
+                    future.cancel()
+    finally:
+        if cache:
+            cache.close()
+
+
 def quick_generate(style: str = 'random', bars: int = 4) -> List[Dict[str, Any]]:
     """Quick one-shot melody generation"""
     gen = AIGenerator()
@@ -1306,6 +1465,8 @@ __all__ = [
     'PatternBuilder',
     'VisualAnalyzer',
     'quick_analyze',
+    'batch_analyze',
+    'AnalysisCache',
     'quick_generate',
     'quick_pattern',
     'LIBROSA_AVAILABLE',
@@ -0,0 +1,212 @@
+"""
+Message batching for the engine IPC transports.
+
+A plain message is one datagram, "path\\nkey\\nvalue", encoded as UTF-8.
+Batching adds 2 datagram types that use the same layout, so the engine
+can route them with the same code:
+
+    /intuitives/batch\\n<count>\\n
+        followed by <count> messages, each as <byte length>\\n<message>
+
+    /intuitives/fragment\\n<message id>|<index>|<count>\\n<bytes>
+        a part of a message too big for one datagram, the engine joins the
+        parts of a message id in index order when it has all <count>
+
+The batched transport numbers every datagram it sends, single plain
+messages included, so it only works with an engine that accepts the
+batch, fragment and sequence paths.  Each datagram is wrapped in
+
+    /intuitives/seq\\n<sequence number>\\n<datagram>
+
+and the engine replies with /intuitives/ack\\n<sequence number>, so that
+a late reply is matched to the datagram it acknowledges
+"""
+
+__all__ = [
+    'ACK_PATH',
+    'BATCH_PATH',
+    'COALESCE_KEYS',
+    'DatagramDecoder',
+    'FRAGMENT_PATH',
+    'MAX_DATAGRAM_SIZE',
+    'MessageQueue',
+    'SEQUENCE_HEADER_SIZE',
+    'SEQUENCE_PATH',
+    'decode_ack',
+    'encode_ack',
+    'encode_message',
+    'pack_datagrams',
+    'sequence_datagram',
+]
+
+# The largest datagram sent to the engine, in bytes
+MAX_DATAGRAM_SIZE = 60000
+BATCH_PATH = "/intuitives/batch"
+FRAGMENT_PATH = "/intuitives/fragment"
+SEQUENCE_PATH = "/intuitives/seq"
+ACK_PATH = "/intuitives/ack"
+# Room for the sequence header, pack datagrams to
+# MAX_DATAGRAM_SIZE - SEQUENCE_HEADER_SIZE before numbering them
+SEQUENCE_HEADER_SIZE = 40
+# Room left in each fragment for its header
+_FRAGMENT_HEADER_SIZE = 64
+# Configure keys whose value is "uid|port|value", only the last value
+# queued for a (uid, port) needs to be sent
+COALESCE_KEYS = frozenset([
+    "pc",
+])
+
+
+def encode_message(a_path, a_key, a_value):
+    return "\n".join([a_path, a_key, a_value]).encode('utf-8')
+
+def sequence_datagram(a_seq, a_datagram):
+    """ Number a datagram, the engine's reply will carry a_seq """
+    return f"{SEQUENCE_PATH}\n{a_seq}\n".encode('utf-8') + a_datagram
+
+def encode_ack(a_seq):
+    """ The engine's reply to a numbered datagram """
+    return f"{ACK_PATH}\n{a_seq}".encode('utf-8')
+
+def decode_ack(a_reply):
+    """ Return the sequence number of a reply from encode_ack(), or None
+        if the reply is not an acknowledgement of a numbered datagram
+    """
+    f_path, _, f_seq = a_reply.partition(b"\n")
+    if f_path != ACK_PATH.encode('utf-8'):
+        return None
+    try:
+        return int(f_seq)
+    except ValueError:
+        return None
+
+def _batch_datagram(a_messages):
+    f_result = [f"{BATCH_PATH}\n{len(a_messages)}\n".encode('utf-8')]
+    for f_message in a_messages:
+        f_result.append(f"{len(f_message)}\n".encode('utf-8'))
+        f_result.append(f_message)
+    return b"".join(f_result)
+
+def _fragment_datagrams(a_message, a_id, a_max_size):
+    f_size = a_max_size - _FRAGMENT_HEADER_SIZE
+    f_count = -(-len(a_message) // f_size)
+    return [
+        f"{FRAGMENT_PATH}\n{a_id}|{f_i}|{f_count}\n".encode('utf-8')
+        + a_message[f_i * f_size:(f_i + 1) * f_size]
+        for f_i in range(f_count)
+    ]
+
+def pack_datagrams(a_messages, a_next_id=0, a_max_size=MAX_DATAGRAM_SIZE):
+    """ Pack encoded messages into as few datagrams as possible, keeping
+        their order.
+
+        a_messages:  [bytes, ...] from encode_message()
+        a_next_id:   The first message id to use for fragmented messages
+        Returns ([(datagram, message count), ...], next message id)
+    """
+    f_result = []
+    f_batch = []
+    f_batch_size = 0
+
+    def flush_batch():
+        if len(f_batch) == 1:
+            # Plain datagrams for single messages, still wrapped by
+            # sequence_datagram() when sent by the batched transport
+            f_result.append((f_batch[0], 1))
+        elif f_batch:
+            f_result.append((_batch_datagram(f_batch), len(f_batch)))
+        f_batch.clear()
+
+    f_header_size = len(f"{BATCH_PATH}\n{len(a_messages)}\n")
+    for f_message in a_messages:
+        if len(f_message) > a_max_size:
+            flush_batch()
+            f_batch_size = 0
+            f_datagrams = _fragment_datagrams(f_message, a_next_id, a_max_size)
+            a_next_id += 1
+            # The message is sent once the last part arrives
+            f_result.extend((x, 0) for x in f_datagrams[:-1])
+            f_result.append((f_datagrams[-1], 1))
+            continue
+        f_size = len(f_message) + len(str(len(f_message))) + 1
+        if f_batch and f_header_size + f_batch_size + f_size > a_max_size:
+            flush_batch()
+            f_batch_size = 0
+        f_batch.append(f_message)
+        f_batch_size += f_size
+    flush_batch()
+    return f_result, a_next_id
+
+
+class MessageQueue:
+    """ Messages waiting to be sent, in order.  A control value replaces
+        the queued value for the same plugin port and moves to the end of
+        the queue, so it is still sent after the messages before it
+    """
+    def __init__(self):
+        # key: bytes, insertion ordered
+        self._messages = {}
+        self._count = 0
+        self.coalesced = 0
+
+    def __len__(self):
+        return len(self._messages)
+
+    def put(self, a_path, a_key, a_value):
+        """ Queue a message, returns True if it replaced a queued message
+        """
+        if a_key in COALESCE_KEYS:
+            f_key = (a_path, a_key) + tuple(a_value.split("|", 2)[:2])
+        else:
+            self._count += 1
+            f_key = self._count
+        f_message = encode_message(a_path, a_key, a_value)
+        f_coalesced = self._messages.pop(f_key, None) is not None
+        if f_coalesced:
+            self.coalesced += 1
+        self._messages[f_key] = f_message
+        return f_coalesced
+
+    def pop_all(self):
+        f_result = list(self._messages.values())
+        self._messages.clear()
+        return f_result
+
+
+class DatagramDecoder:
+    """ The receiving side of pack_datagrams(), as the engine decodes it """
+    def __init__(self):
+        # message id: {index: bytes}
+        self._fragments = {}
+        # The sequence number of the last numbered datagram decoded, to
+        # reply with encode_ack()
+        self.last_seq = None
+
+    def decode(self, a_datagram):
+        """ Returns the complete messages in a datagram as [bytes, ...] """
+        f_path, f_rest = a_datagram.split(b"\n", 1)
+        if f_path == SEQUENCE_PATH.encode('utf-8'):
+            f_seq, f_rest = f_rest.split(b"\n", 1)
+            self.last_seq = int(f_seq)
+            return self.decode(f_rest)
+        elif f_path == BATCH_PATH.encode('utf-8'):
+            f_count, f_rest = f_rest.split(b"\n", 1)
+            f_result = []
+            f_pos = 0
+            for f_i in range(int(f_count)):
+                f_end = f_rest.index(b"\n", f_pos)
+                f_len = int(f_rest[f_pos:f_end])
+                f_result.append(f_rest[f_end + 1:f_end + 1 + f_len])
+                f_pos = f_end + 1 + f_len
+            return f_result
+        elif f_path == FRAGMENT_PATH.encode('utf-8'):
+            f_header, f_data = f_rest.split(b"\n", 1)
+            f_id, f_index, f_count = (int(x) for x in f_header.split(b"|"))
+            f_parts = self._fragments.setdefault(f_id, {})
+            f_parts[f_index] = f_data
+            if len(f_parts) < f_count:
+                return []
+            self._fragments.pop(f_id)
+            return [b"".join(f_parts[x] for x in range(f_count))]
+        else:
+            return [a_datagram]
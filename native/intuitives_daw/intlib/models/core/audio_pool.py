@@ -111,6 +111,11 @@ class PerFileFX:
 
 
 class AudioPool:
+    """ The project's audio files, indexed by uid and by path.
+
+        The indexes are kept up to date by add_entry and remove_by_uid.
+        Call reindex() after changing an entry's uid or path in place.
+    """
     def __init__(
         self,
         pool,
@@ -126,6 +131,13 @@ class AudioPool:
             PerFileFX,
             desc="Entries describing audio files used in this project",
         )
+        self.reindex()
+
+    def reindex(self):
+        """ Rebuild the uid and path lookups from self.pool """
+        self._by_uid = {x.uid: x for x in self.pool}
+        self._by_path = {x.path: x for x in self.pool}
+        self._next_uid = max(self._by_uid) + 1 if self._by_uid else 0
 
     def add_entry(self, path, uid=None) -> AudioPoolEntry:
         path = pi_path(path)
@@ -151,31 +163,34 @@ class AudioPool:
         )
         entry = AudioPoolEntry(uid, 0., path)
         self.pool.append(entry)
+        self._by_uid[entry.uid] = entry
+        self._by_path[entry.path] = entry
+        self._next_uid = max(self._next_uid, entry.uid + 1)
         return entry
 
     def remove_by_uid(self, uids):
+        uids = set(uids)
         self.pool = [
             x for x in self.pool
             if x.uid not in uids
         ]
+        for uid in uids:
+            entry = self._by_uid.pop(uid, None)
+            if entry is not None:
+                self._by_path.pop(entry.path, None)
+        if self._next_uid - 1 in uids:
+            self._next_uid = max(self._by_uid) + 1 if self._by_uid else 0
 
     def next_uid(self):
-        if self.pool:
-            return max(x.uid for x in self.pool) + 1
-        else:
-            return 0
+        return self._next_uid
 
     def by_uid(self):
-        return {
-            x.uid: x
-            for x in self.pool
-        }
+        """ Return the {uid: AudioPoolEntry} index.  Do not modify it """
+        return self._by_uid
 
     def by_path(self):
-        return {
-            x.path: x
-            for x in self.pool
-        }
+        """ Return the {path: AudioPoolEntry} index.  Do not modify it """
+        return self._by_path
 
     def per_file_fx_by_uid(self):
         return {
@@ -144,21 +144,11 @@ class MIDINote(AbstractMIDIEvent):
         return MIDINote.from_arr(f_arr[1:])
 
     def __str__(self):
-        return "|".join(
-            str(x) for x in (
-                "n",
-                round(self.start, 6),
-                round(self.length, 6),
-                self.note_num,
-                self.velocity,
-                self.pan,
-                self.attack,
-                self.decay,
-                self.sustain,
-                self.release,
-                self.channel,
-                self.pitch_fine,
-            )
+        return (
+            f"n|{round(self.start, 6)}|{round(self.length, 6)}|"
+            f"{self.note_num}|{self.velocity}|{self.pan}|{self.attack}|"
+            f"{self.decay}|{self.sustain}|{self.release}|{self.channel}|"
+            f"{self.pitch_fine}"
         )
 
     def selection_str(self):
@@ -203,14 +193,9 @@ class MIDIControl(AbstractMIDIEvent):
         self.cc_val = clip_value(float(a_val), 0.0, 127.0, True)
 
     def __str__(self):
-        return "|".join(
-            str(x) for x in (
-                "c",
-                round(self.start, 6),
-                self.cc_num,
-                round(self.cc_val, 6),
-                self.channel,
-            )
+        return (
+            f"c|{round(self.start, 6)}|{self.cc_num}|"
+            f"{round(self.cc_val, 6)}|{self.channel}"
         )
 
     @staticmethod
@@ -252,14 +237,7 @@ class MIDIPitchbend(AbstractMIDIEvent):
         self.pb_val = clip_value(float(a_val), -1.0, 1.0, True)
 
     def __str__(self):
-        return "|".join(
-            str(x) for x in (
-                "p",
-                self.start,
-                round(self.pb_val, 6),
-                self.channel,
-            )
-        )
+        return f"p|{self.start}|{round(self.pb_val, 6)}|{self.channel}"
 
     @staticmethod
     def from_arr(a_arr):
@@ -4,6 +4,7 @@ from .audio_pool import (
 )
 from .sample_graph import (
     clear_sample_graph_cache,
+    global_sample_graph_cache,
     remove_item_from_sg_cache,
     SampleGraph,
 )
@@ -43,8 +44,11 @@ file_backups = "backups.json"
 
 class SgProject(AbstractProject):
     def __init__(self):
+        AbstractProject.__init__(self)
         self.cached_audio_files = []
         self.glued_name_index = 0
+        self._audio_pool = None
+        self._audio_pool_stat = None
 
     def set_project_folders(self, a_project_file):
         #folders
@@ -108,6 +112,8 @@ class SgProject(AbstractProject):
             self.user_folder,
         ]
 
+        self._audio_pool = None
+        self._audio_pool_stat = None
         clear_sample_graph_cache()
 
     def open_project(self, a_project_file, a_notify_osc=True):
@@ -272,14 +278,35 @@ class SgProject(AbstractProject):
         f_map_text += terminating_char
         self.save_file("", file_pystretch_map, f_map_text)
 
+    def _audio_pool_file_stat(self):
+        try:
+            stat = os.stat(self.audio_pool_file)
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
     def get_audio_pool(self):
-        if not os.path.exists(self.audio_pool_file):
-            return AudioPool.new()
-        content = read_file_text(self.audio_pool_file)
-        return AudioPool.from_str(content)
+        """ Return the project's resident AudioPool.  The file is only
+            re-read if it was changed on disk by something other than
+            save_audio_pool.  Changes to the returned pool must be
+            persisted with save_audio_pool
+        """
+        stat = self._audio_pool_file_stat()
+        if self._audio_pool is None or stat != self._audio_pool_stat:
+            if stat is None:
+                self._audio_pool = AudioPool.new()
+            else:
+                content = read_file_text(self.audio_pool_file)
+                self._audio_pool = AudioPool.from_str(content)
+            self._audio_pool_stat = stat
+        return self._audio_pool
 
     def save_audio_pool(self, a_uid_dict):
+        """ Write the pool to disk and make it the resident pool """
+        a_uid_dict.reindex()
         write_file_text(self.audio_pool_file, a_uid_dict)
+        self._audio_pool = a_uid_dict
+        self._audio_pool_stat = self._audio_pool_file_stat()
 
     def timestretch_lookup_orig_path(self, a_path):
         if a_path in self.timestretch_reverse_lookup:
@@ -507,6 +534,18 @@ class SgProject(AbstractProject):
         else:
             return f_result
 
+    def prewarm_sample_graphs(self, a_uids):
+        """ Load the sample graphs for audio pool uids into the cache on a
+            background thread.  Returns a concurrent.futures.Future
+        """
+        return global_sample_graph_cache.prewarm(
+            (
+                os.path.join(self.samplegraph_folder, str(x))
+                for x in a_uids
+            ),
+            self.samples_folder,
+        )
+
     def delete_sample_graph_by_name(self, a_path):
         f_uid = self.get_wav_uid_by_name(a_path, a_cp=False)
         self.delete_sample_graph_by_uid(f_uid)
@@ -1,26 +1,268 @@
 from intlib.math import clip_value, db_to_lin, lin_to_db
 from intlib.lib import *
 from intlib.lib.util import *
+from concurrent.futures import ThreadPoolExecutor
+import collections
+import glob
 import numpy
 import os
+import struct
+import threading
 
+# Binary peak file written next to the engine's text sample graph
+BINARY_EXT = ".peaks"
+BINARY_MAGIC = b"SGPK"
+BINARY_VERSION = 1
+# magic, version, channels, count, frame_count, sample_rate, timestamp,
+# length_in_seconds, peak, points per channel at level 0, levels,
+# filename length
+BINARY_HEADER = struct.Struct("<4sIiiqiqdfIII")
+# Coarsest mip-map level keeps at least this many points
+MIN_LEVEL_POINTS = 16
+# Default memory budget of the sample graph cache, in bytes
+SAMPLE_GRAPH_CACHE_BYTES = 128 * 1024 * 1024
+
+
+def binary_path(a_file_name):
+    return f"{a_file_name}{BINARY_EXT}"
+
+def convert_sample_graph(a_file_name, a_sample_dir=""):
+    """ Convert a text sample graph to the binary peak format.
+        Returns True if a binary file was written
+    """
+    f_graph = SampleGraph(a_file_name, a_sample_dir, a_binary=False)
+    if not f_graph.is_valid():
+        return False
+    f_graph.save_binary(binary_path(a_file_name))
+    return True
+
+def convert_sample_graph_folder(a_folder, a_sample_dir=""):
+    """ One-time conversion of every text sample graph in a project's
+        samplegraph folder that does not have an up to date binary file.
+        Returns the number of files converted
+    """
+    f_count = 0
+    for f_path in glob.glob(os.path.join(a_folder, "*")):
+        if (
+            f_path.endswith((BINARY_EXT, ".tmp"))
+            or
+            not os.path.isfile(f_path)
+        ):
+            continue
+        f_bin = binary_path(f_path)
+        if (
+            os.path.isfile(f_bin)
+            and
+            os.path.getmtime(f_bin) >= os.path.getmtime(f_path)
+        ):
+            continue
+        if convert_sample_graph(f_path, a_sample_dir):
+            f_count += 1
+    return f_count
+
+def _decimate(a_arr, a_func):
+    """ Halve the resolution of a (channels, points) array, combining
+        neighbouring points with a_func
+    """
+    f_even = a_arr.shape[1] - (a_arr.shape[1] % 2)
+    f_result = a_func(a_arr[:, 0:f_even:2], a_arr[:, 1:f_even:2])
+    if f_even != a_arr.shape[1]:
+        f_result = numpy.concatenate([f_result, a_arr[:, -1:]], axis=1)
+    return f_result
+
+def build_peak_levels(a_high, a_low):
+    """ Build the mip-map pyramid for (channels, points) peak arrays.
+        Low peaks are stored in reverse order, like SampleGraph.low_peaks
+        Returns ([high level 0, 1, ...], [low level 0, 1, ...])
+    """
+    f_high_levels = [a_high]
+    f_low_levels = [a_low]
+    f_high = a_high
+    f_low = a_low[:, ::-1]
+    while f_high.shape[1] >= MIN_LEVEL_POINTS * 2:
+        f_high = _decimate(f_high, numpy.maximum)
+        f_low = _decimate(f_low, numpy.minimum)
+        f_high_levels.append(f_high)
+        f_low_levels.append(numpy.ascontiguousarray(f_low[:, ::-1]))
+    return f_high_levels, f_low_levels
+
+
+def _graph_file_stamp(a_file_name):
+    """ The modified time of whichever graph file a SampleGraph was loaded
+        from, or None if neither exists
+    """
+    for f_path in (a_file_name, binary_path(a_file_name)):
+        try:
+            return os.stat(f_path).st_mtime_ns
+        except OSError:
+            pass
+    return None
+
+
+class SampleGraphCache:
+    """ Least recently used cache of SampleGraph objects, keyed by the
+        sample graph file name and bounded by the memory used by the
+        peak arrays of the graphs it holds.
+
+        Entries are reloaded if the graph file was modified after they
+        were cached.  Thread safe, graphs can be loaded on a background
+        thread with prewarm()
+    """
+    def __init__(self, a_max_bytes=SAMPLE_GRAPH_CACHE_BYTES):
+        self.max_bytes = int(a_max_bytes)
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # file name: (SampleGraph, file stamp, nbytes)
+        self._entries = collections.OrderedDict()
+        # file name: threading.Event, graphs currently being loaded
+        self._loading = {}
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, a_file_name):
+        return str(a_file_name) in self._entries
+
+    def stats(self):
+        with self._lock:
+            return {
+                'count': len(self._entries),
+                'nbytes': self.nbytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+    def get(self, a_file_name, a_sample_dir, a_check_mtime=True):
+        """ Return the cached graph for a_file_name, loading it on a miss
+            or if the file changed since it was cached
+        """
+        f_file_name = str(a_file_name)
+        f_stamp = _graph_file_stamp(f_file_name) if a_check_mtime else None
+        while True:
+            with self._lock:
+                f_entry = self._entries.get(f_file_name)
+                if f_entry is not None and (
+                    not a_check_mtime
+                    or
+                    f_entry[1] == f_stamp
+                ):
+                    self._entries.move_to_end(f_file_name)
+                    self.hits += 1
+                    return f_entry[0]
+                f_event = self._loading.get(f_file_name)
+                if f_event is None:
+                    self.misses += 1
+                    f_event = threading.Event()
+                    self._loading[f_file_name] = f_event
+                    break
+            # Another thread is already loading this graph, wait for it
+            f_event.wait()
+        try:
+            f_graph = SampleGraph(f_file_name, a_sample_dir)
+            self._put(f_file_name, f_graph, _graph_file_stamp(f_file_name))
+        finally:
+            with self._lock:
+                self._loading.pop(f_file_name, None)
+            f_event.set()
+        return f_graph
+
+    def _put(self, a_file_name, a_graph, a_stamp):
+        f_nbytes = a_graph.nbytes()
+        with self._lock:
+            f_old = self._entries.pop(a_file_name, None)
+            if f_old is not None:
+                self.nbytes -= f_old[2]
+            self._entries[a_file_name] = (a_graph, a_stamp, f_nbytes)
+            self.nbytes += f_nbytes
+            self._evict()
+
+    def _evict(self):
+        # Always keep the most recently used graph, even if it alone is
+        # larger than the budget
+        while self.nbytes > self.max_bytes and len(self._entries) > 1:
+            f_name, f_entry = self._entries.popitem(last=False)
+            self.nbytes -= f_entry[2]
+            self.evictions += 1
+
+    def set_max_bytes(self, a_max_bytes):
+        with self._lock:
+            self.max_bytes = int(a_max_bytes)
+            self._evict()
+
+    def invalidate(self, a_file_name):
+        """ Remove a graph from the cache.  Returns True if it was cached """
+        with self._lock:
+            f_entry = self._entries.pop(str(a_file_name), None)
+            if f_entry is None:
+                return False
+            self.nbytes -= f_entry[2]
+            return True
+
+    def invalidate_uid(self, a_uid):
+        """ Remove every cached graph for an audio pool uid """
+        f_uid = str(a_uid)
+        with self._lock:
+            f_names = [
+                x for x in self._entries
+                if os.path.basename(x) == f_uid
+            ]
+        for f_name in f_names:
+            self.invalidate(f_name)
+        return len(f_names)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+
+    def prewarm(self, a_file_names, a_sample_dir):
+        """ Load graphs into the cache on a background thread.
+            Returns a concurrent.futures.Future
+        """
+        f_file_names = [str(x) for x in a_file_names]
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=1,
+                    thread_name_prefix="sample-graph-prewarm",
+                )
+            f_executor = self._executor
+        return f_executor.submit(
+            self._prewarm,
+            f_file_names,
+            a_sample_dir,
+        )
+
+    def _prewarm(self, a_file_names, a_sample_dir):
+        for f_file_name in a_file_names:
+            if not os.path.exists(f_file_name):
+                continue
+            try:
+                self.get(f_file_name, a_sample_dir)
+            except Exception as ex:
+                print(f"Error pre-warming sample graph {f_file_name}: {ex}")
+
+
+global_sample_graph_cache = SampleGraphCache()
 
 def clear_sample_graph_cache():
-    global global_sample_graph_cache
-    global_sample_graph_cache = {}
+    global_sample_graph_cache.clear()
 
 def remove_item_from_sg_cache(a_path):
-    global global_sample_graph_cache
     if os.path.exists(a_path):
         os.remove(a_path)
-    if a_path in global_sample_graph_cache:
-        global_sample_graph_cache.pop(a_path)
-    else:
+    if os.path.exists(binary_path(a_path)):
+        os.remove(binary_path(a_path))
+    if not global_sample_graph_cache.invalidate(a_path):
         print("\n\nremove_item_from_sg_cache: {} "
             "not found.\n\n".format(a_path))
 
-global_sample_graph_cache = {}
-
 class SampleGraph:
     __slots__ = [
         'sample_graph_cache',
@@ -37,6 +279,8 @@ class SampleGraph:
         'frame_count',
         'peak',
         'cache',
+        'high_levels',
+        'low_levels',
     ]
     @staticmethod
     def create(a_file_name, a_sample_dir):
@@ -44,19 +288,15 @@ class SampleGraph:
             grabs from the cache if it already exists...
             Prefer this over directly instantiating.
         """
-        f_file_name = str(a_file_name)
-        global global_sample_graph_cache
-        if f_file_name in global_sample_graph_cache:
-            return global_sample_graph_cache[f_file_name]
-        else:
-            f_result = SampleGraph(f_file_name, a_sample_dir)
-            global_sample_graph_cache[f_file_name] = f_result
-            return f_result
-
-    def __init__(self, a_file_name, a_sample_dir):
+        return global_sample_graph_cache.get(a_file_name, a_sample_dir)
+
+    def __init__(self, a_file_name, a_sample_dir, a_binary=True):
         """
         a_file_name:  The full path to /.../sample_graphs/uid
         a_sample_dir:  The project's sample dir
+        a_binary:
+            Use the binary peak file if it is up to date, otherwise parse
+            the text file and write the binary file for next time
         """
         self.sample_graph_cache = None
         f_file_name = str(a_file_name)
@@ -73,6 +313,20 @@ class SampleGraph:
         self.frame_count = None
         self.peak = 0.0
         self.cache = None
+        self.high_levels = None
+        self.low_levels = None
+
+        f_bin_file = binary_path(f_file_name)
+        if a_binary and os.path.isfile(f_bin_file) and (
+            not os.path.isfile(f_file_name)
+            or
+            os.path.getmtime(f_bin_file) >= os.path.getmtime(f_file_name)
+        ):
+            try:
+                self._load_binary(f_bin_file)
+                return
+            except Exception as ex:
+                print(f"Invalid binary sample graph {f_bin_file}: {ex}")
 
         if not os.path.isfile(f_file_name):
             return
@@ -82,7 +336,15 @@ class SampleGraph:
         except:
             return
 
-        for f_line in f_line_arr:
+        self._load_text(f_line_arr)
+        if a_binary and self.is_valid():
+            try:
+                self.save_binary(f_bin_file)
+            except Exception as ex:
+                print(f"Could not write binary sample graph {f_bin_file}: {ex}")
+
+    def _load_text(self, a_lines):
+        for f_line in a_lines:
             f_line_arr = f_line.split("|")
             if f_line_arr[0] == "\\":
                 break
@@ -129,6 +391,147 @@ class SampleGraph:
             numpy.clip(f_high_peaks, 0.01, 0.99, f_high_peaks)
             numpy.clip(f_low_peaks, -0.99, -0.01, f_low_peaks)
 
+    def _load_binary(self, a_path):
+        with open(a_path, "rb") as f_file:
+            f_header = f_file.read(BINARY_HEADER.size)
+            (
+                f_magic,
+                f_version,
+                f_channels,
+                f_count,
+                f_frame_count,
+                f_sample_rate,
+                f_timestamp,
+                f_length,
+                f_peak,
+                f_points,
+                f_levels,
+                f_name_len,
+            ) = BINARY_HEADER.unpack(f_header)
+            assert f_magic == BINARY_MAGIC, f_magic
+            assert f_version == BINARY_VERSION, f_version
+            self._file = f_file.read(f_name_len).decode("utf-8")
+            f_offset = BINARY_HEADER.size + f_name_len
+            f_offset += -f_offset % 8
+            f_file.seek(f_offset)
+            f_sizes = [f_channels * f_points]
+            for f_i in range(1, f_levels):
+                f_points = (f_points + 1) // 2
+                f_sizes.append(f_channels * f_points)
+            f_data = numpy.fromfile(
+                f_file,
+                dtype="<f4",
+                count=2 * sum(f_sizes),
+            )
+
+        assert len(f_data) == 2 * sum(f_sizes), (len(f_data), f_sizes)
+        self.sample_dir_file = "{}{}".format(self.sample_dir, self._file)
+        self.channels = f_channels
+        self.count = None if f_count < 0 else f_count
+        self.frame_count = None if f_frame_count < 0 else f_frame_count
+        self.sample_rate = None if f_sample_rate < 0 else f_sample_rate
+        self.timestamp = None if f_timestamp < 0 else f_timestamp
+        self.length_in_seconds = (
+            None if numpy.isnan(f_length) else f_length
+        )
+        self.peak = float(f_peak)
+
+        self.high_levels = []
+        self.low_levels = []
+        f_pos = 0
+        for f_size in f_sizes:
+            f_shape = (f_channels, f_size // max(f_channels, 1))
+            self.high_levels.append(
+                f_data[f_pos:f_pos + f_size].reshape(f_shape))
+            f_pos += f_size
+            self.low_levels.append(
+                f_data[f_pos:f_pos + f_size].reshape(f_shape))
+            f_pos += f_size
+        self.high_peaks = list(self.high_levels[0])
+        self.low_peaks = list(self.low_levels[0])
+
+    def _build_levels(self):
+        f_high = numpy.array(
+            self.high_peaks[:self.channels],
+            dtype=numpy.float32,
+        )
+        f_low = numpy.array(
+            self.low_peaks[:self.channels],
+            dtype=numpy.float32,
+        )
+        self.high_levels, self.low_levels = build_peak_levels(f_high, f_low)
+
+    def save_binary(self, a_path):
+        """ Write the graph and its mip-map levels to a binary peak file """
+        if self.high_levels is None:
+            self._build_levels()
+        f_name = (self._file or "").encode("utf-8")
+        f_header = BINARY_HEADER.pack(
+            BINARY_MAGIC,
+            BINARY_VERSION,
+            self.channels,
+            -1 if self.count is None else self.count,
+            -1 if self.frame_count is None else self.frame_count,
+            -1 if self.sample_rate is None else self.sample_rate,
+            -1 if self.timestamp is None else self.timestamp,
+            numpy.nan if self.length_in_seconds is None
+                else self.length_in_seconds,
+            self.peak,
+            self.high_levels[0].shape[1],
+            len(self.high_levels),
+            len(f_name),
+        )
+        f_tmp = f"{a_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(f_tmp, "wb") as f_file:
+            f_file.write(f_header)
+            f_file.write(f_name)
+            f_file.write(b"\0" * (-(len(f_header) + len(f_name)) % 8))
+            for f_high, f_low in zip(self.high_levels, self.low_levels):
+                f_file.write(f_high.astype("<f4").tobytes())
+                f_file.write(f_low.astype("<f4").tobytes())
+        os.replace(f_tmp, a_path)
+
+    def nbytes(self):
+        """ The memory used by the peak arrays """
+        f_arrays = list(self.high_peaks) + list(self.low_peaks)
+        if self.high_levels is not None:
+            f_arrays += self.high_levels[1:] + self.low_levels[1:]
+            # Level 0 of a binary graph holds the same data as the peaks
+            if self.high_levels[0].base is None:
+                f_arrays += [self.high_levels[0], self.low_levels[0]]
+        return sum(getattr(x, 'nbytes', 0) for x in f_arrays)
+
+    def level_count(self):
+        if self.high_levels is None:
+            self._build_levels()
+        return len(self.high_levels)
+
+    def level_for_width(self, a_points):
+        """ Return the coarsest mip-map level that still has at least
+            a_points peaks per channel, ie: at least one peak per pixel
+        """
+        if self.high_levels is None:
+            self._build_levels()
+        f_result = 0
+        for f_i, f_level in enumerate(self.high_levels):
+            if f_level.shape[1] < a_points:
+                break
+            f_result = f_i
+        return f_result
+
+    def get_peaks(self, a_level=0):
+        """ Return (high_peaks, low_peaks) per channel for a mip-map level.
+            Each level halves the resolution of the previous one
+        """
+        if a_level == 0:
+            return self.high_peaks, self.low_peaks
+        if self.high_levels is None:
+            self._build_levels()
+        return (
+            list(self.high_levels[a_level]),
+            list(self.low_levels[a_level]),
+        )
+
     def is_valid(self):
         if (self._file is None):
             print("\n\nsample_graph.is_valid() "
@@ -8,6 +8,7 @@ from intlib.lib.util import *
 
 from . import _shared
 from .audio_item import DawAudioItem
+from .note_store import NoteStore
 from intlib.math import clip_value
 from intlib import constants
 from intlib.log import LOG
@@ -15,12 +16,33 @@ from intlib.models.multifx_settings import multifx_settings
 from intlib.lib.translate import _
 
 import copy
+import heapq
+import numpy
+import operator
 import traceback
 from typing import List
 
 
 MAX_AUDIO_ITEM_COUNT = 256
 
+_start_key = operator.attrgetter('start')
+
+def _note_key(a_note):
+    """ The fields written by MIDINote.__str__ """
+    return (
+        round(a_note.start, 6),
+        round(a_note.length, 6),
+        a_note.note_num,
+        a_note.velocity,
+        a_note.pan,
+        a_note.attack,
+        a_note.decay,
+        a_note.sustain,
+        a_note.release,
+        a_note.channel,
+        a_note.pitch_fine,
+    )
+
 class item:
     __slots__ = [
         'items',
@@ -29,6 +51,7 @@ class item:
         'pitchbends',
         'uid',
         'fx_list',
+        '_note_store',
     ]
 
     def __init__(self, a_uid):
@@ -38,10 +61,78 @@ class item:
         self.pitchbends = []
         self.uid = int(a_uid)
         self.fx_list = {} #per-audio-item-fx
+        self._note_store = None
+
+    def __getstate__(self):
+        # Copies build their own NoteStore when they need one
+        return {
+            x: getattr(self, x) for x in self.__slots__
+            if x != '_note_store'
+        }
+
+    def __setstate__(self, a_state):
+        for k, v in a_state.items():
+            setattr(self, k, v)
+        self._note_store = None
 
     def raw_notes(self) -> List[int]:
         return [x.note_num for x in self.notes]
 
+    def note_store(self) -> NoteStore:
+        """ The columnar, start-sorted view of self.notes, built when first
+            needed and kept up to date by add_note, remove_note and
+            move_note.  Code that changes the start, length, note number
+            or channel of notes directly must call invalidate_note_store()
+        """
+        f_store = self._note_store
+        if (
+            f_store is None
+            or
+            f_store.notes is not self.notes
+            or
+            len(f_store.start) != len(self.notes)
+        ):
+            self.notes.sort(key=_start_key)
+            f_store = self._note_store = NoteStore(self.notes, True)
+        return f_store
+
+    def invalidate_note_store(self):
+        """ Rebuild the NoteStore the next time it is needed """
+        self._note_store = None
+
+    def get_notes_in_range(self, a_start, a_end, a_channel=None):
+        """ The notes sounding between a_start and a_end in beats """
+        return self.note_store().notes_in_range(a_start, a_end, a_channel)
+
+    def _find_notes(self, a_notes):
+        """ Return the note in self.notes equal to each note in a_notes """
+        f_by_key = {}
+        for f_note in self.notes:
+            f_by_key.setdefault(
+                (
+                    f_note.start,
+                    f_note.note_num,
+                    f_note.length,
+                    f_note.velocity,
+                    f_note.channel,
+                ),
+                f_note,
+            )
+        f_result = []
+        for f_note in a_notes:
+            f_match = f_by_key.get(
+                (
+                    f_note.start,
+                    f_note.note_num,
+                    f_note.length,
+                    f_note.velocity,
+                    f_note.channel,
+                ),
+            )
+            if f_match is not None:
+                f_result.append(f_match)
+        return f_result
+
     def get_next_lane(self):
         f_lanes = set(x.lane_num for x in self.items.values())
         for f_i in range(24):
@@ -153,10 +244,12 @@ class item:
         f_notes = [x.clone() for x in a_item2.notes
             if x.start >= f_start_offset and x.start < f_end_offset]
 
+        f_store = self.note_store()
         for f_note in f_notes:
             f_note.start += f_offset
-            self.add_note(f_note, False)
-        self.notes.sort()
+            f_note.set_end()
+            f_store.insert(f_note)
+        self.fix_overlaps()
 
         f_ccs = [x.clone() for x in a_item2.ccs
             if x.start >= f_start_offset and x.start < f_end_offset]
@@ -221,28 +314,30 @@ class item:
     #end per-audio-item-fx
 
     def add_note(self, a_note, a_check=True):
-        if a_check:
-            for note in self.notes:
-                if (
-                    note.channel == a_note.channel
-                    and
-                    note.overlaps(a_note)
-                ):
-                    # TODO:  return -1 instead of True, and the
-                    # offending editor_index when False
-                    return False
-        self.notes.append(a_note)
-        self.notes.sort()
+        f_store = self.note_store()
+        if a_check and len(f_store.indices_overlapping(a_note)):
+            # TODO:  return -1 instead of True, and the
+            # offending editor_index when False
+            return False
+        f_store.insert(a_note)
         if not a_check:
             self.fix_overlaps()
         return True
 
     def remove_note(self, a_note):
         try:
-            self.notes.remove(a_note)
+            self.note_store().remove(a_note)
         except Exception as ex:
             LOG.exception(f"Exception in remove_note: {ex}")
 
+    def move_note(self, a_note, a_start, a_note_num):
+        """ Change the start and note number of a note in this item """
+        f_store = self.note_store()
+        f_store.pop(f_store.index(a_note))
+        a_note.set_start(a_start)
+        a_note.note_num = a_note_num
+        f_store.insert(a_note)
+
     def velocity_mod(
         self,
         a_amt,
@@ -267,34 +362,34 @@ class item:
 
          Modify the velocity of a range of notes
          """
-        f_notes = []
-
         if a_notes is None:
             f_notes = [x for x in self.notes if x.channel == channel]
         else:
-            for f_note in a_notes:
-                for f_note2 in self.notes:
-                    if f_note2 == f_note:
-                        f_notes.append(f_note2)
-                        break
-
+            f_notes = self._find_notes(a_notes)
+        if not f_notes:
+            return
+
+        f_store = NoteStore(f_notes)
+        f_index = numpy.flatnonzero(
+            (f_store.start >= a_start_beat) & (f_store.start <= a_end_beat)
+        )
         f_range_beats = a_end_beat - a_start_beat
-
-        for note in f_notes:
-            if note.start >= a_start_beat and note.start <= a_end_beat:
-                if a_line:
-                    f_frac = ((note.start - a_start_beat)/f_range_beats)
-                    f_value = int(((a_end_amt - a_amt) * f_frac) + a_amt)
-                else:
-                    f_value = int(a_amt)
-                if a_add:
-                    note.velocity += f_value
-                else:
-                    note.velocity = f_value
-                if note.velocity > 127:
-                    note.velocity = 127
-                elif note.velocity < 1:
-                    note.velocity = 1
+        if a_line:
+            if f_range_beats:
+                f_frac = (f_store.start[f_index] - a_start_beat) / f_range_beats
+            else:
+                f_frac = numpy.zeros(len(f_index))
+            f_values = (((a_end_amt - a_amt) * f_frac) + a_amt).astype(
+                numpy.int64,
+            )
+        else:
+            f_values = numpy.full(len(f_index), int(a_amt), numpy.int64)
+        if a_add:
+            f_values += f_store.velocity[f_index]
+        numpy.clip(f_values, 1, 127, out=f_values)
+        for f_i, f_value in zip(f_index.tolist(), f_values.tolist()):
+            f_store.notes[f_i].velocity = f_value
+        self.invalidate_note_store()
 
     def quantize(
         self,
@@ -315,53 +410,67 @@ class item:
             f_ccs = [x for x in self.ccs if x.channel == midi_channel]
             f_pbs = [x for x in self.pitchbends if x.channel == midi_channel]
         else:
-            for i in range(len(a_notes)):
-                for f_note in self.notes:
-                    if f_note == a_notes[i]:
-                        if a_events_move_with_item:
-                            f_start = f_note.start
-                            f_end = f_note.start + f_note.length
-                            for f_cc in self.ccs:
-                                if (
-                                    f_cc.start >= f_start
-                                    and
-                                    f_cc.start <= f_end
-                                    and
-                                    f_cc.channel == midi_channel
-                                ):
-                                    f_ccs.append(f_cc)
-                            for f_pb in self.pitchbends:
-                                if (
-                                    f_pb.start >= f_start
-                                    and
-                                    f_pb.start <= f_end
-                                    and
-                                    f_pb.channel == midi_channel
-                                ):
-                                    f_pbs.append(f_pb)
-                        f_notes.append(f_note)
-                        break
+            f_notes = self._find_notes(a_notes)
+            if a_events_move_with_item:
+                for f_note in f_notes:
+                    f_start = f_note.start
+                    f_end = f_note.start + f_note.length
+                    for f_cc in self.ccs:
+                        if (
+                            f_cc.start >= f_start
+                            and
+                            f_cc.start <= f_end
+                            and
+                            f_cc.channel == midi_channel
+                        ):
+                            f_ccs.append(f_cc)
+                    for f_pb in self.pitchbends:
+                        if (
+                            f_pb.start >= f_start
+                            and
+                            f_pb.start <= f_end
+                            and
+                            f_pb.channel == midi_channel
+                        ):
+                            f_pbs.append(f_pb)
+
+        if a_selected_only:
+            f_notes = [x for x in f_notes if x.is_selected]
 
         f_quantized_value = bar_frac_text_to_float(a_beat_frac)
         f_quantize_multiple = 1.0 / f_quantized_value
 
-        for note in f_notes:
-            if a_selected_only and not note.is_selected:
-                continue
-            f_new_start = round(note.start *
-                f_quantize_multiple) * f_quantized_value
+        # Round half to even, like round()
+        f_starts = numpy.round(
+            numpy.fromiter(
+                (x.start for x in f_notes),
+                numpy.float64,
+                len(f_notes),
+            ) * f_quantize_multiple
+        ) * f_quantized_value
+        f_lengths = numpy.round(
+            numpy.fromiter(
+                (x.length for x in f_notes),
+                numpy.float64,
+                len(f_notes),
+            ) * f_quantize_multiple
+        ) * f_quantized_value
+        f_lengths[f_lengths == 0.0] = f_quantized_value
+
+        for note, f_new_start, f_new_length in zip(
+            f_notes,
+            f_starts.tolist(),
+            f_lengths.tolist(),
+        ):
             note.start = f_new_start
-            shift_adjust = note.start - f_new_start
-            f_new_length = round(note.length *
-                f_quantize_multiple) * f_quantized_value
-            if f_new_length == 0.0:
-                f_new_length = f_quantized_value
             note.set_length(f_new_length)
             f_result.append(str(note))
+        # The start was already assigned, so events are not shifted
+        shift_adjust = 0.0
 
         self.fix_overlaps()
 
-        if a_events_move_with_item:
+        if a_events_move_with_item and f_notes:
             for cc in f_ccs:
                 cc.start -= shift_adjust
             for pb in f_pbs:
@@ -379,7 +488,6 @@ class item:
         channel=None,
     ):
         f_total = a_semitones + (a_octave * 12)
-        f_notes = []
         f_result = []
 
         if a_notes is None:
@@ -388,24 +496,27 @@ class item:
                 if channel is None or channel == x.channel
             ]
         else:
-            for i in range(len(a_notes)):
-                for f_note in self.notes:
-                    if f_note == a_notes[i]:
-                        f_notes.append(f_note)
-                        break
+            f_notes = self._find_notes(a_notes)
+        if a_selected_only:
+            f_notes = [x for x in f_notes if x.is_selected]
         if a_duplicate:
-            f_duplicates = []
-        for note in f_notes:
-            if a_selected_only and not note.is_selected:
-                continue
-            if a_duplicate:
-                f_duplicates.append(MIDINote.from_str(str(note)))
-            note.note_num += f_total
-            note.note_num = clip_value(note.note_num, 0, 120)
+            f_duplicates = [MIDINote.from_str(str(x)) for x in f_notes]
+
+        f_note_nums = numpy.fromiter(
+            (x.note_num for x in f_notes),
+            numpy.int64,
+            len(f_notes),
+        )
+        f_note_nums += f_total
+        numpy.clip(f_note_nums, 0, 120, out=f_note_nums)
+        for note, f_note_num in zip(f_notes, f_note_nums.tolist()):
+            note.note_num = f_note_num
             f_result.append(str(note))
+        self.invalidate_note_store()
         if a_duplicate:
-            self.notes += f_duplicates
-            self.notes.sort()
+            f_store = self.note_store()
+            for f_note in f_duplicates:
+                f_store.insert(f_note)
         return f_result
 
     def smooth_automation_points(self, a_is_cc, midi_channel, a_cc_num=-1):
@@ -512,39 +623,46 @@ class item:
         """ Truncate the lengths of any notes that overlap
             the start of another note
         """
-        channels = {x.channel for x in self.notes}
-        f_to_delete = []
-        for channel in channels:
-            for f_note in (x for x in self.notes if x.channel == channel):
-                if f_note not in f_to_delete:
-                    for f_note2 in (
-                        x for x in self.notes if x.channel == channel
-                    ):
-                        if f_note != f_note2 and f_note2 not in f_to_delete:
-                            if f_note.note_num == f_note2.note_num:
-                                if f_note2.start == f_note.start:
-                                    if f_note2.length == f_note.length:
-                                        f_to_delete.append(f_note2)
-                                    elif f_note2.length > f_note.length:
-                                        f_note2.length = \
-                                            f_note2.length - f_note.length
-                                        f_note2.start = f_note.end
-                                        f_note2.set_end()
-                                    else:
-                                        f_note.length = \
-                                            f_note.length - f_note2.length
-                                        f_note.start = f_note2.end
-                                        f_note.set_end()
-                                elif f_note2.start > f_note.start:
-                                    if f_note.end > f_note2.start:
-                                        f_note.length = \
-                                            f_note2.start - f_note.start
-                                        f_note.set_end()
-        for f_note in self.notes:
-            if f_note.length < _shared.min_note_length:
-                f_to_delete.append(f_note)
-        for f_note in f_to_delete:
-            self.notes.remove(f_note)
+        f_to_delete = set()
+        # Built from the notes as they are now, the editors change lengths
+        # directly before calling this
+        self.invalidate_note_store()
+        f_store = self.note_store()
+        for f_group in f_store.groups():
+            # (start, length, order, note), sorted so already a heap.
+            # Of 2 notes with the same start, the longer one is moved to
+            # start at the end of the shorter one and goes back in the heap
+            f_heap = [
+                (f_note.start, f_note.length, f_order, f_note)
+                for f_order, f_note in enumerate(f_store.get_notes(f_group))
+            ]
+            f_prev = None
+            while f_heap:
+                f_start, f_length, f_order, f_note = heapq.heappop(f_heap)
+                if f_prev is not None:
+                    if f_note.start == f_prev.start:
+                        if f_note.length == f_prev.length:
+                            f_to_delete.add(id(f_note))
+                        else:
+                            f_note.length = f_note.length - f_prev.length
+                            f_note.start = f_prev.end
+                            f_note.set_end()
+                            heapq.heappush(
+                                f_heap,
+                                (f_note.start, f_note.length, f_order, f_note),
+                            )
+                        continue
+                    elif f_prev.end > f_note.start:
+                        f_prev.length = f_note.start - f_prev.start
+                        f_prev.set_end()
+                f_prev = f_note
+        self.notes[:] = [
+            x for x in self.notes
+            if id(x) not in f_to_delete
+            and
+            x.length >= _shared.min_note_length
+        ]
+        self.invalidate_note_store()
 
     def get_next_default_note(self):
         pass
@@ -679,9 +797,49 @@ class item:
     def get_next_default_cc(self):
         pass
 
+    def load_events(self, a_notes, a_ccs, a_pbs):
+        """ Add many events to an empty item, sorting each list once.
+
+            Equivalent to calling add_note, add_cc and add_pb for each
+            event in start order:  notes that overlap an earlier note with
+            the same channel and note number, and duplicate CCs and
+            pitchbends are dropped
+        """
+        assert not (self.notes or self.ccs or self.pitchbends), self.uid
+        # Each accepted note starts at or after the previous ones, so a
+        # note overlaps one of them only if it starts before their last end
+        f_ends = {}
+        for f_note in sorted(a_notes, key=_start_key):
+            f_key = (f_note.channel, f_note.note_num)
+            f_end = f_ends.get(f_key)
+            if f_end is not None:
+                if f_note.start < f_end:
+                    continue
+                f_ends[f_key] = max(f_end, f_note.end)
+            else:
+                f_ends[f_key] = f_note.end
+            self.notes.append(f_note)
+
+        f_keys = set()
+        for f_cc in sorted(a_ccs, key=_start_key):
+            f_key = (f_cc.start, f_cc.cc_num, f_cc.cc_val, f_cc.channel)
+            if f_key not in f_keys:
+                f_keys.add(f_key)
+                self.ccs.append(f_cc)
+
+        f_keys = set()
+        for f_pb in sorted(a_pbs, key=_start_key):
+            f_key = (f_pb.start, f_pb.pb_val, f_pb.channel)
+            if f_key not in f_keys:
+                f_keys.add(f_key)
+                self.pitchbends.append(f_pb)
+
     @staticmethod
     def from_str(a_str, a_uid):
         f_result = item(a_uid)
+        f_notes = []
+        f_ccs = []
+        f_pbs = []
         f_arr = a_str.split("\n")
         for f_event_str in f_arr:
             if f_event_str == terminating_char:
@@ -689,11 +847,11 @@ class item:
             else:
                 f_event_arr = f_event_str.split("|")
                 if f_event_arr[0] == "n":
-                    f_result.add_note(MIDINote.from_arr(f_event_arr[1:]))
+                    f_notes.append(MIDINote.from_arr(f_event_arr[1:]))
                 elif f_event_arr[0] == "c":
-                    f_result.add_cc(MIDIControl.from_arr(f_event_arr[1:]))
+                    f_ccs.append(MIDIControl.from_arr(f_event_arr[1:]))
                 elif f_event_arr[0] == "p":
-                    f_result.add_pb(MIDIPitchbend.from_arr(f_event_arr[1:]))
+                    f_pbs.append(MIDIPitchbend.from_arr(f_event_arr[1:]))
                 elif f_event_arr[0] == "a":
                     f_result.add_item(
                         int(f_event_arr[1]),
@@ -719,16 +877,19 @@ class item:
                 else:
                     LOG.error("Error: {}".format(f_event_arr))
                     assert False, "Invalid type '{}'".format(f_event_arr[0])
+        f_result.load_events(f_notes, f_ccs, f_pbs)
         return f_result
 
     def deduplicate(self):
         len_orig = len(self.notes)
-        f_note_set = {str(x) for x in self.notes}
-        note_diff = len_orig - len(f_note_set)
+        f_notes = {}
+        for f_note in self.notes:
+            f_notes.setdefault(_note_key(f_note), f_note)
+        note_diff = len_orig - len(f_notes)
         if note_diff:
             LOG.info("Deduplicated {} notes".format(note_diff))
-            self.notes = [MIDINote.from_str(x) for x in f_note_set]
-            self.notes.sort()
+            self.notes = list(f_notes.values())
+            self.notes.sort(key=_start_key)
         # TODO:  Others
 
     def __str__(self):
@@ -737,8 +898,10 @@ class item:
         f_result.append("U|{}".format(self.uid))
         f_midi_count = len(self.notes) + len(self.ccs) + len(self.pitchbends)
         f_result.append("M|{}".format(f_midi_count))
-        f_result += [str(x) for x in
-            sorted(self.notes + self.ccs + self.pitchbends)]
+        f_result += [str(x) for x in sorted(
+            self.notes + self.ccs + self.pitchbends,
+            key=_start_key,
+        )]
         for k, f_item in list(self.items.items()):
             f_result.append("a|{}|{}".format(k, f_item))
         for k, v in self.fx_list.items():
@@ -0,0 +1,191 @@
+import numpy
+import operator
+
+__all__ = [
+    'NoteStore',
+]
+
+_start_key = operator.attrgetter('start')
+
+# (column, MIDINote attribute, dtype)
+_COLUMNS = (
+    ('start', 'start', numpy.float64),
+    ('length', 'length', numpy.float64),
+    ('end', 'end', numpy.float64),
+    ('note_num', 'note_num', numpy.int64),
+    ('velocity', 'velocity', numpy.int64),
+    ('channel', 'channel', numpy.int64),
+    ('pan', 'pan', numpy.float64),
+    ('selected', 'is_selected', numpy.bool_),
+)
+
+
+class NoteStore:
+    """ Columnar view of a list of MIDINote objects, sorted by start.
+
+        The arrays are a snapshot of the notes, kept up to date by insert()
+        and remove(), but not by changing a note's attributes directly.
+        self.notes holds the MIDINote objects in the same order, those are
+        what the editors and the project file work with
+    """
+    __slots__ = [
+        'notes',
+        'start',
+        'length',
+        'end',
+        'note_num',
+        'velocity',
+        'channel',
+        'pan',
+        'selected',
+        'max_length',
+    ]
+
+    def __init__(self, a_notes, a_sorted=False):
+        """ @a_notes:  The MIDINote objects
+            @a_sorted: a_notes is a list already sorted by start, use it
+                       as self.notes instead of a sorted copy, so that
+                       insert() and remove() also update a_notes
+        """
+        if a_sorted:
+            self.notes = a_notes
+        else:
+            # sorted() is stable, notes with the same start keep their order
+            self.notes = sorted(a_notes, key=_start_key)
+        for f_name, f_attr, f_dtype in _COLUMNS:
+            setattr(self, f_name, self._column(f_attr, f_dtype))
+        # An upper bound after notes are removed, which is all that the
+        # range queries need
+        self.max_length = (
+            float(self.length.max()) if len(self.notes) else 0.
+        )
+
+    def _column(self, a_attr, a_dtype):
+        return numpy.fromiter(
+            map(operator.attrgetter(a_attr), self.notes),
+            a_dtype,
+            len(self.notes),
+        )
+
+    def __len__(self):
+        return len(self.notes)
+
+    def insert(self, a_note):
+        """ Add a_note after the notes with the same start, return its
+            index
+        """
+        f_index = int(numpy.searchsorted(self.start, a_note.start, 'right'))
+        self.notes.insert(f_index, a_note)
+        for f_name, f_attr, f_dtype in _COLUMNS:
+            setattr(
+                self,
+                f_name,
+                numpy.insert(
+                    getattr(self, f_name),
+                    f_index,
+                    getattr(a_note, f_attr),
+                ),
+            )
+        self.max_length = max(self.max_length, a_note.length)
+        return f_index
+
+    def pop(self, a_index):
+        """ Remove and return the note at a_index """
+        f_note = self.notes.pop(a_index)
+        for f_name, f_attr, f_dtype in _COLUMNS:
+            setattr(self, f_name, numpy.delete(getattr(self, f_name), a_index))
+        return f_note
+
+    def index(self, a_note, a_start=None, a_identity=True):
+        """ Index of a_note, like list.index(), but only searching the notes
+            with the same start.
+
+            @a_start:    The start of a_note in the store, if it has been
+                         changed since it was added
+            @a_identity: Find a_note itself, otherwise the first note equal
+                         to it
+            @raises:     ValueError if not found
+        """
+        f_start = a_note.start if a_start is None else a_start
+        f_lo = int(numpy.searchsorted(self.start, f_start, 'left'))
+        f_hi = int(numpy.searchsorted(self.start, f_start, 'right'))
+        for f_index in range(f_lo, f_hi):
+            f_note = self.notes[f_index]
+            if f_note is a_note if a_identity else f_note == a_note:
+                return f_index
+        raise ValueError(f"{a_note} not in NoteStore")
+
+    def remove(self, a_note):
+        """ Remove the first note equal to a_note, like list.remove() """
+        self.pop(self.index(a_note, a_identity=False))
+
+    def get_notes(self, a_indices):
+        return [self.notes[x] for x in a_indices]
+
+    def indices_in_range(self, a_start, a_end, a_channel=None):
+        """ Indices of the notes sounding between a_start and a_end, in
+            beats, ie: that start before a_end and end after a_start
+        """
+        f_lo = numpy.searchsorted(
+            self.start,
+            a_start - self.max_length,
+            'left',
+        )
+        f_hi = numpy.searchsorted(self.start, a_end, 'left')
+        f_start = self.start[f_lo:f_hi]
+        f_mask = (self.end[f_lo:f_hi] > a_start) | (f_start >= a_start)
+        if a_channel is not None:
+            f_mask &= self.channel[f_lo:f_hi] == a_channel
+        return numpy.flatnonzero(f_mask) + f_lo
+
+    def notes_in_range(self, a_start, a_end, a_channel=None):
+        return self.get_notes(
+            self.indices_in_range(a_start, a_end, a_channel),
+        )
+
+    def indices_overlapping(self, a_note):
+        """ Indices of the notes that would overlap a_note if it was added,
+            same as MIDINote.overlaps() for each note on the same channel
+        """
+        f_lo = numpy.searchsorted(
+            self.start,
+            a_note.start - self.max_length,
+            'left',
+        )
+        f_hi = numpy.searchsorted(
+            self.start,
+            max(a_note.start, a_note.end),
+            'right',
+        )
+        f_start = self.start[f_lo:f_hi]
+        f_mask = (
+            (a_note.start >= f_start) & (a_note.start < self.end[f_lo:f_hi])
+        ) | (
+            (a_note.start < f_start) & (a_note.end > f_start)
+        )
+        f_mask &= self.note_num[f_lo:f_hi] == a_note.note_num
+        f_mask &= self.channel[f_lo:f_hi] == a_note.channel
+        return numpy.flatnonzero(f_mask) + f_lo
+
+    def groups(self):
+        """ Indices of the notes for each (channel, note number), each
+            sorted by start, then length, then their order in self.notes
+        """
+        if not self.notes:
+            return []
+        f_order = numpy.lexsort((
+            numpy.arange(len(self.notes)),
+            self.length,
+            self.start,
+            self.note_num,
+            self.channel,
+        ))
+        f_channel = self.channel[f_order]
+        f_note_num = self.note_num[f_order]
+        f_splits = numpy.flatnonzero(
+            (f_channel[1:] != f_channel[:-1])
+            |
+            (f_note_num[1:] != f_note_num[:-1])
+        ) + 1
+        return numpy.split(f_order, f_splits)
+
@@ -19,7 +19,7 @@ from intlib.models.core.midi_events import MIDINote, MIDIControl, MIDIPitchbend
 note = MIDINote
 cc = MIDIControl
 pitchbend = MIDIPitchbend
-from intlib.lib import history
+from intlib.models.project.history import HistoryFile, ProjectHistory
 from intlib.lib import util
 from intlib.lib.util import *
 from intlib.lib.translate import _
@@ -57,6 +57,7 @@ file_notes = os.path.join(folder_daw, "notes.txt")
 
 class DawProject(AbstractProject):
     def __init__(self, a_with_audio):
+        AbstractProject.__init__(self)
         self.undo_context = 0
         self.TRACK_COUNT = _shared.TRACK_COUNT_ALL
         self.last_item_number = 1
@@ -98,7 +99,7 @@ class DawProject(AbstractProject):
             self, a_folder, a_file, a_text, a_force_new)
         if f_result:
             f_existed, f_old = f_result
-            f_history_file = history.history_file(
+            f_history_file = HistoryFile.from_text(
                 a_folder, a_file, a_text, f_old, f_existed)
             self.history_files.append(f_history_file)
 
@@ -106,45 +107,46 @@ class DawProject(AbstractProject):
         self.undo_context = a_context
 
     def clear_undo_context(self, a_context):
-        self.history_commits[a_context] = []
+        self.history.clear_context(a_context)
+
+    def set_history_memory_budget(self, a_bytes):
+        """ Set the memory used by undo history before older commits are
+            moved to disk
+        """
+        self.history.set_max_bytes(a_bytes)
 
     def commit(self, a_message, a_discard=False):
         """ Commit the project history """
-        if self.undo_context not in self.history_commits:
-            self.history_commits[self.undo_context] = []
-        if self.history_undo_cursor > 0:
-            self.history_commits[self.undo_context] = self.history_commits[
-                self.undo_context][:self.history_undo_cursor]
-            self.history_undo_cursor = 0
-        if self.history_files and not a_discard:
-            f_commit = history.history_commit(
-                self.history_files, a_message)
-            self.history_commits[self.undo_context].append(f_commit)
+        self.history.commit(
+            self.undo_context,
+            [] if a_discard else self.history_files,
+            a_message,
+        )
         self.history_files = []
 
     def clear_history(self):
-        self.history_undo_cursor = 0
         self.history_files = []
-        self.history_commits = {}
+        if hasattr(self, 'history'):
+            self.history.clear()
+        else:
+            self.history = ProjectHistory()
 
     def undo(self):
-        if self.undo_context not in self.history_commits or \
-        self.history_undo_cursor >= len(
-        self.history_commits[self.undo_context]):
-            return False
-        self.history_undo_cursor += 1
-        self.history_commits[self.undo_context][
-            -1 * self.history_undo_cursor].undo(self.project_folder)
-        return True
+        self.clear_caches()
+        return self.history.undo(self.undo_context, self.project_folder)
 
     def redo(self):
-        if self.undo_context not in self.history_commits or \
-        self.history_undo_cursor == 0:
-            return False
-        self.history_commits[self.undo_context][
-            -1 * self.history_undo_cursor].redo(self.project_folder)
-        self.history_undo_cursor -= 1
-        return True
+        self.clear_caches()
+        return self.history.redo(self.undo_context, self.project_folder)
+
+    def clear_caches(self):
+        """ Forget parsed items and sequences, ie: after their files were
+            changed without going through save_item_by_uid/save_sequence
+        """
+        self.clear_saved_text()
+        self._items_dict_cache = None
+        self._sequence_cache = {}
+        self._item_cache = {}
 
     def get_files_dict(self, a_folder, a_ext=None):
         f_result = {}
@@ -217,6 +219,7 @@ class DawProject(AbstractProject):
             if not os.path.isdir(project_dir):
                 LOG.info(f'Creating directory: {project_dir}')
                 os.makedirs(project_dir)
+        self.clear_caches()
 
     def open_project(self, a_project_file, a_notify_osc=True):
         self.set_project_folders(a_project_file)
@@ -264,16 +267,26 @@ class DawProject(AbstractProject):
         playlist = self.get_playlist()
         result = set()
         for uid in (x.seq_uid for x in playlist.pool):
-            f_sequence = self.get_sequence(uid=uid)
-            f_item_uids = set(x.item_uid for x in f_sequence.items)
-            f_items = [self.get_item_by_uid(x) for x in f_item_uids]
-            result.update(
-                set(y.uid for x in f_items for y in x.items.values())
-            )
+            result.update(self.sequence_audio_pool_uids(uid))
         for uid in self.get_plugin_audio_pool_uids():
             result.add(uid)
         return result
 
+    def sequence_audio_pool_uids(self, uid=None):
+        """ The audio pool uids of the audio items in a sequence """
+        f_sequence = self.get_sequence(uid=uid)
+        f_item_uids = set(x.item_uid for x in f_sequence.items)
+        f_items = [self.get_item_by_uid(x) for x in f_item_uids]
+        return set(y.uid for x in f_items for y in x.items.values())
+
+    def prewarm_sequence_sample_graphs(self, uid=None):
+        """ Load the sample graphs used by a sequence on a background
+            thread, so that opening its items does not block on disk
+        """
+        return constants.PROJECT.prewarm_sample_graphs(
+            self.sequence_audio_pool_uids(uid),
+        )
+
     def get_notes(self):
         if os.path.isfile(self.pynotes_file):
             return read_file_text(self.pynotes_file)
@@ -564,6 +577,9 @@ class DawProject(AbstractProject):
                 self.get_item_string(a_item_uid),
                 a_item_uid,
             )
+            self._item_cache[a_item_uid] = _item
+            if _copy:
+                _item = copy.deepcopy(_item)
         assert _item.uid == a_item_uid, (
             "UIDs do not match",
             _item.uid,
@@ -1,4 +1,5 @@
 from .track import TrackSend
+import collections
 try:
     from int_vendor.pymarshal import pm_assert
 except ImportError:
@@ -15,6 +16,176 @@ class RoutingGraph:
                 There may not be more than MAX_TRACK_SENDS track sends.
         """
         self.graph = graph if graph is not None else {}
+        self.invalidate()
+
+    def invalidate(self):
+        """ Drop the cached adjacency, topological order and depths.  Call
+            this after changing self.graph directly instead of through
+            set_node(), toggle() or reorder()
+        """
+        # {track_num: {track_num: edge count}}, every track that has
+        # sends or is sent to has an entry in both
+        self._outputs = None
+        self._inputs = None
+        # {track_num: position}, sources before the tracks they send to
+        self._order = None
+        self._acyclic = True
+        # {track_num: int}, see sort_all_paths()
+        self._depths = None
+
+    def _build(self):
+        """ Build the adjacency and a topological order, in O(V+E) """
+        if self._outputs is not None:
+            return
+        f_outputs = {}
+        f_inputs = {}
+        for k, f_sends in self.graph.items():
+            f_outputs.setdefault(k, {})
+            f_inputs.setdefault(k, {})
+            for f_send in f_sends.values():
+                _add_edge(f_outputs, f_inputs, k, f_send.output)
+        # Kahn's algorithm
+        f_in_degree = {k: len(v) for k, v in f_inputs.items()}
+        f_ready = collections.deque(
+            k for k in sorted(f_outputs) if not f_in_degree[k]
+        )
+        f_order = []
+        while f_ready:
+            f_node = f_ready.popleft()
+            f_order.append(f_node)
+            for f_output in f_outputs[f_node]:
+                f_in_degree[f_output] -= 1
+                if not f_in_degree[f_output]:
+                    f_ready.append(f_output)
+        # A project file edited by hand could contain a feedback loop,
+        # the tracks in the loop go last and the slow path is used
+        self._acyclic = len(f_order) == len(f_outputs)
+        if not self._acyclic:
+            f_order.extend(sorted(k for k, v in f_in_degree.items() if v))
+        self._outputs = f_outputs
+        self._inputs = f_inputs
+        self._order = {k: f_i for f_i, k in enumerate(f_order)}
+
+    def _add_node(self, a_node):
+        if a_node not in self._outputs:
+            self._outputs[a_node] = {}
+            self._inputs[a_node] = {}
+            self._order[a_node] = (
+                max(self._order.values()) + 1 if self._order else 0
+            )
+
+    def _reachable(self, a_start, a_max_order=None):
+        """ The set of tracks that a_start sends to, directly or not,
+            including a_start.  With a_max_order, tracks after that
+            position in the topological order are not searched
+        """
+        f_result = {a_start}
+        f_stack = [a_start]
+        while f_stack:
+            f_node = f_stack.pop()
+            for f_output in self._outputs.get(f_node, ()):
+                if f_output in f_result:
+                    continue
+                if (
+                    a_max_order is not None
+                    and
+                    self._order[f_output] > a_max_order
+                ):
+                    continue
+                f_result.add(f_output)
+                f_stack.append(f_output)
+        return f_result
+
+    def _reaches(self, a_src, a_dest):
+        """ True if a_src sends to a_dest, directly or not, or is a_dest """
+        if a_src == a_dest:
+            return True
+        self._build()
+        if a_src not in self._order or a_dest not in self._order:
+            return False
+        if self._acyclic:
+            if self._order[a_src] > self._order[a_dest]:
+                return False
+            return a_dest in self._reachable(a_src, self._order[a_dest])
+        return a_dest in self._reachable(a_src)
+
+    def _connect(self, a_src, a_dest):
+        """ Add an edge that does not create a cycle to the adjacency and
+            restore the topological order, Pearce and Kelly's algorithm:
+            only the tracks between a_dest and a_src in the old order move
+        """
+        self._build()
+        self._add_node(a_src)
+        self._add_node(a_dest)
+        _add_edge(self._outputs, self._inputs, a_src, a_dest)
+        self._depths = None
+        if not self._acyclic:
+            return
+        f_lower = self._order[a_dest]
+        f_upper = self._order[a_src]
+        if f_lower > f_upper:
+            return
+        f_forward = self._reachable(a_dest, f_upper)
+        f_backward = {a_src}
+        f_stack = [a_src]
+        while f_stack:
+            f_node = f_stack.pop()
+            for f_input in self._inputs[f_node]:
+                if (
+                    f_input not in f_backward
+                    and
+                    self._order[f_input] > f_lower
+                ):
+                    f_backward.add(f_input)
+                    f_stack.append(f_input)
+        f_key = self._order.__getitem__
+        f_nodes = sorted(f_backward, key=f_key) + sorted(f_forward, key=f_key)
+        f_positions = sorted(f_key(x) for x in f_nodes)
+        for f_node, f_pos in zip(f_nodes, f_positions):
+            self._order[f_node] = f_pos
+
+    def _disconnect(self, a_src, a_dest):
+        """ Remove an edge, the topological order is still valid """
+        if self._outputs is None:
+            return
+        _remove_edge(self._outputs, self._inputs, a_src, a_dest)
+        self._depths = None
+
+    def get_depths(self):
+        """ {track_num: int} for each track in self.graph, the number of
+            tracks in the longest path from the track to the main track,
+            including both, or 0 if it is not routed to the main track.
+            Cached until the routing changes
+        """
+        if self._depths is not None:
+            return self._depths
+        self._build()
+        if not self._acyclic:
+            f_depths = {}
+            for f_node in self.graph:
+                f_paths = self.find_all_paths(f_node, 0)
+                f_depths[f_node] = (
+                    max(len(x) for x in f_paths) if f_paths else 0
+                )
+            self._depths = f_depths
+            return f_depths
+        f_depths = {}
+        # Every track sends only to tracks later in the order
+        for f_node in sorted(
+            self._order,
+            key=self._order.__getitem__,
+            reverse=True,
+        ):
+            if f_node == 0:
+                f_depths[f_node] = 1
+                continue
+            f_max = max(
+                (f_depths[x] for x in self._outputs[f_node]),
+                default=0,
+            )
+            f_depths[f_node] = f_max + 1 if f_max else 0
+        self._depths = {k: f_depths.get(k, 0) for k in self.graph}
+        return self._depths
 
     def reorder(self, a_dict):
         """
@@ -29,6 +200,7 @@ class RoutingGraph:
             for v in f_dict.values():
                 v.track_num = k
                 v.output = a_dict[v.output]
+        self.invalidate()
 
     def set_node(self, a_index, a_dict):
         """
@@ -36,8 +208,12 @@ class RoutingGraph:
             a_dict:  {0: TrackSend(...), ...}
         """
         self.graph[int(a_index)] = a_dict
+        self.invalidate()
 
     def find_all_paths(self, start, end=0, path=[]):
+        """ Every path from start to end, exponential in the number of
+            sends, use check_for_feedback() or get_depths() instead
+        """
         path = path + [start]
         if start == end:
             return [path]
@@ -52,7 +228,10 @@ class RoutingGraph:
         return paths
 
     def check_for_feedback(self, a_new, a_old):
-        return self.find_all_paths(a_old, a_new)
+        """ True if connecting a_new to a_old would create a feedback loop,
+            ie: a_old already sends to a_new
+        """
+        return self._reaches(a_old, a_new)
 
     def toggle(
         self,
@@ -78,6 +257,7 @@ class RoutingGraph:
             for k, v in self.graph[a_src].copy().items():
                 if v.output == a_dest and v.conn_type == conn_type:
                     self.graph[a_src].pop(k)
+                    self._disconnect(a_src, a_dest)
         else:
             if self.check_for_feedback(a_src, a_dest):
                 return "Can't make connection, it would create a feedback loop"
@@ -93,7 +273,7 @@ class RoutingGraph:
                         break
             f_result = TrackSend(a_src, f_i, a_dest, conn_type)
             self.graph[a_src][f_i] = f_result
-            self.set_node(a_src, self.graph[a_src])
+            self._connect(a_src, a_dest)
         return None
 
     def set_default_output(
@@ -121,13 +301,7 @@ class RoutingGraph:
             return False
 
     def sort_all_paths(self):
-        f_result = {}
-        for f_path in self.graph:
-            f_paths = self.find_all_paths(f_path, 0)
-            if f_paths:
-                f_result[f_path] = max(len(x) for x in f_paths)
-            else:
-                f_result[f_path] = 0
+        f_result = self.get_depths()
         return sorted(
             f_result,
             key=lambda x: f_result[x],
@@ -172,3 +346,20 @@ class RoutingGraph:
             f_result.set_node(k, v)
         return f_result
 
+
+def _add_edge(a_outputs, a_inputs, a_src, a_dest):
+    f_outputs = a_outputs.setdefault(a_src, {})
+    f_outputs[a_dest] = f_outputs.get(a_dest, 0) + 1
+    a_inputs.setdefault(a_src, {})
+    a_outputs.setdefault(a_dest, {})
+    f_inputs = a_inputs.setdefault(a_dest, {})
+    f_inputs[a_src] = f_inputs.get(a_src, 0) + 1
+
+def _remove_edge(a_outputs, a_inputs, a_src, a_dest):
+    for f_dict, f_key in (
+        (a_outputs[a_src], a_dest),
+        (a_inputs[a_dest], a_src),
+    ):
+        f_dict[f_key] -= 1
+        if not f_dict[f_key]:
+            f_dict.pop(f_key)
@@ -2,6 +2,7 @@ from . import _shared
 from .sequence_marker import loop_marker
 from .seq_item import sequencer_item
 from .tempo_marker import tempo_marker
+from .tempo_map import TempoMap
 from intlib.models.core.audio_item import SgAudioItem
 from intlib.models.core.midi_events import MIDINote, MIDIControl, MIDIPitchbend
 # Aliases
@@ -18,16 +19,19 @@ class sequencer:
         'items',
         'markers',
         'loop_marker',
+        '_tempo_map',
     ]
     def __init__(self, name=None):
         self.name = name
         self.items = []
         self.markers = {}
         self.loop_marker = None
+        self._tempo_map = None
         self.set_marker(tempo_marker(0, 128.0, 4, 4))
 
     def set_marker(self, a_marker):
         self.markers[(a_marker.beat, a_marker.type)] = a_marker
+        self._tempo_map = None
 
     def delete_marker(self, a_marker):
         f_tuple = (a_marker.beat, a_marker.type)
@@ -35,6 +39,7 @@ class sequencer:
             return # don't delete the first tempo marker
         if f_tuple in self.markers:
             self.markers.pop(f_tuple)
+            self._tempo_map = None
 
     def has_marker(self, a_beat, a_type):
         f_tuple = tuple(int(x) for x in (a_beat, a_type))
@@ -57,40 +62,40 @@ class sequencer:
             self.set_marker(a_marker)
         self.loop_marker = a_marker
 
+    def get_tempo_map(self):
+        """ The TempoMap of the tempo markers, rebuilt after the markers
+            change.  Change markers with set_marker() and delete_marker(),
+            or call invalidate_tempo_map() after modifying one in place
+        """
+        if self._tempo_map is None:
+            self._tempo_map = TempoMap(
+                x for x in self.markers.values() if x.type == 2
+            )
+        return self._tempo_map
+
+    def invalidate_tempo_map(self):
+        self._tempo_map = None
+
     def get_tempo_markers(self):
-        return sorted(x for x in self.markers.values() if x.type == 2)
+        return list(self.get_tempo_map().markers)
 
     def get_tempo_at_pos(self, a_beat):
-        f_tempo_markers = self.get_tempo_markers()
-        for f_t1, f_t2 in zip(f_tempo_markers, f_tempo_markers[1:]):
-            if a_beat < f_t2.beat and a_beat >= f_t1.beat:
-                return f_t1.real_tempo
-        return f_tempo_markers[-1].real_tempo
+        return self.get_tempo_map().tempo_at_beat(a_beat)
 
     def get_tsig_at_pos(self, a_beat):
-        f_tempo_markers = self.get_tempo_markers()
-        for f_t1, f_t2 in zip(f_tempo_markers, f_tempo_markers[1:]):
-            if a_beat < f_t2.beat and a_beat > f_t1.beat:
-                return f_t1.tsig_num
-        return f_tempo_markers[-1].tsig_num
+        return self.get_tempo_map().tsig_at_beat(a_beat)
 
     def get_seconds_at_beat(self, a_beat):
         if not a_beat:
             return 0.0
-        f_time = 0.0
-        f_found = False
-        f_tempo_markers = self.get_tempo_markers()
-        for f_t1, f_t2 in zip(f_tempo_markers, f_tempo_markers[1:]):
-            if a_beat < f_t2.beat and a_beat > f_t1.beat:
-                f_time += (a_beat - f_t1.beat) * (60.0 / f_t1.real_tempo)
-                f_found = True
-                break
-            else:
-                f_time += (f_t2.beat - f_t1.beat) * (60.0 / f_t1.real_tempo)
-        if not f_found:
-            f_t1 = f_tempo_markers[-1]
-            f_time += (a_beat - f_t1.beat) * (60.0 / f_t1.real_tempo)
-        return f_time
+        return self.get_tempo_map().seconds_at_beat(a_beat)
+
+    def get_beat_at_seconds(self, a_seconds):
+        return self.get_tempo_map().beat_at_seconds(a_seconds)
+
+    def get_seconds_at_beats(self, a_beats):
+        """ get_seconds_at_beat() for an array of beats """
+        return self.get_tempo_map().seconds_at_beats(a_beats)
 
     def get_time_at_beat(self, a_beat):
         f_time = self.get_seconds_at_beat(a_beat)
@@ -100,8 +105,9 @@ class sequencer:
         return "{}:{}.{}".format(f_minutes, str(f_seconds).zfill(2), f_frac)
 
     def get_sample_count(self, a_beat1, a_beat2, a_sr):
-        f_time1 = self.get_seconds_at_beat(a_beat1)
-        f_time2 = self.get_seconds_at_beat(a_beat2)
+        f_tempo_map = self.get_tempo_map()
+        f_time1 = f_tempo_map.seconds_at_beat(a_beat1)
+        f_time2 = f_tempo_map.seconds_at_beat(a_beat2)
         return int(round((f_time1 - f_time2) * a_sr))
 
     def reorder(self, a_dict):
@@ -179,6 +185,7 @@ class sequencer:
             tpl = (marker.beat, marker.type)
             markers[tpl] = marker
         self.markers = markers
+        self._tempo_map = None
 
     def clear_range(self, a_track_list, a_start_beat, a_end_beat):
         LOG.debug(
@@ -0,0 +1,115 @@
+import bisect
+import numpy
+
+__all__ = [
+    'TempoMap',
+]
+
+
+class TempoMap:
+    """ Beat to time conversion for a list of tempo markers.
+
+        Each marker starts a segment of constant tempo that lasts until the
+        next marker, the last segment lasts forever.  The start time of
+        each segment is summed once, so conversions are a bisect of the
+        marker positions and a multiply
+    """
+    __slots__ = [
+        'markers',
+        'beats',
+        'seconds',
+        'seconds_per_beat',
+        'tsig_nums',
+        '_beats_arr',
+        '_seconds_arr',
+        '_spb_arr',
+    ]
+
+    def __init__(self, a_markers):
+        """ a_markers:  tempo_marker objects, the first must be at beat 0 """
+        self.markers = sorted(a_markers)
+        assert self.markers, "A tempo map needs at least 1 tempo marker"
+        self.beats = [float(x.beat) for x in self.markers]
+        self.seconds_per_beat = [60.0 / x.real_tempo for x in self.markers]
+        self.tsig_nums = [x.tsig_num for x in self.markers]
+        self.seconds = [0.0]
+        for f_i in range(1, len(self.markers)):
+            self.seconds.append(
+                self.seconds[-1] + (
+                    (self.beats[f_i] - self.beats[f_i - 1])
+                    * self.seconds_per_beat[f_i - 1]
+                )
+            )
+        self._beats_arr = numpy.array(self.beats)
+        self._seconds_arr = numpy.array(self.seconds)
+        self._spb_arr = numpy.array(self.seconds_per_beat)
+
+    def __len__(self):
+        return len(self.markers)
+
+    def index_at_beat(self, a_beat):
+        """ The index of the marker whose segment contains a_beat.  Beats
+            before the first marker use the first marker
+        """
+        return max(bisect.bisect_right(self.beats, a_beat) - 1, 0)
+
+    def index_at_seconds(self, a_seconds):
+        return max(bisect.bisect_right(self.seconds, a_seconds) - 1, 0)
+
+    def marker_at_beat(self, a_beat):
+        return self.markers[self.index_at_beat(a_beat)]
+
+    def tempo_at_beat(self, a_beat):
+        return self.markers[self.index_at_beat(a_beat)].real_tempo
+
+    def tsig_at_beat(self, a_beat):
+        return self.tsig_nums[self.index_at_beat(a_beat)]
+
+    def seconds_at_beat(self, a_beat):
+        f_i = self.index_at_beat(a_beat)
+        return self.seconds[f_i] + (
+            (a_beat - self.beats[f_i]) * self.seconds_per_beat[f_i]
+        )
+
+    def beat_at_seconds(self, a_seconds):
+        f_i = self.index_at_seconds(a_seconds)
+        return self.beats[f_i] + (
+            (a_seconds - self.seconds[f_i]) / self.seconds_per_beat[f_i]
+        )
+
+    def sample_at_beat(self, a_beat, a_sr):
+        return int(round(self.seconds_at_beat(a_beat) * a_sr))
+
+    def beat_at_sample(self, a_sample, a_sr):
+        return self.beat_at_seconds(a_sample / a_sr)
+
+    def seconds_at_beats(self, a_beats):
+        """ seconds_at_beat() for an array of beats, returns a float64 array
+        """
+        f_beats = numpy.asarray(a_beats, dtype=numpy.float64)
+        f_i = numpy.searchsorted(self._beats_arr, f_beats, 'right') - 1
+        numpy.clip(f_i, 0, None, out=f_i)
+        return self._seconds_arr[f_i] + (
+            (f_beats - self._beats_arr[f_i]) * self._spb_arr[f_i]
+        )
+
+    def beats_at_seconds(self, a_seconds):
+        """ beat_at_seconds() for an array of times, returns a float64 array
+        """
+        f_seconds = numpy.asarray(a_seconds, dtype=numpy.float64)
+        f_i = numpy.searchsorted(self._seconds_arr, f_seconds, 'right') - 1
+        numpy.clip(f_i, 0, None, out=f_i)
+        return self._beats_arr[f_i] + (
+            (f_seconds - self._seconds_arr[f_i]) / self._spb_arr[f_i]
+        )
+
+    def samples_at_beats(self, a_beats, a_sr):
+        """ sample_at_beat() for an array of beats, returns an int64 array """
+        return numpy.rint(
+            self.seconds_at_beats(a_beats) * a_sr
+        ).astype(numpy.int64)
+
+    def beats_at_samples(self, a_samples, a_sr):
+        return self.beats_at_seconds(
+            numpy.asarray(a_samples, dtype=numpy.float64) / a_sr
+        )
@@ -6,8 +6,10 @@ from intlib.lib import util
 from intlib.lib.engine import close_engine, reopen_engine
 from intlib.models.track_plugin import track_plugins
 from intlib.models.daw.track_colors import TrackColors
+from intlib.models.project.history import HISTORY_MEMORY_BYTES
 from intlib.lib.translate import _
 from intlib.log import LOG
+import collections
 import datetime
 import os
 import traceback
@@ -17,8 +19,12 @@ class AbstractProject:
     """ Abstract class containing the minimum contract
         to run SG Plugins for host project file saving
     """
-    def __init__(self):
+    def __init__(self, a_saved_text_bytes=HISTORY_MEMORY_BYTES):
         self.plugin_pool_folder = None
+        # Least recently used first, path: (text, (mtime_ns, size))
+        self._saved_text = collections.OrderedDict()
+        self._saved_text_bytes = 0
+        self.saved_text_max_bytes = int(a_saved_text_bytes)
 
     def ipc(self):
         """ Return the IPC for this host """
@@ -43,7 +49,7 @@ class AbstractProject:
         f_full_path = os.path.join(
             *(str(x) for x in (self.project_folder, a_folder, a_file)))
         if not a_force_new and os.path.isfile(f_full_path):
-            f_old = util.read_file_text(f_full_path)
+            f_old = self.get_saved_text(f_full_path)
             if f_old == a_text:
                 return None
             f_existed = 1
@@ -51,8 +57,47 @@ class AbstractProject:
             f_old = ""
             f_existed = 0
         util.write_file_text(f_full_path, a_text)
+        self._cache_saved_text(f_full_path, a_text)
         return f_existed, f_old
 
+    def get_saved_text(self, a_path):
+        """ Return the text of a project file, from memory if it has not
+            changed on disk since it was last saved by save_file
+        """
+        f_entry = self._saved_text.get(a_path)
+        if f_entry is not None:
+            f_stat = os.stat(a_path)
+            if f_entry[1] == (f_stat.st_mtime_ns, f_stat.st_size):
+                self._saved_text.move_to_end(a_path)
+                return f_entry[0]
+        f_text = util.read_file_text(a_path)
+        self._cache_saved_text(a_path, f_text)
+        return f_text
+
+    def clear_saved_text(self):
+        """ Forget the saved text, ie: after files were changed directly """
+        self._saved_text.clear()
+        self._saved_text_bytes = 0
+
+    def _cache_saved_text(self, a_path, a_text):
+        """ Keep the text of a file, forgetting the least recently used
+            files when the texts exceed saved_text_max_bytes
+        """
+        f_entry = self._saved_text.pop(a_path, None)
+        if f_entry is not None:
+            self._saved_text_bytes -= len(f_entry[0])
+        if len(a_text) > self.saved_text_max_bytes:
+            return
+        f_stat = os.stat(a_path)
+        self._saved_text[a_path] = (
+            a_text,
+            (f_stat.st_mtime_ns, f_stat.st_size),
+        )
+        self._saved_text_bytes += len(a_text)
+        while self._saved_text_bytes > self.saved_text_max_bytes:
+            f_path, f_entry = self._saved_text.popitem(last=False)
+            self._saved_text_bytes -= len(f_entry[0])
+
     def get_track_plugins(self, a_track_num):
         f_folder = self.track_pool_folder
         f_path = os.path.join(*(str(x) for x in (f_folder, a_track_num)))
@@ -0,0 +1,353 @@
+"""
+Undo history for project files.
+
+Each save records a line-level diff of the file instead of its full old and
+new text.  Commits are kept in memory up to a budget, older commits are
+written to a temporary folder and read back only when undone or redone.
+"""
+
+from intlib.lib import util
+from intlib.log import LOG
+import collections
+import difflib
+import os
+import pickle
+import shutil
+import tempfile
+import weakref
+
+__all__ = [
+    'HISTORY_MEMORY_BYTES',
+    'HistoryCommit',
+    'HistoryFile',
+    'ProjectHistory',
+    'apply_diff',
+    'line_diff',
+]
+
+# Default memory budget for the history commits kept in memory, in bytes
+HISTORY_MEMORY_BYTES = 32 * 1024 * 1024
+
+
+def line_diff(a_old, a_new):
+    """ Return the changes from a_old to a_new as a tuple of
+        (old_start, old_end, new_start, new_end, old_lines, new_lines)
+    """
+    f_old = a_old.splitlines(keepends=True)
+    f_new = a_new.splitlines(keepends=True)
+    # Most edits touch a few lines, trim the common prefix and suffix so
+    # that the matcher only sees the changed region
+    f_len = min(len(f_old), len(f_new))
+    f_start = 0
+    while f_start < f_len and f_old[f_start] == f_new[f_start]:
+        f_start += 1
+    f_end = 0
+    while (
+        f_end < f_len - f_start
+        and
+        f_old[-1 - f_end] == f_new[-1 - f_end]
+    ):
+        f_end += 1
+    f_old_mid = f_old[f_start:len(f_old) - f_end]
+    f_new_mid = f_new[f_start:len(f_new) - f_end]
+    f_matcher = difflib.SequenceMatcher(None, f_old_mid, f_new_mid)
+    return tuple(
+        (
+            i1 + f_start,
+            i2 + f_start,
+            j1 + f_start,
+            j2 + f_start,
+            tuple(f_old_mid[i1:i2]),
+            tuple(f_new_mid[j1:j2]),
+        )
+        for tag, i1, i2, j1, j2 in f_matcher.get_opcodes()
+        if tag != 'equal'
+    )
+
+def apply_diff(a_text, a_diff, a_reverse=False):
+    """ Apply a diff from line_diff() to the old text, or with a_reverse,
+        revert it from the new text
+
+        @raises: ValueError if the lines being replaced are not the ones
+                 in the diff, ie: the file was changed by something else
+    """
+    f_lines = a_text.splitlines(keepends=True)
+    f_result = []
+    f_pos = 0
+    for f_old_start, f_old_end, f_new_start, f_new_end, f_old, f_new in a_diff:
+        if a_reverse:
+            f_start, f_end = f_new_start, f_new_end
+            f_expected, f_replacement = f_new, f_old
+        else:
+            f_start, f_end = f_old_start, f_old_end
+            f_expected, f_replacement = f_old, f_new
+        if tuple(f_lines[f_start:f_end]) != f_expected:
+            raise ValueError(
+                f"Lines {f_start}:{f_end} do not match the diff"
+            )
+        f_result.extend(f_lines[f_pos:f_start])
+        f_result.extend(f_replacement)
+        f_pos = f_end
+    f_result.extend(f_lines[f_pos:])
+    return "".join(f_result)
+
+
+def _write_text(a_path, a_text):
+    """ Write a file from HistoryFile.undo_text/redo_text, None removes it """
+    if a_text is None:
+        if os.path.exists(a_path):
+            os.remove(a_path)
+    else:
+        util.write_file_text(a_path, a_text)
+
+
+class HistoryFile:
+    """ The change to one project file made by one save """
+    __slots__ = [
+        'folder',
+        'file',
+        'diff',
+        'existed',
+    ]
+
+    def __init__(self, a_folder, a_file, a_diff, a_existed):
+        self.folder = str(a_folder)
+        self.file = str(a_file)
+        self.diff = a_diff
+        self.existed = a_existed
+
+    @staticmethod
+    def from_text(a_folder, a_file, a_new, a_old, a_existed):
+        return HistoryFile(
+            a_folder,
+            a_file,
+            line_diff(a_old, a_new),
+            a_existed,
+        )
+
+    def nbytes(self):
+        return sum(
+            len(y)
+            for x in self.diff
+            for y in x[4] + x[5]
+        ) + 64 * len(self.diff)
+
+    def get_path(self, a_project_folder):
+        return os.path.join(a_project_folder, self.folder, self.file)
+
+    def undo_text(self, a_project_folder):
+        """ Return (path, text) of the file with the change undone, text is
+            None if the file did not exist before the change
+
+            @raises: ValueError if the file does not match the change
+        """
+        f_path = self.get_path(a_project_folder)
+        if not self.existed:
+            return f_path, None
+        f_text = util.read_file_text(f_path)
+        return f_path, apply_diff(f_text, self.diff, True)
+
+    def redo_text(self, a_project_folder):
+        """ Return (path, text) of the file with the change redone
+
+            @raises: ValueError if the file does not match the change
+        """
+        f_path = self.get_path(a_project_folder)
+        if self.existed:
+            f_text = util.read_file_text(f_path)
+        else:
+            f_text = ""
+        return f_path, apply_diff(f_text, self.diff)
+
+    def undo(self, a_project_folder):
+        _write_text(*self.undo_text(a_project_folder))
+
+    def redo(self, a_project_folder):
+        _write_text(*self.redo_text(a_project_folder))
+
+    def __repr__(self):
+        return (
+            f"HistoryFile(folder={self.folder}, file={self.file}, "
+            f"changes={len(self.diff)}, existed={self.existed})"
+        )
+
+
+class HistoryCommit:
+    """ A group of file changes that are undone and redone together """
+    def __init__(self, a_files, a_message):
+        self._files = list(a_files)
+        self.message = str(a_message)
+        self.spill_path = None
+        self._nbytes = sum(x.nbytes() for x in self._files)
+
+    def nbytes(self):
+        """ The memory used by the commit, 0 if it was spilled to disk """
+        return 0 if self._files is None else self._nbytes
+
+    def is_spilled(self):
+        return self._files is None
+
+    def spill(self, a_path):
+        """ Move the file changes to disk to free memory """
+        with open(a_path, "wb") as f_file:
+            pickle.dump(
+                [(x.folder, x.file, x.diff, x.existed) for x in self._files],
+                f_file,
+                protocol=pickle.HIGHEST_PROTOCOL,
+            )
+        self.spill_path = a_path
+        self._files = None
+
+    def get_files(self):
+        if self._files is not None:
+            return self._files
+        with open(self.spill_path, "rb") as f_file:
+            return [HistoryFile(*x) for x in pickle.load(f_file)]
+
+    def discard(self):
+        """ Delete the spilled file changes, if any """
+        if self.spill_path and os.path.exists(self.spill_path):
+            os.remove(self.spill_path)
+
+    def undo(self, a_project_folder):
+        """ Undo every file change, or none of them if any of the files
+            does not match its change
+
+            @raises: ValueError if a file does not match its change
+        """
+        f_texts = [
+            x.undo_text(a_project_folder)
+            for x in reversed(self.get_files())
+        ]
+        for f_path, f_text in f_texts:
+            _write_text(f_path, f_text)
+
+    def redo(self, a_project_folder):
+        """ Redo every file change, or none of them if any of the files
+            does not match its change
+
+            @raises: ValueError if a file does not match its change
+        """
+        f_texts = [x.redo_text(a_project_folder) for x in self.get_files()]
+        for f_path, f_text in f_texts:
+            _write_text(f_path, f_text)
+
+
+class ProjectHistory:
+    """ Undo history per undo context, ie: per editor tab, with a shared
+        memory budget.  When the commits in memory exceed max_bytes, the
+        oldest are spilled to a temporary folder
+    """
+    def __init__(self, a_max_bytes=HISTORY_MEMORY_BYTES):
+        self.max_bytes = int(a_max_bytes)
+        self.nbytes = 0
+        # context: [HistoryCommit, ...]
+        self.commits = {}
+        # context: number of commits undone
+        self.cursors = {}
+        # HistoryCommits in memory, oldest first
+        self._resident = collections.OrderedDict()
+        self._spill_folder = None
+        self._spill_count = 0
+        self._finalizer = None
+
+    def set_max_bytes(self, a_max_bytes):
+        self.max_bytes = int(a_max_bytes)
+        self._spill()
+
+    def commit(self, a_context, a_files, a_message):
+        """ Add a commit to an undo context, discarding any commits that
+            were undone
+        """
+        self._truncate(a_context)
+        if not a_files:
+            return None
+        f_commit = HistoryCommit(a_files, a_message)
+        self.commits.setdefault(a_context, []).append(f_commit)
+        self._resident[id(f_commit)] = f_commit
+        self.nbytes += f_commit.nbytes()
+        self._spill()
+        return f_commit
+
+    def undo(self, a_context, a_project_folder):
+        f_commits = self.commits.get(a_context, [])
+        f_cursor = self.cursors.get(a_context, 0)
+        if f_cursor >= len(f_commits):
+            return False
+        f_cursor += 1
+        try:
+            f_commits[-1 * f_cursor].undo(a_project_folder)
+        except ValueError as ex:
+            # The files were changed outside of the history, refuse rather
+            # than write a mix of the two
+            LOG.error(f"Not undoing {f_commits[-1 * f_cursor].message}: {ex}")
+            return False
+        self.cursors[a_context] = f_cursor
+        return True
+
+    def redo(self, a_context, a_project_folder):
+        f_cursor = self.cursors.get(a_context, 0)
+        if f_cursor == 0:
+            return False
+        f_commit = self.commits[a_context][-1 * f_cursor]
+        try:
+            f_commit.redo(a_project_folder)
+        except ValueError as ex:
+            LOG.error(f"Not redoing {f_commit.message}: {ex}")
+            return False
+        self.cursors[a_context] = f_cursor - 1
+        return True
+
+    def clear_context(self, a_context):
+        for f_commit in self.commits.pop(a_context, []):
+            self._forget(f_commit)
+        self.cursors.pop(a_context, None)
+
+    def clear(self):
+        for f_context in list(self.commits):
+            self.clear_context(f_context)
+        if self._finalizer is not None:
+            self._finalizer()
+            self._finalizer = None
+            self._spill_folder = None
+
+    def _truncate(self, a_context):
+        f_cursor = self.cursors.get(a_context, 0)
+        if f_cursor > 0:
+            f_commits = self.commits[a_context]
+            for f_commit in f_commits[-1 * f_cursor:]:
+                self._forget(f_commit)
+            del f_commits[-1 * f_cursor:]
+        self.cursors[a_context] = 0
+
+    def _forget(self, a_commit):
+        if self._resident.pop(id(a_commit), None) is not None:
+            self.nbytes -= a_commit.nbytes()
+        a_commit.discard()
+
+    def _spill(self):
+        while self.nbytes > self.max_bytes and self._resident:
+            f_key, f_commit = self._resident.popitem(last=False)
+            self.nbytes -= f_commit.nbytes()
+            try:
+                f_commit.spill(self._get_spill_path())
+            except Exception as ex:
+                LOG.exception(ex)
+                # Keep the commit in memory rather than lose the history
+                self.nbytes += f_commit.nbytes()
+                self._resident[f_key] = f_commit
+                self._resident.move_to_end(f_key, last=False)
+                break
+
+    def _get_spill_path(self):
+        if self._spill_folder is None:
+            self._spill_folder = tempfile.mkdtemp(prefix="intuitives-undo-")
+            self._finalizer = weakref.finalize(
+                self,
+                shutil.rmtree,
+                self._spill_folder,
+                True,
+            )
+        self._spill_count += 1
+        return os.path.join(self._spill_folder, str(self._spill_count))
+
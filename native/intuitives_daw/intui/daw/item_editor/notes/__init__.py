@@ -597,6 +597,7 @@ class PianoRollEditorWidget:
             for note in shared.CURRENT_ITEM.notes:
                 if note.channel == channel:
                     note.set_pmn_param(param, value)
+        shared.CURRENT_ITEM.invalidate_note_store()
         shared.global_save_and_reload_items()
 
     def reset_velocity(self):
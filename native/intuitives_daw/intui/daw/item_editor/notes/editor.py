@@ -319,6 +319,7 @@ class PianoRollEditor(AbstractItemEditor):
             f_item.note_item.note_num = clip_value(
                 f_item.note_item.note_num + a_amt, 0, 120)
             self.selected_note_strings.append(f_item.get_selected_string())
+        shared.CURRENT_ITEM.invalidate_note_store()
         global_save_and_reload_items()
 
     def focusOutEvent(self, a_event):
@@ -752,9 +753,11 @@ class PianoRollEditor(AbstractItemEditor):
         self.clear_drawn_items()
         channel = shared.ITEM_EDITOR.get_midi_channel()
         if shared.CURRENT_ITEM:
-            for f_note in shared.CURRENT_ITEM.notes:
-                if f_note.channel != channel:
-                    continue
+            for f_note in shared.CURRENT_ITEM.get_notes_in_range(
+                0.,
+                shared.CURRENT_ITEM_LEN,
+                channel,
+            ):
                 f_note_item = self.draw_note(f_note)
                 f_note_item.resize_last_mouse_pos = \
                     f_note_item.scenePos().x()
@@ -771,9 +774,12 @@ class PianoRollEditor(AbstractItemEditor):
                     -
                     shared.ITEM_REF_POS[0]
                 )
-                for f_note in shared.LAST_ITEM.notes:
-                    if f_note.channel != channel:
-                        continue
+                # Only the notes that fall inside of this item's range
+                for f_note in shared.LAST_ITEM.get_notes_in_range(
+                    f_offset,
+                    f_offset + shared.CURRENT_ITEM_LEN,
+                    channel,
+                ):
                     f_note_item = self.draw_note(
                         f_note,
                         False,
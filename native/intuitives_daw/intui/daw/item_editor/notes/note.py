@@ -533,11 +533,11 @@ class PianoRollNoteItem(QGraphicsRectItem):
             f_pos_x - shared.PIANO_KEYS_WIDTH
         ) * shared.CURRENT_ITEM_LEN * f_recip
         f_new_note_num = self.y_pos_to_note(f_pos_y)
-        shared.CURRENT_ITEM.notes.remove(f_item.note_item)
-        f_item.note_item.set_start(f_new_note_start)
-        f_item.note_item.note_num = f_new_note_num
-        shared.CURRENT_ITEM.notes.append(f_item.note_item)
-        shared.CURRENT_ITEM.notes.sort()
+        shared.CURRENT_ITEM.move_note(
+            f_item.note_item,
+            f_new_note_start,
+            f_new_note_num,
+        )
 
     def mouseReleaseEvent(self, a_event):
         if a_event.button() == QtCore.Qt.MouseButton.RightButton:
@@ -4,7 +4,12 @@ from intui import shared as glbl_shared
 from intlib.models import theme
 from intui.daw import shared
 from intui.sgqt import *
-from intui.widgets.sample_graph import create_sample_graph
+from intui.widgets.sample_graph import (
+    bucket_width,
+    clear_pixmap_cache,
+    get_sample_graph_pixmap,
+    zoom_bucket,
+)
 
 PIXMAP_BEAT_WIDTH = 48
 PIXMAP_TILE_HEIGHT = 32
@@ -64,6 +69,7 @@ def pop_path_from_cache(a_uid):
 def clear_caches():
     PIXMAP_CACHE.clear()
     PIXMAP_CACHE_UNSCALED.clear()
+    clear_pixmap_cache()
 
 def painter_path(
     item,
@@ -72,8 +78,19 @@ def painter_path(
     a_tempo,
 ):
     f_seconds_per_beat = 60.0 / a_tempo
-    f_audio_path = QPainterPath()
-    f_audio_path.addRect(0., 0., 1., 1.)
+    f_note_brush = QColor(
+        theme.SYSTEM_COLORS.daw.seq_item_note,
+    )
+    f_audio_brush = QColor(
+        theme.SYSTEM_COLORS.daw.seq_item_audio,
+    )
+    f_note_pen = QPen(f_note_brush)
+    f_pen = QPen(f_audio_brush)
+    f_pen.setCosmetic(True)
+
+    # (x, width, pixmap) of each audio item's waveform
+    f_audio_pixmaps = []
+    f_audio_width = 1.0
     for f_item in sorted(
         item.items.values(),
         key=lambda x: x.start_beat
@@ -81,22 +98,21 @@ def painter_path(
         f_graph = constants.PROJECT.get_sample_graph_by_uid(f_item.uid)
         f_width = (
             f_graph.length_in_seconds / f_seconds_per_beat) * a_px_per_beat
-        f_paths = create_sample_graph(
+        f_pixmap = get_sample_graph_pixmap(
             f_graph,
-            True,
+            f_item,
             f_width,
             a_height,
-            f_item,
+            f_pen,
+            f_audio_brush,
         )
-        f_y_inc = a_height / len(f_paths)
-        f_y_pos = 0.0
-        for f_painter_path in f_paths:
-            f_painter_path.translate(
-                a_px_per_beat * f_item.start_beat,
-                f_y_pos,
-            )
-            f_audio_path.addPath(f_painter_path)
-            f_y_pos += f_y_inc
+        # The pixmap is rendered at the nearest zoom bucket, scale it to
+        # this item's width
+        f_scale = f_width / bucket_width(zoom_bucket(f_width))
+        f_x = a_px_per_beat * f_item.start_beat
+        f_pixmap_width = f_pixmap.width() * f_scale
+        f_audio_pixmaps.append((f_x, f_pixmap_width, f_pixmap))
+        f_audio_width = max(f_audio_width, f_x + f_pixmap_width)
 
     f_notes_path = QPainterPath()
     f_notes_path.addRect(0., 0., 1., 1.)
@@ -130,7 +146,6 @@ def painter_path(
                 float(f_note_height),
             )
 
-    f_audio_width = f_audio_path.boundingRect().width()
     f_notes_width = f_notes_path.boundingRect().width()
 
     f_width = max(f_audio_width, f_notes_width)
@@ -138,16 +153,6 @@ def painter_path(
     f_count = int(f_width // PIXMAP_TILE_WIDTH) + 1
     f_result = []
 
-    f_note_brush = QColor(
-        theme.SYSTEM_COLORS.daw.seq_item_note,
-    )
-    f_audio_brush = QColor(
-        theme.SYSTEM_COLORS.daw.seq_item_audio,
-    )
-    f_note_pen = QPen(f_note_brush)
-    f_pen = QPen(f_audio_brush)
-    f_pen.setCosmetic(True)
-
     for f_i in range(f_count):
         f_pixmap = QPixmap(
             int(min(f_width, PIXMAP_TILE_WIDTH)),
@@ -161,15 +166,22 @@ def painter_path(
         )
         f_painter = QPainter(f_pixmap)
         f_painter.setRenderHint(QPainter.RenderHint.Antialiasing)
-        f_painter.setPen(f_pen)
-        f_painter.setBrush(f_audio_brush)
-        f_painter.drawPath(f_audio_path)
+        f_painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform)
+        f_tile_start = f_i * PIXMAP_TILE_WIDTH
+        for f_x, f_pixmap_width, f_audio_pixmap in f_audio_pixmaps:
+            f_x -= f_tile_start
+            if f_x > PIXMAP_TILE_WIDTH or f_x + f_pixmap_width < 0.:
+                continue
+            f_painter.drawPixmap(
+                QtCore.QRectF(f_x, 0., f_pixmap_width, float(a_height)),
+                f_audio_pixmap,
+                QtCore.QRectF(f_audio_pixmap.rect()),
+            )
         f_painter.setPen(f_note_pen)
         f_painter.setBrush(f_note_brush)
         f_painter.drawPath(f_notes_path)
         f_painter.end()
         f_result.append(f_pixmap)
-        for f_path in (f_notes_path, f_audio_path):
-            f_path.translate(-PIXMAP_TILE_WIDTH, 0)
+        f_notes_path.translate(-PIXMAP_TILE_WIDTH, 0)
     return f_result
 
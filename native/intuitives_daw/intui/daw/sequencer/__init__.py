@@ -495,6 +495,7 @@ class SequencerWidget:
         else:
             constants.DAW_CURRENT_SEQUENCE_UID = uid
         shared.CURRENT_SEQUENCE = constants.DAW_PROJECT.get_sequence(uid)
+        constants.DAW_PROJECT.prewarm_sequence_sample_graphs(uid)
         self.enabled = True
         shared.SEQUENCER.open_sequence()
         global_update_hidden_rows()
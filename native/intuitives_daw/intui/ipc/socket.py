@@ -1,16 +1,27 @@
 from intui.sgqt import QMessageBox, QtCore, Signal
 from intlib.ipc.abstract import AbstractIPCTransport
+from intlib.ipc.batch import (
+    MAX_DATAGRAM_SIZE,
+    MessageQueue,
+    SEQUENCE_HEADER_SIZE,
+    decode_ack,
+    pack_datagrams,
+    sequence_datagram,
+)
 from intlib import constants
 from intlib.lib import engine
 from intlib.lib.translate import _
 from intlib.log import LOG
 from intui import shared
+import collections
 import select
 import socket
 import socketserver
+import threading
 import time
 
 __all__ = [
+    'BatchedSocketIPCTransport',
     'SocketIPCServer',
     'SocketIPCTransport',
 ]
@@ -135,27 +146,232 @@ class SocketIPCTransport(AbstractIPCTransport):
                 LOG.warning(f"Error: {ex}, waiting {wait}s to retry")
                 self.failures += 1
                 time.sleep(wait)
-        global SOCKET_ERROR_SHOWN
-        if (
-            not SOCKET_ERROR_SHOWN
-            and
-            engine.ENGINE_SUBPROCESS
-            and
-            engine.ENGINE_SUBPROCESS.returncode is None
-        ):
-            msg = _(
-                "Unable to communicate with the engine over UDP sockets.  "
-                "Please ensure that UDP sockets on localhost are enabled "
-                "in your firewall for the entire application, or for "
-                "the following UDP ports:\n"
-                f"{IPC_UI_SERVER_PORT}\n{IPC_ENGINE_SERVER_PORT}"
+        show_socket_error()
+        LOG.error(f"Failed to send {message[:100]}")
+
+def show_socket_error():
+    """ Tell the user once that the engine is not replying, must be called
+        from the UI thread
+    """
+    global SOCKET_ERROR_SHOWN
+    if (
+        not SOCKET_ERROR_SHOWN
+        and
+        engine.ENGINE_SUBPROCESS
+        and
+        engine.ENGINE_SUBPROCESS.returncode is None
+    ):
+        msg = _(
+            "Unable to communicate with the engine over UDP sockets.  "
+            "Please ensure that UDP sockets on localhost are enabled "
+            "in your firewall for the entire application, or for "
+            "the following UDP ports:\n"
+            f"{IPC_UI_SERVER_PORT}\n{IPC_ENGINE_SERVER_PORT}"
+        )
+        LOG.error(msg)
+        SOCKET_ERROR_SHOWN = True
+        QMessageBox.warning(
+            shared.MAIN_WINDOW,
+            _("Error"),
+            msg,
+        )
+
+class BatchedSocketIPCTransport(SocketIPCTransport):
+    """ Queue messages and send them from a background thread, so that
+        send() never blocks the UI thread.
+
+        Control values for the same plugin port that are queued before they
+        are sent are coalesced, and queued messages are packed into as few
+        datagrams as possible.  Every datagram, a single message too, is
+        numbered with /intuitives/seq and must be acknowledged with
+        /intuitives/ack, see intlib.ipc.batch for the format the engine
+        must accept and the replies it must send.  Up to
+        max_in_flight datagrams, or max_in_flight_bytes, are sent before
+        waiting for the engine's replies, so that the engine's receive
+        buffer does not overflow
+    """
+    # Configure keys that are sent and waited for before send() returns
+    FLUSH_KEYS = frozenset([
+        "abort",
+        "exit",
+    ])
+
+    def __init__(
+        self,
+        host='127.0.0.1',
+        port=IPC_ENGINE_SERVER_PORT,
+        flush_interval=0.005,
+        ack_timeout=1.0,
+        max_in_flight=16,
+        max_in_flight_bytes=131072,
+    ):
+        super().__init__(host, port)
+        self.flush_interval = flush_interval
+        self.ack_timeout = ack_timeout
+        self.max_in_flight = max_in_flight
+        self.max_in_flight_bytes = max_in_flight_bytes
+        self.sent = 0
+        self.datagrams = 0
+        self.timed_out = 0
+        self._queue = MessageQueue()
+        # The next fragmented message id and datagram sequence number
+        self._next_id = 0
+        self._next_seq = 0
+        # sequence number: (time sent, message count, size) of each
+        # datagram not replied to, oldest first
+        self._in_flight = collections.OrderedDict()
+        self._in_flight_bytes = 0
+        self._error = False
+        self._closed = False
+        # True while messages taken from the queue are being sent
+        self._sending = False
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(
+            target=self._run,
+            name="BatchedSocketIPCTransport",
+            daemon=True,
+        )
+        self._thread.start()
+
+    @property
+    def coalesced(self):
+        return self._queue.coalesced
+
+    def stats(self):
+        with self._condition:
+            return {
+                'sent': self.sent,
+                'coalesced': self._queue.coalesced,
+                'timed_out': self.timed_out,
+                'datagrams': self.datagrams,
+                'queued': len(self._queue),
+                'in_flight': len(self._in_flight),
+            }
+
+    def send(
+        self,
+        path,
+        key,
+        value,
+    ):
+        if self._error:
+            self._error = False
+            show_socket_error()
+        with self._condition:
+            self._queue.put(path, key, value)
+            self._condition.notify()
+        if key in self.FLUSH_KEYS:
+            self.flush()
+
+    def flush(self, timeout=None):
+        """ Wait until every queued message was sent and replied to, or
+            timed out.  Returns False if the timeout expired first
+        """
+        f_timeout = self.ack_timeout * 2 if timeout is None else timeout
+        with self._condition:
+            self._condition.notify()
+            return self._condition.wait_for(
+                lambda: not (self._queue or self._sending or self._in_flight),
+                f_timeout,
             )
-            LOG.error(msg)
-            SOCKET_ERROR_SHOWN = True
-            QMessageBox.warning(
-                shared.MAIN_WINDOW,
-                _("Error"),
-                msg,
+
+    def close(self):
+        self.flush()
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        self._thread.join(self.ack_timeout * 2)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(
+                    lambda: self._closed or self._queue or self._in_flight,
+                )
+                if self._closed:
+                    return
+            # Let a burst of messages, ie: a knob drag, collect in the
+            # queue so that it can be coalesced
+            time.sleep(self.flush_interval)
+            with self._condition:
+                f_messages = self._queue.pop_all()
+                self._sending = True
+            f_datagrams, self._next_id = pack_datagrams(
+                f_messages,
+                self._next_id,
+                MAX_DATAGRAM_SIZE - SEQUENCE_HEADER_SIZE,
             )
-        LOG.error(f"Failed to send {message[:100]}")
+            for f_datagram, f_count in f_datagrams:
+                while self._in_flight and (
+                    len(self._in_flight) >= self.max_in_flight
+                    or
+                    self._in_flight_bytes + len(f_datagram)
+                    > self.max_in_flight_bytes
+                ):
+                    self._receive(self.ack_timeout)
+                self._send_datagram(f_datagram, f_count)
+            with self._condition:
+                self._sending = False
+                self._condition.notify_all()
+            self._receive(0. if self._queue else self.flush_interval)
 
+    def _send_datagram(self, a_datagram, a_count):
+        f_seq = self._next_seq
+        self._next_seq += 1
+        a_datagram = sequence_datagram(f_seq, a_datagram)
+        for wait in (0.1, 0.2, 0.3) if self.failures < 10 else (0,):
+            try:
+                self.socket.sendall(a_datagram)
+                with self._condition:
+                    self._in_flight[f_seq] = (
+                        time.monotonic(),
+                        a_count,
+                        len(a_datagram),
+                    )
+                    self._in_flight_bytes += len(a_datagram)
+                    self.sent += a_count
+                    self.datagrams += 1
+                self.failures = 0
+                return
+            except Exception as ex:
+                LOG.warning(f"Error: {ex}, waiting {wait}s to retry")
+                self.failures += 1
+                time.sleep(wait)
+        LOG.error(f"Failed to send {a_datagram[:100]}")
+        self._error = True
+        with self._condition:
+            self.timed_out += a_count
+            self._condition.notify_all()
+
+    def _receive(self, a_timeout):
+        """ Read the engine's replies, each acknowledges the datagram with
+            its sequence number, and expire the datagrams that were not
+            replied to.  Replies to expired datagrams are ignored
+        """
+        if not self._in_flight:
+            return
+        try:
+            ready = select.select([self.socket], [], [], a_timeout)
+            while ready[0]:
+                f_seq = decode_ack(self.socket.recv(4096))
+                with self._condition:
+                    f_entry = self._in_flight.pop(f_seq, None)
+                    if f_entry is not None:
+                        self._in_flight_bytes -= f_entry[2]
+                ready = select.select([self.socket], [], [], 0.)
+        except Exception as ex:
+            LOG.warning(f"Error reading replies from the engine: {ex}")
+        f_expired = time.monotonic() - self.ack_timeout
+        with self._condition:
+            while (
+                self._in_flight
+                and
+                next(iter(self._in_flight.values()))[0] < f_expired
+            ):
+                f_seq, (f_sent, f_count, f_size) = self._in_flight.popitem(
+                    last=False,
+                )
+                self._in_flight_bytes -= f_size
+                self.timed_out += f_count
+                LOG.warning("Did not receive a reply from the engine")
+            self._condition.notify_all()
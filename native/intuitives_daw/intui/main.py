@@ -31,7 +31,11 @@ from intui.daw import entrypoint as daw
 from intui.daw.item_editor.audio._shared import (
     remove_path_from_painter_path_cache,
 )
-from intui.ipc.socket import SocketIPCServer, SocketIPCTransport
+from intui.ipc.socket import (
+    BatchedSocketIPCTransport,
+    SocketIPCServer,
+    SocketIPCTransport,
+)
 from intui.plugins import SgPluginUiDict
 from intui.transport import TransportWidget
 from intlib.lib import engine
@@ -143,7 +147,13 @@ class SgMainWindow(QWidget):
     def setup(self, scaler):
         self.suppress_resize_events = False
         shared.MAIN_WINDOW = self
-        constants.IPC_TRANSPORT = SocketIPCTransport()
+        # Batching needs an engine that accepts the batch, fragment and
+        # /intuitives/seq datagrams from intlib.ipc.batch, and replies to
+        # each with /intuitives/ack, even for a single message
+        if util.get_file_setting("ipc-batch", int, 0):
+            constants.IPC_TRANSPORT = BatchedSocketIPCTransport()
+        else:
+            constants.IPC_TRANSPORT = SocketIPCTransport()
         with_audio = constants.IPC_TRANSPORT is not None
         constants.IPC = IntuitivesIPC(
             constants.IPC_TRANSPORT,
@@ -124,6 +124,7 @@ class TimePitchDialogWidget(TimePitchDialogWidget):
 
 class WaveEditProject(AbstractProject):
     def __init__(self, a_with_audio):
+        AbstractProject.__init__(self)
         self.TRACK_COUNT = TRACK_COUNT_ALL
         self.suppress_updates = False
 
@@ -5,6 +5,54 @@ from intui.shared import (
     AUDIO_ITEM_SCENE_WIDTH,
 )
 from intui.sgqt import *
+import collections
+import math
+import numpy
+
+# Zoom levels per doubling of the width that share a cached pixmap
+PIXMAP_ZOOM_STEPS = 4
+# Maximum number of waveform pixmaps kept by get_sample_graph_pixmap
+PIXMAP_CACHE_SIZE = 256
+# (uid, start, end, reversed, volume, zoom bucket, height):
+#     (sample_graph, QPixmap)
+PIXMAP_CACHE = collections.OrderedDict()
+
+
+def clear_pixmap_cache(a_uid=None):
+    """ Clear the cached waveform pixmaps, for one audio pool uid or all """
+    if a_uid is None:
+        PIXMAP_CACHE.clear()
+        return
+    for f_key in [x for x in PIXMAP_CACHE if x[0] == a_uid]:
+        PIXMAP_CACHE.pop(f_key)
+
+def zoom_bucket(a_width):
+    """ Quantize a pixel width so that nearby zoom levels share a pixmap """
+    return int(round(math.log2(max(a_width, 1.0)) * PIXMAP_ZOOM_STEPS))
+
+def bucket_width(a_bucket):
+    return 2.0 ** (a_bucket / PIXMAP_ZOOM_STEPS)
+
+def audio_item_volume(a_audio_item):
+    """ The volume in dB that an audio item's waveform is drawn at, the
+        item volume plus the volume of its audio pool file
+    """
+    audio_pool = constants.PROJECT.get_audio_pool()
+    ap_entry = audio_pool.by_uid()[a_audio_item.uid]
+    return a_audio_item.vol + ap_entry.volume
+
+def polygon_from_array(a_points):
+    """ Create a QPolygonF from an (n, 2) array of x, y points """
+    f_points = numpy.ascontiguousarray(a_points, dtype=numpy.float64)
+    try:
+        # PyQt5, copy straight into the polygon's buffer
+        f_result = QPolygonF(len(f_points))
+        f_ptr = f_result.data()
+        f_ptr.setsize(f_points.nbytes)
+        numpy.frombuffer(f_ptr, dtype=numpy.float64)[:] = f_points.ravel()
+        return f_result
+    except (TypeError, AttributeError, ValueError):
+        return QPolygonF([QtCore.QPointF(x, y) for x, y in f_points.tolist()])
 
 def create_sample_graph(
     sample_graph,
@@ -16,74 +64,98 @@ def create_sample_graph(
     """
     PURPOSE: Generates optimized vector paths for audio waveform visualization.
     ACTION: Translates raw peak data into a closed QPainterPath that can be rendered by the GUI.
-    MECHANISM: 
+    MECHANISM:
         1. Accesses high and low peak data from the sample_graph model.
         2. Respects Start/End slicing and Reverse states if an a_audio_item is provided.
         3. Scales peak amplitudes by the item's volume (normalization/gain).
-        4. Constructs a single polygon per channel by drawing the upper envelope forward and the lower envelope backward, then closing the path for efficient fill-rendering.
+        4. If a_width is passed, draws the coarsest mip-map level of the peaks that still has a point per pixel, so zoomed out graphs do not draw several points per pixel.
+        5. Constructs a single polygon per channel from the upper envelope forward and the lower envelope backward, built in one bulk call and closed for efficient fill-rendering.
     """
-    if a_audio_item:
-        f_ss = a_audio_item.sample_start * 0.001
-        f_se = a_audio_item.sample_end * 0.001
-        #f_width_frac = f_se - f_ss
-        audio_pool = constants.PROJECT.get_audio_pool()
-        by_uid = audio_pool.by_uid()
-        ap_entry = by_uid[a_audio_item.uid]
-        f_vol = db_to_lin(a_audio_item.vol + ap_entry.volume)
-        f_len = len(sample_graph.high_peaks[0])
-        f_slice_start = int(f_ss * f_len)
-        f_slice_end = int(f_se * f_len)
-        #a_width *= f_width_frac
-    else:
-        f_slice_start = None
-        f_slice_end = None
     if a_width or a_height or sample_graph.cache is None:
+        # Scene paths are cached and scaled by zooming the view, only
+        # use a coarser level when drawing at a known pixel width
+        f_use_level = bool(a_width)
         if not a_width:
             a_width = AUDIO_ITEM_SCENE_WIDTH
         if not a_height:
             a_height = AUDIO_ITEM_SCENE_HEIGHT
 
         if a_for_scene:
+            f_pixels = a_width
             f_width_inc = a_width / sample_graph.count
             f_section = a_height / float(sample_graph.channels)
         else:
+            f_pixels = 98.0
             f_width_inc = 98.0 / sample_graph.count
             f_section = 100.0 / float(sample_graph.channels)
         f_section_div2 = f_section * 0.5
 
+        if f_use_level:
+            f_level = sample_graph.level_for_width(int(math.ceil(f_pixels)))
+        else:
+            f_level = 0
+        f_all_high_peaks, f_all_low_peaks = sample_graph.get_peaks(f_level)
+        # The same total width with the fewer points of a coarser level
+        f_inc = f_width_inc * (
+            len(sample_graph.high_peaks[0]) / len(f_all_high_peaks[0])
+        )
+
+        if a_audio_item:
+            f_ss = a_audio_item.sample_start * 0.001
+            f_se = a_audio_item.sample_end * 0.001
+            f_vol = db_to_lin(audio_item_volume(a_audio_item))
+            f_len = len(f_all_high_peaks[0])
+            f_slice_start = int(f_ss * f_len)
+            f_slice_end = int(f_se * f_len)
+        else:
+            f_slice_start = None
+            f_slice_end = None
+
         f_paths = []
 
         for f_i in range(sample_graph.channels):
-            f_result = QPainterPath()
-            f_width_pos = 1.0
-            f_result.moveTo(f_width_pos, f_section_div2)
             if a_audio_item and a_audio_item.reversed:
-                f_high_peaks = sample_graph.high_peaks[f_i][
+                f_high_peaks = f_all_high_peaks[f_i][
                     f_slice_end:f_slice_start:-1]
-                f_low_peaks = sample_graph.low_peaks[f_i][::-1]
+                f_low_peaks = f_all_low_peaks[f_i][::-1]
                 f_low_peaks = f_low_peaks[f_slice_start:f_slice_end]
             else:
-                f_high_peaks = sample_graph.high_peaks[f_i][
+                f_high_peaks = f_all_high_peaks[f_i][
                     f_slice_start:f_slice_end]
-                f_low_peaks = sample_graph.low_peaks[f_i][::-1]
+                f_low_peaks = f_all_low_peaks[f_i][::-1]
                 f_low_peaks = f_low_peaks[f_slice_end:f_slice_start:-1]
 
             if a_audio_item:
                 f_high_peaks = f_high_peaks * f_vol
                 f_low_peaks = f_low_peaks * f_vol
 
-            for f_peak in f_high_peaks:
-                f_result.lineTo(
-                    f_width_pos,
-                    f_section_div2 - (f_peak * f_section_div2),
-                )
-                f_width_pos += f_width_inc
-            for f_peak in f_low_peaks:
-                f_result.lineTo(
-                    f_width_pos,
-                    (f_peak * -1.0 * f_section_div2) + f_section_div2,
-                )
-                f_width_pos -= f_width_inc
+            # The upper envelope forward from x=1.0, then the lower
+            # envelope back from where the upper envelope ended
+            f_high_count = len(f_high_peaks)
+            f_low_count = len(f_low_peaks)
+            f_points = numpy.empty((f_high_count + f_low_count + 1, 2))
+            f_points[0] = (1.0, f_section_div2)
+            f_high_x = f_points[1:f_high_count + 1, 0]
+            f_high_x[:] = numpy.arange(f_high_count)
+            f_high_x *= f_inc
+            f_high_x += 1.0
+            f_points[1:f_high_count + 1, 1] = f_section_div2 - (
+                f_high_peaks * f_section_div2
+            )
+            f_low_x = f_points[f_high_count + 1:, 0]
+            f_low_x[:] = numpy.arange(
+                f_high_count,
+                f_high_count - f_low_count,
+                -1,
+            )
+            f_low_x *= f_inc
+            f_low_x += 1.0
+            f_points[f_high_count + 1:, 1] = (
+                f_low_peaks * -1.0 * f_section_div2
+            ) + f_section_div2
+
+            f_result = QPainterPath()
+            f_result.addPolygon(polygon_from_array(f_points))
             f_result.closeSubpath()
             f_paths.append(f_result)
         if a_width or a_height:
@@ -91,3 +163,68 @@ def create_sample_graph(
         sample_graph.cache = f_paths
     return sample_graph.cache
 
+def get_sample_graph_pixmap(
+    sample_graph,
+    a_audio_item,
+    a_width,
+    a_height,
+    a_pen,
+    a_brush,
+):
+    """ Render the waveform of an audio item to a transparent pixmap.
+
+        a_width:  The width in pixels of the whole audio file, the pixmap
+                  only covers the item's start/end slice of it
+
+        Pixmaps are cached per (uid, start, end, reversed, item + file
+        volume, zoom bucket, height), the pixmap is rendered at the bucket's width
+        and should be drawn scaled to the item's width with
+        QPainter.drawPixmap(QRectF, QPixmap, QRectF)
+    """
+    f_bucket = zoom_bucket(a_width)
+    f_key = (
+        a_audio_item.uid,
+        a_audio_item.sample_start,
+        a_audio_item.sample_end,
+        bool(a_audio_item.reversed),
+        audio_item_volume(a_audio_item),
+        f_bucket,
+        int(a_height),
+    )
+    f_entry = PIXMAP_CACHE.get(f_key)
+    # A reloaded sample graph invalidates pixmaps drawn from the old one
+    if f_entry is not None and f_entry[0] is sample_graph:
+        PIXMAP_CACHE.move_to_end(f_key)
+        return f_entry[1]
+
+    f_width = bucket_width(f_bucket)
+    f_frac = (a_audio_item.sample_end - a_audio_item.sample_start) * 0.001
+    f_paths = create_sample_graph(
+        sample_graph,
+        True,
+        f_width,
+        a_height,
+        a_audio_item,
+    )
+    f_pixmap = QPixmap(
+        max(int(math.ceil(f_width * f_frac)) + 1, 1),
+        max(int(a_height), 1),
+    )
+    f_pixmap.fill(QtCore.Qt.GlobalColor.transparent)
+    f_painter = QPainter(f_pixmap)
+    f_painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+    f_painter.setPen(a_pen)
+    f_painter.setBrush(a_brush)
+    f_y_inc = a_height / len(f_paths)
+    f_y_pos = 0.0
+    for f_path in f_paths:
+        f_path.translate(0.0, f_y_pos)
+        f_painter.drawPath(f_path)
+        f_y_pos += f_y_inc
+    f_painter.end()
+
+    PIXMAP_CACHE[f_key] = (sample_graph, f_pixmap)
+    while len(PIXMAP_CACHE) > PIXMAP_CACHE_SIZE:
+        PIXMAP_CACHE.popitem(last=False)
+    return f_pixmap
+
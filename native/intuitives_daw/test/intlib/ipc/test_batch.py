@@ -0,0 +1,58 @@
+from intlib.ipc.batch import (
+    DatagramDecoder,
+    MAX_DATAGRAM_SIZE,
+    MessageQueue,
+    decode_ack,
+    encode_ack,
+    encode_message,
+    pack_datagrams,
+    sequence_datagram,
+)
+
+
+def test_pack_datagrams_round_trip():
+    messages = [
+        encode_message("/intuitives/daw", "co", f"1|key|{i}")
+        for i in range(5000)
+    ]
+    messages.insert(10, encode_message("/intuitives/daw", "big", "x" * 150000))
+    datagrams, next_id = pack_datagrams(messages)
+    assert next_id == 1
+    assert all(len(x) <= MAX_DATAGRAM_SIZE for x, count in datagrams)
+    assert sum(count for x, count in datagrams) == len(messages)
+    assert len(datagrams) < 10, len(datagrams)
+    decoder = DatagramDecoder()
+    result = []
+    for datagram, count in datagrams:
+        decoded = decoder.decode(datagram)
+        assert len(decoded) == count
+        result.extend(decoded)
+    assert result == messages
+
+def test_single_message_is_plain():
+    message = encode_message("/intuitives/daw", "exit", "")
+    assert pack_datagrams([message]) == ([(message, 1)], 0)
+
+def test_message_queue_coalesces_controls():
+    queue = MessageQueue()
+    assert not queue.put("/intuitives/daw", "pc", "5|3|0.0")
+    assert not queue.put("/intuitives/daw", "co", "5|a|b")
+    assert not queue.put("/intuitives/daw", "pc", "5|4|0.0")
+    assert queue.put("/intuitives/daw", "pc", "5|3|1.0")
+    assert not queue.put("/intuitives/daw", "co", "5|a|b")
+    assert queue.coalesced == 1
+    assert queue.pop_all() == [
+        encode_message("/intuitives/daw", "co", "5|a|b"),
+        encode_message("/intuitives/daw", "pc", "5|4|0.0"),
+        encode_message("/intuitives/daw", "pc", "5|3|1.0"),
+        encode_message("/intuitives/daw", "co", "5|a|b"),
+    ]
+    assert not len(queue)
+
+def test_sequence_numbers():
+    message = encode_message("/intuitives/daw", "co", "5|a|b")
+    decoder = DatagramDecoder()
+    assert decoder.decode(sequence_datagram(7, message)) == [message]
+    assert decoder.last_seq == 7
+    assert decode_ack(encode_ack(decoder.last_seq)) == 7
+    assert decode_ack(b"Message received") is None
@@ -67,3 +67,39 @@ def test_reorder():
         "conn_type": 0,
     }, node.__dict__
 
+
+def test_sort_all_paths_depths():
+    graph = RoutingGraph()
+    graph.toggle(1, 0)
+    graph.toggle(2, 1)
+    graph.toggle(3, 2)
+    graph.toggle(3, 0)
+    graph.toggle(4, 5)
+    assert graph.get_depths() == {1: 2, 2: 3, 3: 4, 4: 0}
+    assert graph.sort_all_paths() == [3, 2, 1, 4]
+    # Connecting an earlier track to a later one reorders the graph
+    graph.toggle(5, 3)
+    assert graph.get_depths()[4] == 6
+    msg = graph.toggle(1, 4)
+    assert msg is not None, msg
+    graph.toggle(3, 2)
+    assert graph.get_depths()[3] == 2
+
+def test_many_sends_is_fast():
+    # Every track sends to every lower track, the number of paths to
+    # main is exponential in the number of tracks
+    graph = RoutingGraph()
+    for i in range(1, 40):
+        for j in range(max(0, i - 16), i):
+            assert graph.toggle(i, j) is None
+    assert graph.sort_all_paths()[:3] == [39, 38, 37]
+    assert graph.get_depths()[39] == 40
+    assert graph.toggle(0, 39) is not None
+    assert RoutingGraph.from_str(str(graph)).get_depths()[39] == 40
+
+def test_feedback_loop_from_file():
+    graph = RoutingGraph()
+    graph.set_node(1, {0: TrackSend(1, 0, 2, 0), 1: TrackSend(1, 1, 0, 0)})
+    graph.set_node(2, {0: TrackSend(2, 0, 1, 0)})
+    assert graph.get_depths() == {1: 2, 2: 3}
+    assert graph.check_for_feedback(3, 1) is False
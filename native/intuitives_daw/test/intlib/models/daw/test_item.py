@@ -0,0 +1,137 @@
+import copy
+from intlib.models.daw.item import item
+from intlib.models.core.midi_events import MIDINote, MIDIControl
+from intlib.models.daw.note_store import NoteStore
+import random
+
+
+def _add_one_by_one(notes, ccs):
+    result = item(0)
+    for note in notes:
+        result.add_note(note)
+    for cc in ccs:
+        result.add_cc(cc)
+    return result
+
+def test_load_events_matches_add_note():
+    random.seed(0)
+    notes = [
+        MIDINote(
+            random.randint(0, 64) * 0.25,
+            random.choice((0.25, 0.5, 1.0, 2.0)),
+            random.randint(60, 64),
+            100,
+            channel=random.randint(0, 1),
+        )
+        for i in range(300)
+    ]
+    notes.sort()
+    ccs = [MIDIControl(random.randint(0, 16), 1, 64) for i in range(50)]
+    expected = _add_one_by_one(notes, ccs)
+
+    bulk = item(0)
+    bulk.load_events(notes, ccs, [])
+    assert [str(x) for x in bulk.notes] == [str(x) for x in expected.notes]
+    assert [str(x) for x in bulk.ccs] == [str(x) for x in expected.ccs]
+
+def test_str_round_trip():
+    notes = [MIDINote(x * 0.5, 0.5, 60 + (x % 12), 100) for x in range(1000)]
+    src = item(3)
+    src.load_events(notes, [MIDIControl(1.0, 7, 100.)], [])
+    text = str(src)
+    parsed = item.from_str(text, 3)
+    assert len(parsed.notes) == 1000
+    assert str(parsed) == text
+
+def test_deduplicate():
+    src = item(0)
+    src.notes = [MIDINote(0., 1., 60, 100), MIDINote(0., 1., 60, 100)]
+    assert str(src).count("\nn|") == 1
+    assert len(src.notes) == 1
+
+def _random_notes(count, seed=0):
+    random.seed(seed)
+    return [
+        MIDINote(
+            random.randint(0, 64) * 0.25,
+            random.choice((0.25, 0.5, 1.0, 2.0)),
+            random.randint(60, 63),
+            random.randint(1, 127),
+            channel=random.randint(0, 1),
+        )
+        for i in range(count)
+    ]
+
+def test_note_store_queries():
+    notes = _random_notes(500)
+    store = NoteStore(notes)
+    assert list(store.start) == sorted(x.start for x in notes)
+    for start, end in ((0., 1.), (3.3, 7.9), (15., 15.25)):
+        expected = {
+            id(x) for x in notes
+            if x.channel == 1 and x.start < end
+            and (x.end > start or x.start >= start)
+        }
+        found = store.notes_in_range(start, end, 1)
+        assert {id(x) for x in found} == expected
+    new = MIDINote(4.0, 1.0, 61, 100, channel=0)
+    expected = {
+        id(x) for x in notes
+        if x.channel == new.channel and x.overlaps(new)
+    }
+    found = store.get_notes(store.indices_overlapping(new))
+    assert {id(x) for x in found} == expected
+
+def test_fix_overlaps():
+    src = item(0)
+    src.notes = sorted(_random_notes(400, seed=1))
+    src.notes.append(src.notes[0].clone())
+    src.fix_overlaps()
+    store = src.note_store()
+    for group in store.groups():
+        starts = store.start[group]
+        ends = store.end[group]
+        assert (starts[1:] > starts[:-1]).all()
+        assert (ends[:-1] <= starts[1:]).all()
+
+def test_transpose_velocity():
+    src = item(0)
+    src.load_events(
+        [MIDINote(0.1, 0.3, 119, 120), MIDINote(1.0, 0.5, 60, 10)],
+        [],
+        [],
+    )
+    src.transpose(3)
+    assert [x.note_num for x in src.notes] == [120, 63]
+    src.velocity_mod(20, 0, a_add=True)
+    assert [x.velocity for x in src.notes] == [127, 30]
+    src.velocity_mod(
+        0, 0, a_start_beat=0., a_end_beat=2., a_line=True, a_end_amt=100,
+        a_notes=[src.notes[1]],
+    )
+    assert [x.velocity for x in src.notes] == [127, 50]
+
+def test_note_store_kept_up_to_date():
+    src = item(0)
+    for note in _random_notes(200, seed=2):
+        src.add_note(note, False)
+    store = src.note_store()
+    assert src.note_store() is store
+    assert store.notes is src.notes
+    assert list(store.start) == sorted(x.start for x in src.notes)
+
+    note = src.notes[10]
+    assert not src.add_note(note.clone())
+    src.remove_note(note.clone())
+    assert note not in src.notes
+    assert src.add_note(note)
+    src.move_note(note, 100., 70)
+    assert src.notes[-1] is note
+    assert src.get_notes_in_range(99., 101., note.channel) == [note]
+    assert src.note_store() is store
+    assert list(store.start) == [x.start for x in src.notes]
+    assert list(store.note_num) == [x.note_num for x in src.notes]
+
+    copied = copy.deepcopy(src)
+    assert copied.note_store() is not store
+    assert [str(x) for x in copied.notes] == [str(x) for x in src.notes]
@@ -0,0 +1,62 @@
+from intlib.models.daw.sequencer import sequencer
+from intlib.models.daw.tempo_marker import tempo_marker
+import numpy
+
+
+def _sequence():
+    result = sequencer("test")
+    result.set_marker(tempo_marker(0, 120.0, 4, 4))
+    result.set_marker(tempo_marker(8, 60.0, 3, 4))
+    result.set_marker(tempo_marker(16, 240.0, 4, 4))
+    return result
+
+def test_seconds_at_beat():
+    seq = _sequence()
+    assert seq.get_seconds_at_beat(0) == 0.0
+    assert seq.get_seconds_at_beat(4) == 2.0
+    assert seq.get_seconds_at_beat(8) == 4.0
+    assert seq.get_seconds_at_beat(12) == 8.0
+    assert seq.get_seconds_at_beat(16) == 12.0
+    assert seq.get_seconds_at_beat(20) == 13.0
+    assert seq.get_sample_count(20, 4, 44100) == 11 * 44100
+
+def test_beat_at_seconds_round_trip():
+    seq = _sequence()
+    for beat in (0., 1.5, 8., 9.25, 16., 100.):
+        seconds = seq.get_seconds_at_beat(beat)
+        assert abs(seq.get_beat_at_seconds(seconds) - beat) < 1e-9
+    tempo_map = seq.get_tempo_map()
+    assert tempo_map.beat_at_sample(12 * 48000, 48000) == 16.
+
+def test_tempo_and_tsig_at_pos():
+    seq = _sequence()
+    assert seq.get_tempo_at_pos(7.9) == 120.0
+    assert seq.get_tempo_at_pos(8) == 60.0
+    assert seq.get_tempo_at_pos(200) == 240.0
+    assert seq.get_tsig_at_pos(0) == 4
+    assert seq.get_tsig_at_pos(8) == 3
+    assert seq.get_tsig_at_pos(15) == 3
+
+def test_array_conversion():
+    seq = _sequence()
+    beats = numpy.linspace(0., 40., 161)
+    seconds = seq.get_seconds_at_beats(beats)
+    assert numpy.allclose(
+        seconds,
+        [seq.get_seconds_at_beat(x) for x in beats],
+    )
+    tempo_map = seq.get_tempo_map()
+    assert numpy.allclose(tempo_map.beats_at_seconds(seconds), beats)
+    samples = tempo_map.samples_at_beats(beats, 44100)
+    assert samples.tolist() == [
+        tempo_map.sample_at_beat(x, 44100) for x in beats
+    ]
+
+def test_tempo_map_invalidated():
+    seq = _sequence()
+    assert seq.get_seconds_at_beat(20) == 13.0
+    seq.delete_marker(seq.has_marker(16, 2))
+    assert seq.get_seconds_at_beat(20) == 16.0
+    seq.set_marker(tempo_marker(8, 120.0, 4, 4))
+    assert seq.get_seconds_at_beat(20) == 10.0
+    assert len(seq.get_tempo_markers()) == 2
@@ -0,0 +1,112 @@
+from intlib.models.project.abstract import AbstractProject
+from intlib.models.project.history import *
+import os
+import random
+
+
+def _read(path):
+    with open(path) as f:
+        return f.read()
+
+def test_line_diff_round_trip():
+    random.seed(0)
+    lines = [f"{i}|{random.random()}\n" for i in range(200)]
+    old = "".join(lines)
+    lines[10] = "changed\n"
+    del lines[50:55]
+    lines.insert(120, "inserted\n")
+    new = "".join(lines) + "no newline"
+    diff = line_diff(old, new)
+    assert len(diff) == 4
+    assert apply_diff(old, diff) == new
+    assert apply_diff(new, diff, True) == old
+    assert line_diff(old, old) == ()
+
+def test_undo_redo(tmp_path):
+    history = ProjectHistory()
+    folder = str(tmp_path)
+    path = os.path.join(folder, "file.txt")
+    old = "a\nb\nc\n"
+    new = "a\nB\nc\nd\n"
+    with open(path, "w") as f:
+        f.write(new)
+    history.commit(0, [HistoryFile.from_text("", "file.txt", new, old, 1)], "")
+    assert history.undo(0, folder)
+    assert _read(path) == old
+    assert not history.undo(0, folder)
+    assert history.redo(0, folder)
+    assert _read(path) == new
+    assert not history.redo(0, folder)
+
+    # A new commit after undo discards the undone commit
+    history.undo(0, folder)
+    history.commit(0, [HistoryFile.from_text("", "file.txt", "x\n", old, 1)], "")
+    assert len(history.commits[0]) == 1
+
+def test_spill_to_disk(tmp_path):
+    history = ProjectHistory(a_max_bytes=1)
+    folder = str(tmp_path)
+    path = os.path.join(folder, "file.txt")
+    texts = [f"{i}\n" * 100 for i in range(4)]
+    with open(path, "w") as f:
+        f.write(texts[-1])
+    for old, new in zip(texts, texts[1:]):
+        history.commit(
+            0,
+            [HistoryFile.from_text("", "file.txt", new, old, 1)],
+            "",
+        )
+    assert history.nbytes <= 1
+    assert all(x.is_spilled() for x in history.commits[0])
+    while history.undo(0, folder):
+        pass
+    assert _read(path) == texts[0]
+    spill_folder = history._spill_folder
+    history.clear()
+    assert not os.path.exists(spill_folder)
+
+def test_saved_text_cache(tmp_path):
+    project = AbstractProject()
+    project.project_folder = str(tmp_path)
+    assert project.save_file("", "file.txt", "a\n") == (0, "")
+    assert project.save_file("", "file.txt", "a\n") is None
+    assert project.save_file("", "file.txt", "b\n") == (1, "a\n")
+    # Changed outside of save_file, must be read from disk again
+    with open(os.path.join(str(tmp_path), "file.txt"), "w") as f:
+        f.write("external\n")
+    assert project.save_file("", "file.txt", "c\n") == (1, "external\n")
+
+def test_saved_text_cache_budget(tmp_path):
+    project = AbstractProject(a_saved_text_bytes=10)
+    project.project_folder = str(tmp_path)
+    project.save_file("", "a.txt", "aaaa\n")
+    project.save_file("", "b.txt", "bbbb\n")
+    project.get_saved_text(os.path.join(str(tmp_path), "a.txt"))
+    project.save_file("", "c.txt", "cccc\n")
+    # b.txt was the least recently used
+    assert [os.path.basename(x) for x in project._saved_text] == [
+        "a.txt", "c.txt",
+    ]
+    assert project._saved_text_bytes == 10
+    project.save_file("", "d.txt", "d" * 20)
+    assert len(project._saved_text) == 2
+
+def test_undo_refuses_changed_file(tmp_path):
+    history = ProjectHistory()
+    folder = str(tmp_path)
+    path = os.path.join(folder, "file.txt")
+    old = "a\nb\nc\n"
+    new = "a\nB\nc\n"
+    with open(path, "w") as f:
+        f.write("a\nchanged\nc\n")
+    history.commit(0, [HistoryFile.from_text("", "file.txt", new, old, 1)], "")
+    assert not history.undo(0, folder)
+    assert _read(path) == "a\nchanged\nc\n"
+    with open(path, "w") as f:
+        f.write(new)
+    assert history.undo(0, folder)
+    assert _read(path) == old
+    with open(path, "w") as f:
+        f.write("a\nchanged\nc\n")
+    assert not history.redo(0, folder)
+    assert _read(path) == "a\nchanged\nc\n"
@@ -1,6 +1,7 @@
 from intlib import constants
 from intlib.models.core.audio_pool import *
 import copy
+import os
 
 POOL_STR = """\
 0|0.0|/path/to/file.wav
@@ -66,3 +67,39 @@ def test_set_per_file_fx():
     pool.set_per_file_fx(fx)
     assert len(pool.per_file_fx) == 2, pool.per_file_fx
 
+
+def test_indexes_follow_add_remove():
+    constants.PROJECT = MockProject()
+    pool = AudioPool.from_str(POOL_STR_NO_FILE_FX)
+    assert pool.by_uid()[1].path == '/path/to/file2.wav'
+    assert pool.by_path()['/path/to/file.wav'].uid == 0
+    assert pool.next_uid() == 2
+    entry = pool.add_entry(__file__)
+    assert entry.uid == 2, entry
+    assert pool.by_path()[entry.path] is entry
+    pool.remove_by_uid([2])
+    assert 2 not in pool.by_uid()
+    assert entry.path not in pool.by_path()
+    assert pool.next_uid() == 2
+    pool.remove_by_uid([0])
+    assert pool.next_uid() == 2
+
+def test_project_audio_pool_resident(tmp_path):
+    from intlib.models.core.project import SgProject
+    constants.PROJECT = MockProject()
+    project = SgProject()
+    project.audio_pool_file = str(tmp_path / 'audio_pool')
+    with open(project.audio_pool_file, 'w') as f:
+        f.write(POOL_STR_NO_FILE_FX)
+    pool = project.get_audio_pool()
+    assert project.get_audio_pool() is pool
+    pool.add_entry(__file__)
+    project.save_audio_pool(pool)
+    assert project.get_audio_pool() is pool
+    # Changed on disk by something else, must be re-read
+    with open(project.audio_pool_file, 'w') as f:
+        f.write(POOL_STR)
+    os.utime(project.audio_pool_file, ns=(0, 0))
+    reloaded = project.get_audio_pool()
+    assert reloaded is not pool
+    assert len(reloaded.per_file_fx) == 1
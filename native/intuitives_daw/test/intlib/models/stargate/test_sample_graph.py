@@ -0,0 +1,114 @@
+from intlib.models.core.sample_graph import *
+import numpy
+import os
+
+
+def _write_text_graph(path, points=100):
+    lines = [
+        "meta|filename|/path/to/file.wav",
+        "meta|timestamp|1234",
+        "meta|channels|2",
+        f"meta|count|{points}",
+        "meta|length|1.5",
+        "meta|frame_count|72000",
+        "meta|sample_rate|48000",
+    ]
+    for ch in range(2):
+        for i in range(points):
+            lines.append(f"p|{ch}|h|{(i % 10) / 10.}")
+            lines.append(f"p|{ch}|l|{-(i % 7) / 10.}")
+    lines.append("\\")
+    with open(path, "w") as f:
+        f.write("\n".join(lines))
+
+def test_binary_round_trip(tmp_path):
+    path = str(tmp_path / "0")
+    _write_text_graph(path)
+    text = SampleGraph(path, "", a_binary=False)
+    assert text.is_valid()
+    assert not os.path.exists(binary_path(path))
+
+    # First load converts, second load reads the binary file
+    SampleGraph(path, "")
+    assert os.path.exists(binary_path(path))
+    graph = SampleGraph(path, "")
+    assert graph.is_valid()
+    assert graph.high_levels is not None
+    assert graph._file == text._file
+    assert graph.frame_count == text.frame_count
+    assert graph.sample_rate == text.sample_rate
+    assert graph.length_in_seconds == text.length_in_seconds
+    assert abs(graph.peak - text.peak) < 1e-6
+    for ch in range(2):
+        assert numpy.allclose(graph.high_peaks[ch], text.high_peaks[ch])
+        assert numpy.allclose(graph.low_peaks[ch], text.low_peaks[ch])
+
+    remove_item_from_sg_cache(path)
+    assert not os.path.exists(binary_path(path))
+
+def test_peak_levels(tmp_path):
+    path = str(tmp_path / "0")
+    _write_text_graph(path, points=101)
+    assert convert_sample_graph_folder(str(tmp_path)) == 1
+    assert convert_sample_graph_folder(str(tmp_path)) == 0
+    graph = SampleGraph(path, "")
+    assert graph.level_count() == 3
+    high, low = graph.get_peaks(1)
+    assert len(high[0]) == 51
+    # Each level keeps the envelope of the level below it
+    assert high[0][0] == max(graph.high_peaks[0][:2])
+    assert low[0][-1] == min(graph.low_peaks[0][-2:])
+    assert graph.level_for_width(40) == 1
+    assert graph.level_for_width(1000) == 0
+
+def test_cache_lru_budget(tmp_path):
+    paths = []
+    for i in range(3):
+        paths.append(str(tmp_path / str(i)))
+        _write_text_graph(paths[-1])
+    cache = SampleGraphCache()
+    graph = cache.get(paths[0], "")
+    assert cache.get(paths[0], "") is graph
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert cache.nbytes == graph.nbytes() > 0
+
+    # Room for two graphs, the least recently used one is evicted
+    cache.set_max_bytes(graph.nbytes() * 2)
+    cache.get(paths[1], "")
+    cache.get(paths[0], "")
+    cache.get(paths[2], "")
+    assert cache.evictions == 1
+    assert paths[1] not in cache
+    assert paths[0] in cache and paths[2] in cache
+
+    assert cache.invalidate_uid(0) == 1
+    assert paths[0] not in cache
+    assert cache.nbytes == graph.nbytes()
+
+def test_cache_mtime_invalidation(tmp_path):
+    path = str(tmp_path / "0")
+    _write_text_graph(path)
+    cache = SampleGraphCache()
+    graph = cache.get(path, "")
+    stat = os.stat(binary_path(path))
+    os.utime(
+        binary_path(path),
+        ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9),
+    )
+    _write_text_graph(path, points=50)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 2 * 10 ** 9))
+    reloaded = cache.get(path, "")
+    assert reloaded is not graph
+    assert len(reloaded.high_peaks[0]) == 50
+
+def test_cache_prewarm(tmp_path):
+    paths = []
+    for i in range(3):
+        paths.append(str(tmp_path / str(i)))
+        _write_text_graph(paths[-1])
+    cache = SampleGraphCache()
+    cache.prewarm(paths + [str(tmp_path / "missing")], "").result()
+    assert len(cache) == 3
+    assert cache.misses == 3
+    cache.get(paths[1], "")
+    assert cache.hits == 1
@@ -0,0 +1,56 @@
+import numpy
+import os
+import pytest
+import wave
+
+pytest.importorskip("librosa")
+
+from intlib.integrations import batch_analyze
+
+
+def _write_tone(path, freq, sample_rate=22050):
+    t = numpy.arange(sample_rate) / sample_rate
+    data = (numpy.sin(2 * numpy.pi * freq * t) * 16000).astype('<i2')
+    with wave.open(path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes(data.tobytes())
+
+def test_batch_analyze_cache(tmp_path):
+    paths = [str(tmp_path / f"{x}.wav") for x in range(2)]
+    for path, freq in zip(paths, (220., 330.)):
+        _write_tone(path, freq)
+    broken = str(tmp_path / "broken.wav")
+    with open(broken, "w") as f:
+        f.write("not audio")
+    cache = str(tmp_path / "cache.db")
+    files = paths + [broken]
+
+    first = {x[0]: x for x in batch_analyze(files, 1, cache)}
+    assert first[broken][1] is None and first[broken][2]
+    for path in paths:
+        assert first[path][2] is None
+        assert first[path][1]['duration'] == pytest.approx(1.0)
+
+    # Cached results come first, without being analyzed again, even
+    # though this file's audio changed, its size and mtime did not.
+    # Failed files are not cached and are retried
+    stat = os.stat(paths[0])
+    _write_tone(paths[0], 3000.)
+    os.utime(paths[0], ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    stat = os.stat(paths[1])
+    os.utime(paths[1], (stat.st_atime, stat.st_mtime + 10))
+    second = list(batch_analyze(files, 1, cache))
+    assert second[0][0] == paths[0]
+    assert second[0][1] == pytest.approx(first[paths[0]][1])
+    assert {x[0] for x in second[1:]} == {paths[1], broken}
+    second = {x[0]: x for x in second}
+    assert second[broken][2]
+    assert second[paths[1]][1]['duration'] == pytest.approx(1.0)
+
+    # A changed mtime invalidates the cached result
+    stat = os.stat(paths[0])
+    os.utime(paths[0], (stat.st_atime, stat.st_mtime + 10))
+    third = {x[0]: x for x in batch_analyze(paths, 1, cache)}
+    assert third[paths[0]][1] != pytest.approx(first[paths[0]][1])
@@ -0,0 +1,70 @@
+import os
+import pytest
+import types
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+try:
+    import PyQt6
+except ImportError:
+    pytest.importorskip("PyQt5")
+
+from intlib import constants
+from intlib.models.core.sample_graph import build_peak_levels
+from intui.sgqt import QApplication, QBrush, QPen
+from intui.widgets import sample_graph
+import numpy
+
+
+class _Graph:
+    """ The parts of SampleGraph used to draw it """
+    def __init__(self, points=256):
+        self.channels = 1
+        self.count = points
+        self.cache = None
+        high = numpy.abs(numpy.sin(numpy.arange(points) * 0.1))[None, :]
+        self.high_levels, self.low_levels = build_peak_levels(
+            high.astype(numpy.float32),
+            -high[:, ::-1].astype(numpy.float32),
+        )
+        self.high_peaks = list(self.high_levels[0])
+        self.low_peaks = list(self.low_levels[0])
+
+    def level_for_width(self, a_points):
+        f_result = 0
+        for f_i, f_level in enumerate(self.high_levels):
+            if f_level.shape[1] < a_points:
+                break
+            f_result = f_i
+        return f_result
+
+    def get_peaks(self, a_level=0):
+        return (
+            list(self.high_levels[a_level]),
+            list(self.low_levels[a_level]),
+        )
+
+def test_pixmap_cache_uses_file_volume(monkeypatch):
+    app = QApplication.instance() or QApplication([])
+    entry = types.SimpleNamespace(uid=3, volume=0.0)
+    pool = types.SimpleNamespace(by_uid=lambda: {3: entry})
+    monkeypatch.setattr(
+        constants,
+        "PROJECT",
+        types.SimpleNamespace(get_audio_pool=lambda: pool),
+        raising=False,
+    )
+    item = types.SimpleNamespace(
+        uid=3,
+        sample_start=0,
+        sample_end=1000,
+        reversed=False,
+        vol=0.0,
+    )
+    graph = _Graph()
+    sample_graph.clear_pixmap_cache()
+    args = (graph, item, 200., 50., QPen(), QBrush())
+    pixmap = sample_graph.get_sample_graph_pixmap(*args)
+    assert sample_graph.get_sample_graph_pixmap(*args) is pixmap
+    # Only the audio pool file's volume changes
+    entry.volume = -12.0
+    assert sample_graph.get_sample_graph_pixmap(*args) is not pixmap
@@ -896,19 +896,12 @@ class AudioAnalyzer:
         sample_rate: int
     ) -> Dict[str, Any]:
         """Basic analysis without librosa"""
-        from scipy import signal
+        from ..audio.tempo import estimate_tempo
         
-        # Simple tempo estimation via autocorrelation
-        onset_env = np.abs(np.diff(audio))
-        autocorr = np.correlate(onset_env, onset_env, mode='same')
-        peaks, _ = signal.find_peaks(autocorr, distance=sample_rate // 4)
-        
-        if len(peaks) >= 2:
-            avg_period = np.mean(np.diff(peaks)) / sample_rate
-            tempo = 60.0 / avg_period if avg_period > 0 else 120.0
-            tempo = max(60, min(200, tempo))  # Constrain
-        else:
-            tempo = 120.0
+        # Tempo from the autocorrelation of the onset envelope
+        tempo = estimate_tempo(
+            audio, sample_rate, min_bpm=60, max_bpm=200, with_beats=False
+        ).tempo
         
         # RMS
         rms = np.sqrt(np.mean(audio ** 2))
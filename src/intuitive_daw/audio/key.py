@@ -0,0 +1,69 @@
+"""Musical key estimation from pitch class profiles
+
+Chroma is correlated with the Krumhansl-Kessler profiles rotated to all
+12 tonics in one matrix product, so estimating the key of a file costs
+about as much as reading its chroma.
+"""
+from typing import Tuple
+import numpy as np
+
+KEY_NAMES = ('C', 'C#', 'D', 'D#', 'E', 'F',
+             'F#', 'G', 'G#', 'A', 'A#', 'B')
+MODES = ('major', 'minor')
+
+# Krumhansl-Kessler key profiles, tonic first
+MAJOR_PROFILE = np.array([6.35, 2.23, 3.48, 2.33, 4.38, 4.09,
+                          2.52, 5.19, 2.39, 3.66, 2.29, 2.88])
+MINOR_PROFILE = np.array([6.33, 2.68, 3.52, 5.38, 2.60, 3.53,
+                          2.54, 4.75, 3.98, 2.69, 3.34, 3.17])
+
+
+def _standardize(x: np.ndarray, axis: int) -> np.ndarray:
+    """Zero mean, unit norm along axis, zero where x is constant"""
+    x = x - x.mean(axis=axis, keepdims=True)
+    norm = np.linalg.norm(x, axis=axis, keepdims=True)
+    return np.divide(x, norm, out=np.zeros_like(x), where=norm > 0)
+
+
+def _key_templates() -> np.ndarray:
+    # Row 2 * tonic + mode, each profile rotated so its tonic is at tonic
+    templates = np.array([
+        np.roll(profile, tonic)
+        for tonic in range(12)
+        for profile in (MAJOR_PROFILE, MINOR_PROFILE)
+    ])
+    return _standardize(templates, axis=1)
+
+
+_KEY_TEMPLATES = _key_templates()
+
+
+def key_scores(chroma: np.ndarray) -> np.ndarray:
+    """
+    Pearson correlation of chroma with every major and minor key
+
+    Args:
+        chroma: Pitch class profile (12,), or (12, n) to score n profiles
+            at once, ie: every frame of a chromagram
+
+    Returns:
+        (12, 2) array indexed [tonic, mode], or (12, 2, n) for 2-D
+        chroma.  Constant chroma, ie: silence, scores 0 for every key
+    """
+    chroma = np.asarray(chroma, dtype=np.float64)
+    scores = _KEY_TEMPLATES @ _standardize(chroma, axis=0)
+    return scores.reshape((12, 2) + chroma.shape[1:])
+
+
+def estimate_key(chroma: np.ndarray) -> Tuple[str, str]:
+    """
+    Most likely key of a pitch class profile
+
+    Args:
+        chroma: Pitch class profile (12,), row 0 is C
+
+    Returns:
+        (key, mode), ie: ('A', 'minor'), ('C', 'major') for silence
+    """
+    best = int(np.argmax(key_scores(chroma)))
+    return KEY_NAMES[best // 2], MODES[best % 2]
@@ -1,17 +1,46 @@
 """Audio processing utilities and effects"""
+import os
+from functools import lru_cache
 from typing import Optional, Tuple
 import numpy as np
 from scipy import signal
-from dataclasses import dataclass
+from scipy.linalg import blas
+from dataclasses import dataclass, astuple
+from enum import Enum
+
+from .tempo import estimate_tempo
+
+
+def accumulate(out: np.ndarray, data: np.ndarray, gain: float = 1.0) -> None:
+    """
+    Add `data * gain` into `out` in place without temporary arrays
+    
+    Uses BLAS axpy when both buffers share a dtype and layout, so scaled
+    mixing does not allocate an intermediate product.
+    """
+    if gain == 1.0:
+        np.add(out, data, out=out, casting='unsafe')
+    elif (out.shape == data.shape and out.dtype == data.dtype
+            and out.dtype in (np.float32, np.float64)
+            and out.flags.c_contiguous and data.flags.c_contiguous):
+        axpy = blas.get_blas_funcs('axpy', (out, data))
+        axpy(data.reshape(-1), out.reshape(-1), a=gain)
+    else:
+        out += data * gain
 
 
 @dataclass
 class AudioClip:
-    """Audio clip containing audio data"""
+    """Audio clip containing audio data
+    
+    `data` is used in whatever float dtype it is given, so float32 clips
+    stay float32 all the way into the mix buffers.
+    """
     name: str
     data: np.ndarray
     sample_rate: int
     position: float = 0.0  # Position in seconds
+    gain: float = 1.0  # Linear clip gain
     
     def get_duration(self) -> float:
         """Get clip duration in seconds"""
@@ -36,16 +65,44 @@ class AudioClip:
         if relative_position < 0 or relative_position >= len(self.data):
             return None
         
-        # Extract audio chunk
-        end_position = min(relative_position + frames, len(self.data))
-        chunk = self.data[relative_position:end_position]
+        chunk = np.zeros((frames, self.data.shape[1]), dtype=self.data.dtype)
+        self.accumulate_into(chunk, position, frames, self.gain, sample_rate)
+        return chunk
+    
+    def accumulate_into(
+        self,
+        out: np.ndarray,
+        position: int,
+        frames: int,
+        gain: float = 1.0,
+        sample_rate: Optional[int] = None
+    ) -> bool:
+        """
+        Add this clip's audio for a block directly into a caller-owned buffer
         
-        # Pad if necessary
-        if len(chunk) < frames:
-            padding = np.zeros((frames - len(chunk), chunk.shape[1]))
-            chunk = np.vstack([chunk, padding])
+        Args:
+            out: Buffer whose first `frames` rows hold the block
+            position: Block start in samples
+            frames: Number of frames in the block
+            gain: Linear gain applied while adding
+            sample_rate: Sample rate of the block (defaults to the clip's)
+            
+        Returns:
+            True if any audio was added
+        """
+        sample_rate = sample_rate or self.sample_rate
+        clip_start = int(self.position * sample_rate)
+        start = max(position, clip_start)
+        end = min(position + frames, clip_start + len(self.data))
+        if start >= end:
+            return False
         
-        return chunk
+        accumulate(
+            out[start - position:end - position],
+            self.data[start - clip_start:end - clip_start],
+            gain
+        )
+        return True
 
 
 class AudioEffect:
@@ -79,8 +136,93 @@ class GainEffect(AudioEffect):
         return audio * gain_linear
 
 
+class EQBandType(Enum):
+    """Filter shapes available in an EQ band"""
+    LOW_SHELF = "low_shelf"
+    HIGH_SHELF = "high_shelf"
+    PEAK = "peak"
+    HIGHPASS = "highpass"
+    LOWPASS = "lowpass"
+
+
+@dataclass
+class EQBand:
+    """Single EQ band, realised as one RBJ biquad section"""
+    band_type: EQBandType
+    freq: float
+    gain_db: float = 0.0
+    q: float = 0.707
+    enabled: bool = True
+    
+    def __post_init__(self):
+        self.band_type = EQBandType(self.band_type)
+    
+    def is_active(self) -> bool:
+        """Whether the band changes the signal at all"""
+        if not self.enabled:
+            return False
+        if self.band_type in (EQBandType.HIGHPASS, EQBandType.LOWPASS):
+            return True
+        return abs(self.gain_db) > 0.1
+    
+    def to_sos(self, sample_rate: int) -> np.ndarray:
+        """
+        Design the band's biquad (Audio EQ Cookbook formulas)
+        
+        Returns:
+            One normalised second-order section [b0, b1, b2, 1, a1, a2]
+        """
+        freq = min(max(self.freq, 1.0), sample_rate * 0.499)
+        w0 = 2.0 * np.pi * freq / sample_rate
+        cos_w0 = np.cos(w0)
+        alpha = np.sin(w0) / (2.0 * self.q)
+        a = 10.0 ** (self.gain_db / 40.0)
+        sqrt_a = 2.0 * np.sqrt(a) * alpha
+        
+        if self.band_type == EQBandType.PEAK:
+            b = [1 + alpha * a, -2 * cos_w0, 1 - alpha * a]
+            den = [1 + alpha / a, -2 * cos_w0, 1 - alpha / a]
+        elif self.band_type == EQBandType.LOW_SHELF:
+            b = [
+                a * ((a + 1) - (a - 1) * cos_w0 + sqrt_a),
+                2 * a * ((a - 1) - (a + 1) * cos_w0),
+                a * ((a + 1) - (a - 1) * cos_w0 - sqrt_a),
+            ]
+            den = [
+                (a + 1) + (a - 1) * cos_w0 + sqrt_a,
+                -2 * ((a - 1) + (a + 1) * cos_w0),
+                (a + 1) + (a - 1) * cos_w0 - sqrt_a,
+            ]
+        elif self.band_type == EQBandType.HIGH_SHELF:
+            b = [
+                a * ((a + 1) + (a - 1) * cos_w0 + sqrt_a),
+                -2 * a * ((a - 1) + (a + 1) * cos_w0),
+                a * ((a + 1) + (a - 1) * cos_w0 - sqrt_a),
+            ]
+            den = [
+                (a + 1) - (a - 1) * cos_w0 + sqrt_a,
+                2 * ((a - 1) - (a + 1) * cos_w0),
+                (a + 1) - (a - 1) * cos_w0 - sqrt_a,
+            ]
+        elif self.band_type == EQBandType.LOWPASS:
+            b = [(1 - cos_w0) / 2, 1 - cos_w0, (1 - cos_w0) / 2]
+            den = [1 + alpha, -2 * cos_w0, 1 - alpha]
+        else:
+            b = [(1 + cos_w0) / 2, -(1 + cos_w0), (1 + cos_w0) / 2]
+            den = [1 + alpha, -2 * cos_w0, 1 - alpha]
+        
+        return np.array(b + den) / den[0]
+
+
 class EQEffect(AudioEffect):
-    """Parametric EQ effect"""
+    """Parametric EQ effect
+    
+    A bank of biquad bands filtered in one `sosfilt` call over all
+    channels. Coefficients are only redesigned when a band changes and
+    the filter state carries over between blocks. The constructor
+    arguments set up the classic low shelf / mid peak / high shelf;
+    further bands can be added with `add_band`.
+    """
     
     def __init__(
         self,
@@ -94,38 +236,105 @@ class EQEffect(AudioEffect):
     ):
         super().__init__("EQ")
         self.sample_rate = sample_rate
-        self.low_freq = low_freq
-        self.low_gain = low_gain
-        self.mid_freq = mid_freq
-        self.mid_gain = mid_gain
-        self.high_freq = high_freq
-        self.high_gain = high_gain
+        self.bands = [
+            EQBand(EQBandType.LOW_SHELF, low_freq, low_gain),
+            EQBand(EQBandType.PEAK, mid_freq, mid_gain, q=1.0),
+            EQBand(EQBandType.HIGH_SHELF, high_freq, high_gain),
+        ]
+        self._design_key: Optional[tuple] = None
+        self._sos: Optional[np.ndarray] = None
+        self._active: list = []  # bands behind each row of _sos
+        self._zi: Optional[np.ndarray] = None
+    
+    low_freq = property(
+        lambda self: self.bands[0].freq,
+        lambda self, value: setattr(self.bands[0], 'freq', value)
+    )
+    low_gain = property(
+        lambda self: self.bands[0].gain_db,
+        lambda self, value: setattr(self.bands[0], 'gain_db', value)
+    )
+    mid_freq = property(
+        lambda self: self.bands[1].freq,
+        lambda self, value: setattr(self.bands[1], 'freq', value)
+    )
+    mid_gain = property(
+        lambda self: self.bands[1].gain_db,
+        lambda self, value: setattr(self.bands[1], 'gain_db', value)
+    )
+    high_freq = property(
+        lambda self: self.bands[2].freq,
+        lambda self, value: setattr(self.bands[2], 'freq', value)
+    )
+    high_gain = property(
+        lambda self: self.bands[2].gain_db,
+        lambda self, value: setattr(self.bands[2], 'gain_db', value)
+    )
+    
+    def add_band(
+        self,
+        band_type: EQBandType,
+        freq: float,
+        gain_db: float = 0.0,
+        q: float = 0.707
+    ) -> EQBand:
+        """Add a band to the EQ and return it"""
+        band = EQBand(band_type, freq, gain_db, q)
+        self.bands.append(band)
+        return band
+    
+    def remove_band(self, band: EQBand) -> None:
+        """Remove a band from the EQ"""
+        if band in self.bands:
+            self.bands.remove(band)
+    
+    def reset(self) -> None:
+        """Clear the filter state"""
+        self._zi = None
+        self._design_key = None
+    
+    def _update_design(self, channels: int) -> None:
+        """Redesign coefficients if any band changed, keeping band state"""
+        key = (self.sample_rate, channels) + tuple(
+            astuple(band) for band in self.bands
+        )
+        if key == self._design_key:
+            return
+        
+        active = [band for band in self.bands if band.is_active()]
+        zi = np.zeros((len(active), 2, channels))
+        if self._zi is not None and self._zi.shape[2] == channels:
+            for row, band in enumerate(active):
+                for old_row, old_band in enumerate(self._active):
+                    if old_band is band:
+                        zi[row] = self._zi[old_row]
+        
+        if active:
+            self._sos = np.array([band.to_sos(self.sample_rate) for band in active])
+        else:
+            self._sos = None
+        self._active = active
+        self._zi = zi
+        self._design_key = key
     
     def _process_impl(self, audio: np.ndarray) -> np.ndarray:
-        """Apply EQ (simplified implementation)"""
-        # This is a simplified EQ implementation
-        # In production, use proper biquad filters
-        result = audio.copy()
-        
-        # Apply low shelf
-        if abs(self.low_gain) > 0.1:
-            sos = signal.butter(
-                2, 
-                self.low_freq, 
-                btype='low',
-                fs=self.sample_rate,
-                output='sos'
-            )
-            gain = 10.0 ** (self.low_gain / 20.0)
-            for ch in range(result.shape[1]):
-                filtered = signal.sosfilt(sos, result[:, ch])
-                result[:, ch] = result[:, ch] + (filtered - result[:, ch]) * (gain - 1)
+        """Apply EQ"""
+        self._update_design(audio.shape[1])
+        if self._sos is None:
+            return audio.copy()
         
+        result, self._zi = signal.sosfilt(self._sos, audio, axis=0, zi=self._zi)
         return result
 
 
 class CompressorEffect(AudioEffect):
-    """Dynamic range compressor"""
+    """Dynamic range compressor
+    
+    Block-based: the detector is a decoupled peak follower (exponential
+    release peak-hold followed by a one-pole attack smoother) evaluated
+    for the whole block at once, so processing a signal block by block
+    gives the same result as processing it in one call.
+    """
     
     def __init__(
         self,
@@ -133,7 +342,9 @@ class CompressorEffect(AudioEffect):
         ratio: float = 4.0,
         attack_ms: float = 10.0,
         release_ms: float = 100.0,
-        sample_rate: int = 48000
+        sample_rate: int = 48000,
+        lookahead_ms: float = 0.0,
+        stereo_link: bool = True
     ):
         super().__init__("Compressor")
         self.threshold_db = threshold_db
@@ -141,50 +352,262 @@ class CompressorEffect(AudioEffect):
         self.attack_ms = attack_ms
         self.release_ms = release_ms
         self.sample_rate = sample_rate
+        self.lookahead_ms = lookahead_ms
+        self.stereo_link = stereo_link
         
         # Calculate envelope coefficients
         self.attack_coef = np.exp(-1.0 / (sample_rate * attack_ms / 1000.0))
         self.release_coef = np.exp(-1.0 / (sample_rate * release_ms / 1000.0))
         self.envelope = 0.0
+        self._peak_hold = 0.0
+        self._lookahead_buffer: Optional[np.ndarray] = None
+    
+    def reset(self) -> None:
+        """Clear detector and lookahead state"""
+        self.envelope = 0.0
+        self._peak_hold = 0.0
+        self._lookahead_buffer = None
+    
+    def _detect(self, peak: np.ndarray) -> np.ndarray:
+        """Run the envelope follower over a block of rectified samples
+        
+        Args:
+            peak: Rectified detector input, shape (frames,) or (frames, channels)
+            
+        Returns:
+            Envelope with the same shape as `peak`
+        """
+        frames = peak.shape[0]
+        state_shape = peak.shape[1:]
+        if np.shape(self.envelope) != state_shape:
+            # Detector layout changed (stereo link toggled): keep the
+            # loudest state so gain reduction does not jump
+            self.envelope = float(np.max(self.envelope))
+            self._peak_hold = float(np.max(self._peak_hold))
+        
+        # Release stage: hold[n] = max(peak[n], release * hold[n - 1]),
+        # solved in the log domain as a running maximum
+        log_release = np.log(self.release_coef)
+        n = np.arange(frames, dtype=np.float64).reshape((-1,) + (1,) * len(state_shape))
+        with np.errstate(divide='ignore'):
+            log_peak = np.log(peak) - n * log_release
+            log_prev = np.log(np.broadcast_to(self._peak_hold, state_shape)) + log_release
+        log_hold = np.maximum(np.maximum.accumulate(log_peak, axis=0), log_prev)
+        hold = np.exp(log_hold + n * log_release)
+        self._peak_hold = hold[-1].copy() if state_shape else float(hold[-1])
+        
+        # Attack stage: one-pole smoother with carried filter state
+        a = self.attack_coef
+        zi = (a * np.broadcast_to(self.envelope, state_shape))[np.newaxis, ...]
+        envelope, _ = signal.lfilter([1.0 - a], [1.0, -a], hold, axis=0, zi=zi)
+        self.envelope = envelope[-1].copy() if state_shape else float(envelope[-1])
+        return envelope
+    
+    def _gain(self, envelope: np.ndarray) -> np.ndarray:
+        """Vectorized gain computer"""
+        threshold_linear = 10.0 ** (self.threshold_db / 20.0)
+        over = envelope > threshold_linear
+        gain = np.ones_like(envelope)
+        env = envelope[over]
+        gain[over] = (threshold_linear + (env - threshold_linear) / self.ratio) / env
+        return gain
     
     def _process_impl(self, audio: np.ndarray) -> np.ndarray:
         """Apply compression"""
-        threshold_linear = 10.0 ** (self.threshold_db / 20.0)
+        if len(audio) == 0:
+            return audio.copy()
+        
+        rectified = np.abs(audio)
+        if self.stereo_link:
+            gain = self._gain(self._detect(rectified.max(axis=1)))[:, np.newaxis]
+        else:
+            gain = self._gain(self._detect(rectified))
         
-        result = audio.copy()
+        lookahead = int(self.sample_rate * self.lookahead_ms / 1000.0)
+        if lookahead <= 0:
+            return audio * gain
+        
+        # Delay the audio so the gain reacts `lookahead` samples early
+        if (self._lookahead_buffer is None
+                or self._lookahead_buffer.shape != (lookahead, audio.shape[1])):
+            self._lookahead_buffer = np.zeros((lookahead, audio.shape[1]))
+        delayed = np.concatenate([self._lookahead_buffer, audio])
+        self._lookahead_buffer = delayed[-lookahead:].copy()
+        return delayed[:len(audio)] * gain
+
+
+class PartitionedConvolver:
+    """
+    Uniformly partitioned overlap-add FFT convolution
+    
+    The impulse response is split into partitions of `partition_size`
+    frames whose spectra are precomputed. Input blocks of any length are
+    accepted with zero latency: the partially filled current partition is
+    convolved on every call, while the contribution of older partitions is
+    summed once per partition. The tail is carried across calls.
+    """
+    
+    def __init__(self, spectra: np.ndarray, partition_size: int):
+        """
+        Args:
+            spectra: IR partition spectra from `compute_spectra`,
+                shape (partitions, partition_size + 1, channels)
+            partition_size: Partition length in frames
+        """
+        self.spectra = spectra
+        self.partition_size = partition_size
+        self.reset()
+    
+    @staticmethod
+    def compute_spectra(ir: np.ndarray, partition_size: int) -> np.ndarray:
+        """
+        Split an impulse response into partitions and transform them
         
-        for i in range(len(result)):
-            # Get peak level
-            peak = np.max(np.abs(result[i]))
+        Args:
+            ir: Impulse response, shape (frames,) or (frames, channels)
+            partition_size: Partition length in frames
             
-            # Update envelope
-            if peak > self.envelope:
-                self.envelope = self.attack_coef * self.envelope + \
-                               (1 - self.attack_coef) * peak
-            else:
-                self.envelope = self.release_coef * self.envelope + \
-                               (1 - self.release_coef) * peak
+        Returns:
+            Complex spectra of shape (partitions, partition_size + 1, channels)
+        """
+        if ir.ndim == 1:
+            ir = ir[:, np.newaxis]
+        partitions = max(1, -(-len(ir) // partition_size))
+        padded = np.zeros((partitions * partition_size, ir.shape[1]))
+        padded[:len(ir)] = ir
+        blocks = padded.reshape(partitions, partition_size, ir.shape[1])
+        return np.fft.rfft(blocks, n=2 * partition_size, axis=1)
+    
+    def reset(self) -> None:
+        """Clear the input history and the convolution tail"""
+        self._fdl = None  # frequency-domain delay line of input partitions
+        self._fdl_index = 0
+        self._input = None
+        self._pos = 0
+        self._history = None
+        self._overlap = None
+    
+    def _allocate(self, channels: int) -> None:
+        """Allocate state for `channels` input channels"""
+        size = self.partition_size
+        bins = self.spectra.shape[1]
+        self._fdl = np.zeros((len(self.spectra), bins, channels), dtype=complex)
+        self._fdl_index = 0
+        self._input = np.zeros((size, channels))
+        self._pos = 0
+        self._history = np.zeros((bins, channels), dtype=complex)
+        self._overlap = np.zeros((size, channels))
+    
+    def process(self, audio: np.ndarray) -> np.ndarray:
+        """
+        Convolve the next block of a stream
+        
+        Args:
+            audio: Input block, shape (frames, channels)
+            
+        Returns:
+            Wet signal with the same shape as `audio`
+        """
+        if self._input is None or self._input.shape[1] != audio.shape[1]:
+            self._allocate(audio.shape[1])
+        
+        size = self.partition_size
+        fft_size = 2 * size
+        first = self.spectra[0]
+        result = np.empty((len(audio), audio.shape[1]))
+        
+        i = 0
+        while i < len(audio):
+            count = min(size - self._pos, len(audio) - i)
+            end = self._pos + count
+            self._input[self._pos:end] = audio[i:i + count]
             
-            # Calculate gain reduction
-            if self.envelope > threshold_linear:
-                gain_reduction = (
-                    threshold_linear + 
-                    (self.envelope - threshold_linear) / self.ratio
-                ) / self.envelope
-                result[i] *= gain_reduction
+            spectrum = np.fft.rfft(self._input, n=fft_size, axis=0)
+            block = np.fft.irfft(spectrum * first + self._history, n=fft_size, axis=0)
+            result[i:i + count] = block[self._pos:end] + self._overlap[self._pos:end]
+            self._pos = end
+            i += count
+            
+            if self._pos == size:
+                self._advance(spectrum, block)
         
         return result
+    
+    def _advance(self, spectrum: np.ndarray, block: np.ndarray) -> None:
+        """Push a completed input partition and precompute the next history"""
+        partitions = len(self.spectra)
+        self._fdl[self._fdl_index] = spectrum
+        if partitions > 1:
+            # History for the next partition: sum of X[k + 1 - p] * H[p], p >= 1
+            order = (self._fdl_index - np.arange(partitions - 1)) % partitions
+            self._history = np.einsum('pfc,pfc->fc', self._fdl[order], self.spectra[1:])
+        self._fdl_index = (self._fdl_index + 1) % partitions
+        self._overlap = block[self.partition_size:].copy()
+        self._input.fill(0.0)
+        self._pos = 0
+
+
+@lru_cache(maxsize=32)
+def _synthetic_ir_spectra(
+    room_size: float,
+    damping: float,
+    sample_rate: int,
+    partition_size: int
+) -> np.ndarray:
+    """Build and partition the synthetic reverb IR (cached)"""
+    decay = 0.3 + room_size * 0.6
+    ir_length = int(sample_rate * 0.5)  # 0.5 second IR
+    t = np.linspace(0, 1, ir_length)
+    
+    # Fixed seed so the same settings always give the same room
+    noise = np.random.default_rng(0).standard_normal(ir_length)
+    if damping > 0:
+        coef = min(damping, 0.99) * 0.9
+        noise = signal.lfilter([1.0 - coef], [1.0, -coef], noise)
+    ir = np.exp(-t * (1.0 / decay)) * noise
+    ir /= np.sqrt(np.sum(ir ** 2))
+    
+    spectra = PartitionedConvolver.compute_spectra(ir, partition_size)
+    spectra.flags.writeable = False
+    return spectra
+
+
+@lru_cache(maxsize=32)
+def _file_ir_spectra(
+    path: str,
+    mtime: float,
+    sample_rate: int,
+    partition_size: int
+) -> np.ndarray:
+    """Load, resample and partition an impulse response file (cached)"""
+    import soundfile as sf
+    
+    ir, file_rate = sf.read(path, always_2d=True)
+    if file_rate != sample_rate:
+        ir = signal.resample_poly(ir, sample_rate, file_rate, axis=0)
+    
+    spectra = PartitionedConvolver.compute_spectra(ir, partition_size)
+    spectra.flags.writeable = False
+    return spectra
 
 
 class ReverbEffect(AudioEffect):
-    """Simple reverb effect"""
+    """Convolution reverb
+    
+    Uses a synthetic room IR shaped by `room_size` and `damping`, or an
+    impulse response file loaded with `load_impulse_response`. IR spectra
+    are cached and shared between instances, and the reverb tail carries
+    over between blocks.
+    """
     
     def __init__(
         self,
         room_size: float = 0.5,
         damping: float = 0.5,
         wet_level: float = 0.3,
-        sample_rate: int = 48000
+        sample_rate: int = 48000,
+        ir_path: Optional[str] = None,
+        partition_size: int = 512
     ):
         super().__init__("Reverb")
         self.room_size = room_size
@@ -192,65 +615,233 @@ class ReverbEffect(AudioEffect):
         self.wet_level = wet_level
         self.sample_rate = sample_rate
         self.dry_level = 1.0 - wet_level
+        self.partition_size = partition_size
+        self._convolver: Optional[PartitionedConvolver] = None
+        self._convolver_key: Optional[tuple] = None
+        self.load_impulse_response(ir_path)
     
-    def _process_impl(self, audio: np.ndarray) -> np.ndarray:
-        """Apply reverb (simplified implementation)"""
-        # Simplified reverb using convolution with impulse response
-        # In production, use proper reverb algorithm
-        
-        # Create simple impulse response
-        decay = 0.3 + self.room_size * 0.6
-        ir_length = int(self.sample_rate * 0.5)  # 0.5 second IR
-        t = np.linspace(0, 1, ir_length)
-        ir = np.exp(-t * (1.0 / decay)) * np.random.randn(ir_length)
-        
-        # Convolve each channel
-        result = audio * self.dry_level
+    def load_impulse_response(self, path: Optional[str]) -> None:
+        """
+        Use an impulse response file, or None for the synthetic room
         
-        for ch in range(audio.shape[1]):
-            wet = signal.fftconvolve(audio[:, ch], ir, mode='same')
-            wet = wet * self.wet_level
-            result[:, ch] += wet[:len(result)]
+        The file's modification time is read here rather than while
+        processing, so call this again to pick up changes to the file.
+        """
+        self._ir_mtime = os.path.getmtime(path) if path else None
+        self.ir_path = path
+        self._convolver = None
+        self._convolver_key = None
+    
+    def reset(self) -> None:
+        """Clear the reverb tail"""
+        if self._convolver is not None:
+            self._convolver.reset()
+    
+    def _get_convolver(self, channels: int) -> PartitionedConvolver:
+        """Get the convolver, rebuilding it when the IR settings change"""
+        if self.ir_path:
+            key = (
+                'file', self.ir_path, self._ir_mtime,
+                self.sample_rate, self.partition_size
+            )
+        else:
+            key = (
+                'synthetic', self.room_size, self.damping,
+                self.sample_rate, self.partition_size
+            )
+        key += (channels,)
         
-        return result
+        if self._convolver is None or key != self._convolver_key:
+            if key[0] == 'file':
+                try:
+                    spectra = _file_ir_spectra(*key[1:-1])
+                except (OSError, RuntimeError):
+                    # The file was moved or deleted, keep the IR that
+                    # is playing instead of failing every block
+                    if (
+                        self._convolver is None
+                        or self._convolver_key[-1] != channels
+                    ):
+                        raise
+                    self._convolver_key = key
+                    return self._convolver
+            else:
+                spectra = _synthetic_ir_spectra(*key[1:-1])
+            if spectra.shape[2] not in (1, channels):
+                # IR channel layout does not match: use its first channel
+                spectra = spectra[:, :, :1]
+            self._convolver = PartitionedConvolver(spectra, self.partition_size)
+            self._convolver_key = key
+        return self._convolver
+    
+    def _process_impl(self, audio: np.ndarray) -> np.ndarray:
+        """Apply reverb"""
+        wet = self._get_convolver(audio.shape[1]).process(audio)
+        return audio * self.dry_level + wet * self.wet_level
 
 
 class DelayEffect(AudioEffect):
-    """Delay/echo effect"""
+    """Delay/echo effect
+    
+    Uses a circular delay line processed in slices. Blocks are split into
+    chunks no longer than the shortest delay, so feedback is exact for any
+    block size. A non-zero modulation depth turns it into a fractional,
+    LFO-modulated delay (chorus/flanger), and `sync` locks the delay time
+    to a note value at the current tempo.
+    """
+    
+    # Note value suffixes for tempo sync: dotted and triplet
+    SYNC_MODIFIERS = {"d": 1.5, "t": 2.0 / 3.0}
     
     def __init__(
         self,
         delay_time: float = 0.5,
         feedback: float = 0.4,
         mix: float = 0.3,
-        sample_rate: int = 48000
+        sample_rate: int = 48000,
+        mod_depth_ms: float = 0.0,
+        mod_rate_hz: float = 0.0,
+        sync: Optional[str] = None,
+        tempo: float = 120.0
     ):
         super().__init__("Delay")
         self.delay_time = delay_time
         self.feedback = feedback
         self.mix = mix
         self.sample_rate = sample_rate
+        self.mod_depth_ms = mod_depth_ms
+        self.mod_rate_hz = mod_rate_hz
+        self.sync = sync
+        self.tempo = tempo
+        self.buffer = None
+        self._write_pos = 0
+        self._lfo_phase = 0.0
+    
+    def set_tempo(self, tempo: float) -> None:
+        """Set the tempo used for synced delay times"""
+        self.tempo = tempo
+    
+    @classmethod
+    def note_to_seconds(cls, note: str, tempo: float) -> float:
+        """
+        Convert a note value to seconds at the given tempo
+        
+        Args:
+            note: Note value such as '1/4', '1/8d' (dotted) or '1/16t' (triplet)
+            tempo: Tempo in BPM (quarter notes per minute)
+            
+        Returns:
+            Duration in seconds
+        """
+        factor = 1.0
+        if note[-1] in cls.SYNC_MODIFIERS:
+            factor = cls.SYNC_MODIFIERS[note[-1]]
+            note = note[:-1]
+        num, den = note.split('/')
+        quarters = 4.0 * float(num) / float(den)
+        return quarters * 60.0 / tempo * factor
+    
+    def get_delay_time(self) -> float:
+        """Get the effective delay time in seconds"""
+        if self.sync:
+            return self.note_to_seconds(self.sync, self.tempo)
+        return self.delay_time
+    
+    def reset(self) -> None:
+        """Clear the delay line"""
         self.buffer = None
+        self._write_pos = 0
+        self._lfo_phase = 0.0
+    
+    def _ensure_buffer(self, size: int, channels: int) -> None:
+        """Grow the delay line to `size` frames, keeping its contents"""
+        if self.buffer is not None and self.buffer.shape[1] != channels:
+            self.buffer = None
+        if self.buffer is None:
+            self.buffer = np.zeros((size, channels))
+            self._write_pos = 0
+        elif len(self.buffer) < size:
+            # Oldest sample first, placed so the next write lands at 0
+            ordered = np.roll(self.buffer, -self._write_pos, axis=0)
+            self.buffer = np.zeros((size, channels))
+            self.buffer[size - len(ordered):] = ordered
+            self._write_pos = 0
+    
+    def _read(self, start: int, frames: int) -> np.ndarray:
+        """Read `frames` contiguous frames from the ring starting at `start`"""
+        size = len(self.buffer)
+        start %= size
+        end = start + frames
+        if end <= size:
+            return self.buffer[start:end]
+        return np.concatenate([self.buffer[start:], self.buffer[:end - size]])
+    
+    def _write(self, data: np.ndarray) -> None:
+        """Write frames at the write head and advance it"""
+        size = len(self.buffer)
+        start = self._write_pos
+        end = start + len(data)
+        if end <= size:
+            self.buffer[start:end] = data
+        else:
+            split = size - start
+            self.buffer[start:] = data[:split]
+            self.buffer[:end - size] = data[split:]
+        self._write_pos = end % size
     
     def _process_impl(self, audio: np.ndarray) -> np.ndarray:
         """Apply delay"""
-        delay_samples = int(self.delay_time * self.sample_rate)
+        base = self.get_delay_time() * self.sample_rate
+        depth = self.mod_depth_ms * self.sample_rate / 1000.0
+        modulated = depth > 0.0 and self.mod_rate_hz > 0.0
+        if not modulated and abs(base - round(base)) < 1e-6:
+            return self._process_fixed(audio, max(1, int(round(base))))
+        return self._process_modulated(audio, base, depth if modulated else 0.0)
+    
+    def _process_fixed(self, audio: np.ndarray, delay: int) -> np.ndarray:
+        """Integer delay using slice reads and writes only"""
+        self._ensure_buffer(delay, audio.shape[1])
+        result = np.empty_like(audio, dtype=np.float64)
         
-        # Initialize buffer
-        if self.buffer is None or len(self.buffer) != delay_samples:
-            self.buffer = np.zeros((delay_samples, audio.shape[1]))
+        for i in range(0, len(audio), delay):
+            chunk = audio[i:i + delay]
+            delayed = self._read(self._write_pos - delay, len(chunk))
+            result[i:i + len(chunk)] = chunk * (1 - self.mix) + delayed * self.mix
+            self._write(chunk + delayed * self.feedback)
         
-        result = audio.copy()
+        return result
+    
+    def _process_modulated(
+        self,
+        audio: np.ndarray,
+        base: float,
+        depth: float
+    ) -> np.ndarray:
+        """Fractional, optionally LFO-modulated delay with linear interpolation"""
+        frames = len(audio)
+        min_delay = max(1.0, base - depth)
+        self._ensure_buffer(int(np.ceil(base + depth)) + 2, audio.shape[1])
+        size = len(self.buffer)
         
-        # Process each sample
-        for i in range(len(result)):
-            # Add delayed signal
-            delayed = self.buffer[0]
-            result[i] = audio[i] * (1 - self.mix) + delayed * self.mix
-            
-            # Update buffer
-            self.buffer = np.roll(self.buffer, -1, axis=0)
-            self.buffer[-1] = audio[i] + delayed * self.feedback
+        # Per-sample delay in samples for the whole block
+        phase_inc = 2.0 * np.pi * self.mod_rate_hz / self.sample_rate
+        phases = self._lfo_phase + phase_inc * np.arange(frames)
+        delays = np.maximum(base + depth * np.sin(phases), min_delay)
+        self._lfo_phase = float((self._lfo_phase + phase_inc * frames) % (2.0 * np.pi))
+        
+        result = np.empty_like(audio, dtype=np.float64)
+        step = int(min_delay)
+        for i in range(0, frames, step):
+            chunk = audio[i:i + step]
+            n = len(chunk)
+            read_pos = self._write_pos + np.arange(n) - delays[i:i + n]
+            index = np.floor(read_pos).astype(np.int64)
+            frac = (read_pos - index)[:, np.newaxis]
+            a = self.buffer[index % size]
+            b = self.buffer[(index + 1) % size]
+            delayed = a + (b - a) * frac
+            result[i:i + n] = chunk * (1 - self.mix) + delayed * self.mix
+            self._write(chunk + delayed * self.feedback)
         
         return result
 
@@ -303,33 +894,12 @@ class AudioAnalyzer:
         """
         Detect tempo using onset detection
         
-        Returns estimated BPM
+        Returns estimated BPM, between 60 and 180
         """
-        # Simplified tempo detection
-        # In production, use librosa.beat.tempo
-        
-        # Calculate onset strength
-        hop_length = 512
-        onset_env = np.abs(np.diff(audio[:, 0]))
-        
-        # Autocorrelation
-        autocorr = np.correlate(onset_env, onset_env, mode='full')
-        autocorr = autocorr[len(autocorr) // 2:]
-        
-        # Find peaks
-        peaks = signal.find_peaks(autocorr, distance=sample_rate // hop_length)[0]
-        
-        if len(peaks) > 0:
-            # Estimate tempo from first peak
-            period = peaks[0] * hop_length / sample_rate
-            bpm = 60.0 / period
-            
-            # Constrain to reasonable range
-            while bpm < 60:
-                bpm *= 2
-            while bpm > 180:
-                bpm /= 2
-            
-            return bpm
-        
-        return 120.0  # Default tempo
+        return estimate_tempo(
+            audio,
+            sample_rate,
+            min_bpm=60.0,
+            max_bpm=180.0,
+            with_beats=False,
+        ).tempo
@@ -0,0 +1,129 @@
+"""Framing and short-time Fourier transforms for audio analysis"""
+from functools import lru_cache
+import numpy as np
+from numpy.lib.stride_tricks import as_strided
+
+# Frames per FFT call in magnitude_spectrogram
+_BLOCK_FRAMES = 512
+
+
+def to_mono(audio: np.ndarray) -> np.ndarray:
+    """Mix (samples, channels) audio down to a float32 (samples,) array"""
+    audio = np.asarray(audio)
+    if audio.ndim > 1:
+        audio = audio.mean(axis=1)
+    return audio.astype(np.float32, copy=False)
+
+
+def frame_signal(
+    audio: np.ndarray,
+    frame_length: int,
+    hop_length: int,
+    center: bool = True
+) -> np.ndarray:
+    """
+    View a mono signal as overlapping frames without copying it
+
+    Args:
+        audio: Mono signal (samples,)
+        frame_length: Samples per frame
+        hop_length: Samples between frame starts
+        center: Pad the signal so that frame i is centered on sample
+            i * hop_length
+
+    Returns:
+        Read-only (frames, frame_length) view, the padded signal when
+        center is set or audio is shorter than one frame
+    """
+    audio = np.ascontiguousarray(audio)
+    if center:
+        audio = np.pad(audio, frame_length // 2)
+    if len(audio) < frame_length:
+        audio = np.pad(audio, (0, frame_length - len(audio)))
+    n_frames = 1 + (len(audio) - frame_length) // hop_length
+    stride = audio.strides[0]
+    return as_strided(
+        audio,
+        shape=(n_frames, frame_length),
+        strides=(hop_length * stride, stride),
+        writeable=False,
+    )
+
+
+@lru_cache(maxsize=16)
+def _window(n_fft: int) -> np.ndarray:
+    window = np.hanning(n_fft + 1)[:-1].astype(np.float32)
+    window.flags.writeable = False
+    return window
+
+
+def magnitude_spectrogram(
+    audio: np.ndarray,
+    n_fft: int = 2048,
+    hop_length: int = 512,
+    center: bool = True
+) -> np.ndarray:
+    """
+    Hann windowed magnitude STFT of a mono signal
+
+    Frames are transformed in blocks so the complex intermediate stays
+    small for long files.
+
+    Returns:
+        float32 array (frames, n_fft // 2 + 1)
+    """
+    frames = frame_signal(to_mono(audio), n_fft, hop_length, center)
+    window = _window(n_fft)
+    result = np.empty((len(frames), n_fft // 2 + 1), dtype=np.float32)
+    for start in range(0, len(frames), _BLOCK_FRAMES):
+        block = frames[start:start + _BLOCK_FRAMES] * window
+        np.abs(
+            np.fft.rfft(block, axis=1),
+            out=result[start:start + len(block)],
+            casting='same_kind',
+        )
+    return result
+
+
+def fft_frequencies(n_fft: int, sample_rate: int) -> np.ndarray:
+    """Center frequency of each rfft bin in Hz"""
+    return np.fft.rfftfreq(n_fft, 1.0 / sample_rate)
+
+
+@lru_cache(maxsize=16)
+def chroma_filter(
+    n_fft: int,
+    sample_rate: int,
+    tuning: float = 440.0
+) -> np.ndarray:
+    """
+    Matrix that folds rfft bins onto the 12 pitch classes
+
+    Each bin above DC goes to the pitch class of its nearest equal
+    tempered note, so chroma for every frame of a spectrogram is a single
+    matrix product.  Cached per (n_fft, sample_rate, tuning).
+
+    Returns:
+        Read-only float32 array (12, n_fft // 2 + 1), row 0 is C
+    """
+    freqs = fft_frequencies(n_fft, sample_rate)
+    matrix = np.zeros((12, len(freqs)), dtype=np.float32)
+    bins = np.flatnonzero(freqs > 0)
+    midi = 69.0 + 12.0 * np.log2(freqs[bins] / tuning)
+    matrix[np.round(midi).astype(np.int64) % 12, bins] = 1.0
+    matrix.flags.writeable = False
+    return matrix
+
+
+def chromagram(
+    spectrogram: np.ndarray,
+    sample_rate: int,
+    n_fft: int
+) -> np.ndarray:
+    """
+    Pitch class energy of each frame of a magnitude_spectrogram()
+
+    Returns:
+        float32 array (12, frames)
+    """
+    return chroma_filter(n_fft, sample_rate) @ spectrogram.T
@@ -0,0 +1,243 @@
+"""Tempo estimation and beat tracking
+
+Shared by the audio processor, the integrations analyzer and the local
+models.  The signal is reduced to a spectral flux onset envelope at one
+value per hop, so everything after the STFT works on a few hundred values
+per second instead of every sample.
+"""
+from dataclasses import dataclass, field
+from typing import Optional, Tuple
+import numpy as np
+
+from .spectral import magnitude_spectrogram, to_mono
+
+DEFAULT_TEMPO = 120.0
+# Comb filter harmonics of the beat period and their weights
+_COMB_HARMONICS = (1, 2, 3, 4)
+_COMB_WEIGHTS = (1.0, 0.5, 0.33, 0.25)
+
+
+@dataclass
+class TempoEstimate:
+    """Result of estimate_tempo"""
+    tempo: float = DEFAULT_TEMPO
+    beats: np.ndarray = field(default_factory=lambda: np.zeros(0))  # seconds
+    confidence: float = 0.0  # 0.0-1.0, strength of the winning period
+    frame_rate: float = 0.0  # Onset envelope values per second
+    onset_envelope: Optional[np.ndarray] = field(default=None, repr=False)
+
+
+def onset_envelope(
+    audio: np.ndarray,
+    sample_rate: int,
+    n_fft: int = 2048,
+    hop_length: int = 512,
+    spectrogram: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """
+    Spectral flux onset strength, one value per STFT frame
+
+    Args:
+        audio: Audio data (samples,) or (samples, channels)
+        sample_rate: Sample rate in Hz
+        n_fft: FFT size
+        hop_length: Samples between frames
+        spectrogram: Precomputed magnitude_spectrogram() of audio, to skip
+            computing it again
+
+    Returns:
+        float32 array (frames,), frame i is centered on sample
+        i * hop_length
+    """
+    if spectrogram is None:
+        spectrogram = magnitude_spectrogram(audio, n_fft, hop_length)
+    if len(spectrogram) < 2:
+        return np.zeros(len(spectrogram), dtype=np.float32)
+    # Log compression so quiet onsets count, then the positive change of
+    # each bin from the previous frame
+    log_spec = np.log1p(100.0 * spectrogram)
+    flux = np.maximum(np.diff(log_spec, axis=0), 0.0).sum(axis=1)
+    env = np.concatenate(([0.0], flux)).astype(np.float32)
+    # Remove the slowly varying level so that only onsets remain
+    width = min(max(int(round(0.5 * sample_rate / hop_length)), 1), len(env))
+    local_mean = np.convolve(env, np.ones(width) / width, mode='same')
+    np.maximum(env - local_mean, 0.0, out=env)
+    std = env.std()
+    if std > 0:
+        env /= std
+    return env
+
+
+def autocorrelate(x: np.ndarray, max_lag: Optional[int] = None) -> np.ndarray:
+    """
+    Autocorrelation through the power spectrum (Wiener-Khinchin)
+
+    O(n log n) instead of np.correlate's O(n^2).  Lag l is normalized by
+    the n - l values that overlap, so long lags are not penalized.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    n = len(x)
+    if max_lag is None or max_lag > n:
+        max_lag = n
+    if n == 0:
+        return np.zeros(0)
+    n_fft = 1 << int(2 * n - 1).bit_length()
+    spectrum = np.fft.rfft(x, n_fft)
+    acf = np.fft.irfft(spectrum.real ** 2 + spectrum.imag ** 2, n_fft)
+    return acf[:max_lag] / np.arange(n, n - max_lag, -1)
+
+
+def tempo_scores(
+    env: np.ndarray,
+    frame_rate: float,
+    min_bpm: float = 60.0,
+    max_bpm: float = 200.0,
+    start_bpm: float = DEFAULT_TEMPO,
+    resolution: float = 0.25
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Score candidate tempos with a comb filter over the envelope
+    autocorrelation
+
+    Each tempo sums the autocorrelation at multiples of its beat period,
+    weighted by a log-normal prior around start_bpm that breaks ties
+    between a tempo and its double or half.
+
+    Returns:
+        (bpms, scores)
+    """
+    bpms = np.arange(min_bpm, max_bpm + resolution, resolution)
+    periods = 60.0 * frame_rate / bpms
+    max_lag = int(np.ceil(periods[0] * _COMB_HARMONICS[-1])) + 2
+    acf = autocorrelate(env - env.mean(), max_lag)
+    if len(acf) < 2 or acf[0] <= 0:
+        return bpms, np.zeros(len(bpms))
+    acf = np.maximum(acf / acf[0], 0.0)
+    lags = np.arange(len(acf))
+    scores = np.zeros(len(bpms))
+    for harmonic, weight in zip(_COMB_HARMONICS, _COMB_WEIGHTS):
+        scores += weight * np.interp(periods * harmonic, lags, acf, right=0.0)
+    prior = np.exp(-0.5 * (np.log2(bpms / start_bpm) / 1.0) ** 2)
+    return bpms, scores * prior
+
+
+def track_beats(
+    env: np.ndarray,
+    frame_rate: float,
+    tempo: float,
+    tightness: float = 100.0
+) -> np.ndarray:
+    """
+    Dynamic programming beat tracker (Ellis, 2007)
+
+    Picks the beat frames that best line up with onsets while keeping
+    intervals close to the beat period.
+
+    Returns:
+        Beat frame indices
+    """
+    n = len(env)
+    period = 60.0 * frame_rate / tempo
+    if n == 0 or not env.any() or period < 1.0:
+        return np.zeros(0, dtype=np.int64)
+    # Smooth the onsets with a window about 1/32 of a beat wide
+    width = max(int(round(period / 16.0)), 1)
+    window = np.exp(-0.5 * (np.arange(-width, width + 1) * 32.0 / period) ** 2)
+    local = np.convolve(env, window, mode='same')
+
+    # Previous beat candidates from period / 2 to 2 * period frames back,
+    # and the penalty for each interval
+    offsets = np.arange(
+        -int(round(2 * period)),
+        -int(round(period / 2)) + 1,
+    )
+    penalty = -tightness * np.log(-offsets / period) ** 2
+    cumulative = local.astype(np.float64)
+    backlink = np.full(n, -1, dtype=np.int64)
+    first = -offsets[-1]
+    for i in range(first, n):
+        candidates = i + offsets
+        valid = candidates >= 0
+        scores = cumulative[candidates[valid]] + penalty[valid]
+        best = int(np.argmax(scores))
+        cumulative[i] += scores[best]
+        backlink[i] = candidates[valid][best]
+
+    # Start from the best beat in the last period, then follow the links
+    tail = max(n - int(round(period)), 0)
+    beat = tail + int(np.argmax(cumulative[tail:]))
+    beats = []
+    while beat >= 0:
+        beats.append(beat)
+        beat = backlink[beat]
+    beats = np.array(beats[::-1], dtype=np.int64)
+    # Drop leading and trailing beats in silence
+    strong = local[beats] > 0.5 * local[beats].mean()
+    if strong.any():
+        nonzero = np.flatnonzero(strong)
+        beats = beats[nonzero[0]:nonzero[-1] + 1]
+    return beats
+
+
+def estimate_tempo(
+    audio: np.ndarray,
+    sample_rate: int,
+    min_bpm: float = 60.0,
+    max_bpm: float = 200.0,
+    start_bpm: float = DEFAULT_TEMPO,
+    hop_length: int = 512,
+    n_fft: int = 2048,
+    with_beats: bool = True,
+    spectrogram: Optional[np.ndarray] = None,
+    envelope: Optional[np.ndarray] = None
+) -> TempoEstimate:
+    """
+    Estimate the tempo, and optionally the beat positions, of audio
+
+    Args:
+        audio: Audio data (samples,) or (samples, channels)
+        sample_rate: Sample rate in Hz
+        min_bpm: Slowest tempo considered
+        max_bpm: Fastest tempo considered
+        start_bpm: Most likely tempo, used to choose between a tempo and
+            its double or half
+        hop_length: Samples between onset envelope values
+        n_fft: FFT size of the onset envelope
+        with_beats: Also track beat positions
+        spectrogram: Precomputed magnitude_spectrogram(audio, n_fft,
+            hop_length)
+        envelope: Precomputed onset_envelope() with the same settings
+
+    Returns:
+        TempoEstimate, with DEFAULT_TEMPO clipped to the range and no
+        beats if no tempo was found, ie: silence
+    """
+    frame_rate = sample_rate / hop_length
+    if envelope is None:
+        env = onset_envelope(
+            to_mono(audio), sample_rate, n_fft, hop_length,
+            spectrogram=spectrogram
+        )
+    else:
+        env = envelope
+    result = TempoEstimate(
+        tempo=float(np.clip(DEFAULT_TEMPO, min_bpm, max_bpm)),
+        frame_rate=frame_rate,
+        onset_envelope=env,
+    )
+    bpms, scores = tempo_scores(env, frame_rate, min_bpm, max_bpm, start_bpm)
+    if not scores.any():
+        return result
+    best = int(np.argmax(scores))
+    result.tempo = float(bpms[best])
+    if 0 < best < len(scores) - 1:
+        # Parabolic interpolation between the grid tempos
+        left, center, right = scores[best - 1:best + 2]
+        curvature = left - 2.0 * center + right
+        if curvature < 0:
+            offset = 0.5 * (left - right) / curvature
+            result.tempo += offset * float(bpms[1] - bpms[0])
+    result.confidence = float(np.clip(scores[best] / sum(_COMB_WEIGHTS), 0, 1))
+    if with_beats:
+        result.beats = track_beats(env, frame_rate, result.tempo) / frame_rate
+    return result
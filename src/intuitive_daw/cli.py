@@ -1,12 +1,15 @@
 """Command-line interface for the DAW"""
 import click
+import json
 import os
 import yaml
 from pathlib import Path
 
-from ..api.server import DAWServer
-from ..core.project import Project
-from ..core.engine import AudioEngine
+from .api.server import DAWServer
+from .core.project import Project
+from .core.engine import AudioEngine
+from .core.library import LibraryAnalyzer
+from .db.models import DatabaseManager
 
 
 @click.group()
@@ -74,7 +77,9 @@ def info(path):
 @click.argument('output_path')
 @click.option('--format', default='wav', help='Output format')
 @click.option('--duration', default=None, type=float, help='Duration in seconds')
-def export(project_path, output_path, format, duration):
+@click.option('--block-size', default=None, type=int, help='Frames rendered per block')
+@click.option('--threads', default=1, type=int, help='Track render threads')
+def export(project_path, output_path, format, duration, block_size, threads):
     """Export project to audio file"""
     project = Project.load(project_path)
     
@@ -91,16 +96,27 @@ def export(project_path, output_path, format, duration):
     
     click.echo(f"Exporting {project.metadata.name} to {output_path}...")
     
-    # Initialize audio engine
+    # Initialize audio engine (offline, no audio device needed)
     engine = AudioEngine()
-    engine.initialize()
+    engine.set_render_threads(threads)
     
     # Add tracks to engine
     for track in project.tracks:
         engine.add_track(track)
     
-    # Render
-    success = engine.render(output_path, export_duration)
+    # Render, streaming blocks to disk
+    total_frames = int(export_duration * engine.config.sample_rate)
+    with click.progressbar(length=total_frames, label='Rendering') as bar:
+        def report(rendered, total):
+            bar.update(rendered - bar.pos)
+        
+        success = engine.render(
+            output_path,
+            export_duration,
+            block_size=block_size,
+            progress=report
+        )
+    engine.shutdown()
     
     if success:
         click.echo(f"✓ Successfully exported to {output_path}")
@@ -108,6 +124,47 @@ def export(project_path, output_path, format, duration):
         click.echo(f"✗ Export failed", err=True)
 
 
+@main.command()
+@click.argument('paths', nargs=-1, required=True, type=click.Path(exists=True))
+@click.option('--db', default='sqlite:///intuitive_music.db', help='Analysis cache database URL')
+@click.option('--workers', default=None, type=int, help='Analysis processes (default: all cores)')
+@click.option('--json', 'as_json', is_flag=True, help='Print one JSON object per file')
+def analyze(paths, db, workers, as_json):
+    """Analyze audio files and folders, reusing cached results"""
+    library = LibraryAnalyzer(DatabaseManager(db), workers=workers)
+    
+    analyzed = cached = failed = 0
+    for entry in library.scan(paths):
+        if entry.error:
+            failed += 1
+        elif entry.cached:
+            cached += 1
+        else:
+            analyzed += 1
+        
+        if as_json:
+            click.echo(json.dumps({
+                "path": entry.path,
+                "cached": entry.cached,
+                "error": entry.error,
+                "features": entry.features,
+            }, default=float))
+        elif entry.error:
+            click.echo(f"✗ {entry.path}: {entry.error}", err=True)
+        else:
+            features = entry.features
+            click.echo(
+                f"{entry.path}  {features['tempo']:.1f} BPM  "
+                f"{features['key']} {features['mode']}  "
+                f"{features['duration']:.2f}s"
+            )
+    
+    if not as_json:
+        click.echo(
+            f"\n✓ {analyzed} analyzed, {cached} cached, {failed} failed"
+        )
+
+
 @main.command()
 def init():
     """Initialize DAW environment"""
@@ -15,6 +15,7 @@ from .integrations import (
     detect_tempo,
     detect_key,
 )
+from .library import LibraryAnalyzer, LibraryEntry, analyze_library
 
 __all__ = [
     # Core components
@@ -26,8 +27,12 @@ __all__ = [
     "AnalysisResult",
     "PatternBuilder",
     "ScaleHelper",
+    # Library analysis
+    "LibraryAnalyzer",
+    "LibraryEntry",
     # Quick functions
     "analyze_audio",
     "detect_tempo",
     "detect_key",
+    "analyze_library",
 ]
@@ -1,12 +1,20 @@
 """Core audio engine for the DAW"""
 import threading
-from typing import List, Optional, Dict, Any
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, Dict, Any, Tuple
 import numpy as np
 import soundfile as sf
-import sounddevice as sd
 from dataclasses import dataclass, field
 from datetime import datetime
 
+try:
+    import sounddevice as sd
+except (ImportError, OSError):
+    # sounddevice missing or PortAudio not installed; offline rendering
+    # still works, only the real-time stream is unavailable
+    sd = None
+
 
 @dataclass
 class AudioConfig:
@@ -15,7 +23,67 @@ class AudioConfig:
     buffer_size: int = 512
     channels: int = 2
     bit_depth: int = 24
-    
+    dtype: str = "float64"  # mix buffer precision, "float32" halves bandwidth
+    render_threads: int = 1  # worker threads for track rendering, 1 = serial
+    render_block_size: int = 8192  # frames per block for offline rendering
+
+
+@dataclass
+class CallbackStats:
+    """Real-time callback timing and xrun statistics"""
+    callbacks: int = 0
+    input_overflows: int = 0
+    output_underflows: int = 0
+    late_callbacks: int = 0  # callbacks that took longer than the block
+    last_time: float = 0.0  # seconds
+    max_time: float = 0.0
+    total_time: float = 0.0
+
+    @property
+    def xruns(self) -> int:
+        """Total number of reported over/underruns"""
+        return self.input_overflows + self.output_underflows
+
+    @property
+    def mean_time(self) -> float:
+        """Mean callback duration in seconds"""
+        if not self.callbacks:
+            return 0.0
+        return self.total_time / self.callbacks
+
+    def record(self, elapsed: float, budget: float) -> None:
+        """Record one callback taking `elapsed` of a `budget` seconds block"""
+        self.callbacks += 1
+        self.last_time = elapsed
+        self.total_time += elapsed
+        if elapsed > self.max_time:
+            self.max_time = elapsed
+        if elapsed > budget:
+            self.late_callbacks += 1
+
+    def reset(self) -> None:
+        """Reset all counters"""
+        self.callbacks = 0
+        self.input_overflows = 0
+        self.output_underflows = 0
+        self.late_callbacks = 0
+        self.last_time = 0.0
+        self.max_time = 0.0
+        self.total_time = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary"""
+        return {
+            "callbacks": self.callbacks,
+            "xruns": self.xruns,
+            "input_overflows": self.input_overflows,
+            "output_underflows": self.output_underflows,
+            "late_callbacks": self.late_callbacks,
+            "last_time": self.last_time,
+            "mean_time": self.mean_time,
+            "max_time": self.max_time,
+        }
+
 
 class AudioEngine:
     """
@@ -32,9 +100,21 @@ class AudioEngine:
         self.master_bus = None
         self._lock = threading.Lock()
         self._stream = None
+        self.stats = CallbackStats()
+        # Preallocated render buffers, reused for every block
+        self._master_buffer = np.zeros(
+            (0, self.config.channels), dtype=self.config.dtype
+        )
+        self._render_plan: Tuple[Tuple[Any, np.ndarray], ...] = ()
+        self._allocate_buffers(self.config.buffer_size)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_workers = 0
         
     def initialize(self) -> bool:
         """Initialize the audio engine"""
+        if sd is None:
+            print("Failed to initialize audio engine: sounddevice unavailable")
+            return False
         try:
             # Query available devices
             devices = sd.query_devices()
@@ -74,12 +154,14 @@ class AudioEngine:
         """Add a track to the engine"""
         with self._lock:
             self.tracks.append(track)
+            self._rebuild_render_plan()
     
     def remove_track(self, track: Any) -> None:
         """Remove a track from the engine"""
         with self._lock:
             if track in self.tracks:
                 self.tracks.remove(track)
+                self._rebuild_render_plan()
     
     def set_position(self, position: int) -> None:
         """Set playback position in samples"""
@@ -90,84 +172,222 @@ class AudioEngine:
         """Get current playback position in samples"""
         return self.current_position
     
+    def _allocate_buffers(self, frames: int) -> None:
+        """Allocate master and per-track buffers for blocks up to `frames`"""
+        self._master_buffer = np.zeros(
+            (frames, self.config.channels), dtype=self.config.dtype
+        )
+        self._rebuild_render_plan()
+    
+    def _rebuild_render_plan(self) -> None:
+        """Pair every track with its own preallocated render buffer.
+        
+        The plan is swapped in as a single tuple so the audio callback
+        never sees a half-updated track list.
+        """
+        buffers = {id(track): buf for track, buf in self._render_plan}
+        plan = []
+        for track in self.tracks:
+            buf = buffers.get(id(track))
+            if buf is None or buf.shape != self._master_buffer.shape:
+                buf = np.zeros_like(self._master_buffer)
+            plan.append((track, buf))
+        self._render_plan = tuple(plan)
+    
     def _start_audio_stream(self) -> None:
         """Internal method to start audio stream"""
-        # This would be implemented with actual audio callback
-        pass
+        if sd is None or self._stream is not None:
+            return
+        self.stats.reset()
+        try:
+            self._stream = sd.OutputStream(
+                samplerate=self.config.sample_rate,
+                blocksize=self.config.buffer_size,
+                channels=self.config.channels,
+                dtype='float32',
+                callback=self._audio_callback,
+            )
+            self._stream.start()
+        except Exception as e:
+            print(f"Failed to start audio stream: {e}")
+            self._stream = None
     
     def _stop_audio_stream(self) -> None:
         """Internal method to stop audio stream"""
         if self._stream:
             self._stream.stop()
+            self._stream.close()
             self._stream = None
     
-    def process_audio(self, frames: int) -> np.ndarray:
+    def _audio_callback(self, outdata: np.ndarray, frames: int,
+                        time_info: Any, status: Any) -> None:
+        """sounddevice callback, renders one block straight into `outdata`"""
+        start = time.perf_counter()
+        if status:
+            if status.input_overflow:
+                self.stats.input_overflows += 1
+            if status.output_underflow:
+                self.stats.output_underflows += 1
+        
+        if self.is_playing:
+            self.process_into(outdata)
+        else:
+            outdata.fill(0.0)
+        
+        self.stats.record(
+            time.perf_counter() - start,
+            frames / self.config.sample_rate
+        )
+    
+    def process_into(self, out: np.ndarray) -> np.ndarray:
         """
-        Process audio for the given number of frames
+        Mix all tracks for the next block into a caller-owned buffer
+        
+        Uses the preallocated per-track and master buffers, so no audio
+        memory is allocated as long as the block fits in `buffer_size`.
         
         Args:
-            frames: Number of frames to process
+            out: Output buffer of shape (frames, channels), overwritten
             
         Returns:
-            Processed audio buffer
+            The `out` buffer
         """
-        buffer = np.zeros((frames, self.config.channels))
+        frames = len(out)
+        if frames > len(self._master_buffer):
+            self._allocate_buffers(frames)
         
-        # Mix all tracks
-        for track in self.tracks:
-            if hasattr(track, 'get_audio') and track.is_enabled:
-                track_audio = track.get_audio(
-                    self.current_position, 
-                    frames,
-                    self.config.sample_rate
-                )
-                if track_audio is not None:
-                    buffer += track_audio
+        master = self._master_buffer[:frames]
+        master.fill(0.0)
+        
+        # Render tracks, in parallel when enabled, then sum them in track
+        # order so the mix is identical regardless of thread scheduling
+        plan = self._render_plan
+        position = self.current_position
+        executor = self._get_executor() if len(plan) > 1 else None
+        if executor is not None:
+            futures = [
+                executor.submit(self._render_track, track, buf, position, frames)
+                for track, buf in plan
+            ]
+            rendered = [future.result() for future in futures]
+        else:
+            rendered = [
+                self._render_track(track, buf, position, frames)
+                for track, buf in plan
+            ]
+        for track_audio in rendered:
+            if track_audio is not None:
+                master += track_audio
         
         # Apply master effects
         if self.master_bus:
-            buffer = self.master_bus.process(buffer)
+            out[:] = self.master_bus.process(master)
+        else:
+            out[:] = master
         
         self.current_position += frames
-        return buffer
+        return out
+    
+    def _render_track(
+        self,
+        track: Any,
+        track_buffer: np.ndarray,
+        position: int,
+        frames: int
+    ) -> Optional[np.ndarray]:
+        """Render one track for a block, returning its audio or None"""
+        if not getattr(track, 'is_enabled', True):
+            return None
+        if hasattr(track, 'render_into'):
+            buf = track_buffer[:frames]
+            if track.render_into(buf, position, self.config.sample_rate):
+                return buf
+            return None
+        if hasattr(track, 'get_audio'):
+            return track.get_audio(position, frames, self.config.sample_rate)
+        return None
+    
+    def _get_executor(self) -> Optional[ThreadPoolExecutor]:
+        """Get the track render pool, or None for serial rendering"""
+        workers = self.config.render_threads
+        if workers <= 1:
+            return None
+        if self._executor is None or self._executor_workers != workers:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+            self._executor = ThreadPoolExecutor(
+                max_workers=workers,
+                thread_name_prefix="track-render"
+            )
+            self._executor_workers = workers
+        return self._executor
+    
+    def set_render_threads(self, workers: int) -> None:
+        """Set the number of track render threads (1 renders serially)"""
+        self.config.render_threads = max(1, int(workers))
     
-    def render(self, output_path: str, duration: float) -> bool:
+    def process_audio(self, frames: int) -> np.ndarray:
+        """
+        Process audio for the given number of frames
+        
+        Args:
+            frames: Number of frames to process
+            
+        Returns:
+            Processed audio buffer
+        """
+        buffer = np.empty((frames, self.config.channels), dtype=self.config.dtype)
+        return self.process_into(buffer)
+    
+    def render(
+        self,
+        output_path: str,
+        duration: float,
+        block_size: Optional[int] = None,
+        progress: Optional[Callable[[int, int], None]] = None
+    ) -> bool:
         """
         Render the project to an audio file
         
+        Blocks are written to the file as they are rendered, so memory use
+        does not grow with the length of the project.
+        
         Args:
             output_path: Path to output file
             duration: Duration in seconds
+            block_size: Frames per block (defaults to `render_block_size`,
+                independent of the real-time `buffer_size`)
+            progress: Optional callback receiving (rendered_frames, total_frames)
             
         Returns:
             True if successful, False otherwise
         """
         try:
             total_frames = int(duration * self.config.sample_rate)
-            frames_per_chunk = self.config.buffer_size
-            
-            audio_data = []
-            processed_frames = 0
-            
-            while processed_frames < total_frames:
-                frames_to_process = min(
-                    frames_per_chunk,
-                    total_frames - processed_frames
-                )
-                chunk = self.process_audio(frames_to_process)
-                audio_data.append(chunk)
-                processed_frames += frames_to_process
-            
-            # Concatenate all chunks
-            final_audio = np.vstack(audio_data)
+            frames_per_chunk = block_size or self.config.render_block_size
+            chunk = np.empty(
+                (frames_per_chunk, self.config.channels), dtype=self.config.dtype
+            )
             
-            # Write to file
-            sf.write(
+            with sf.SoundFile(
                 output_path,
-                final_audio,
-                self.config.sample_rate,
+                mode='w',
+                samplerate=self.config.sample_rate,
+                channels=self.config.channels,
                 subtype=f'PCM_{self.config.bit_depth}'
-            )
+            ) as output:
+                processed_frames = 0
+                while processed_frames < total_frames:
+                    frames_to_process = min(
+                        frames_per_chunk,
+                        total_frames - processed_frames
+                    )
+                    block = chunk[:frames_to_process]
+                    self.process_into(block)
+                    output.write(block)
+                    processed_frames += frames_to_process
+                    if progress:
+                        progress(processed_frames, total_frames)
             
             return True
         except Exception as e:
@@ -180,3 +400,7 @@ class AudioEngine:
         self.stop_recording()
         if self._stream:
             self._stream.close()
+            self._stream = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
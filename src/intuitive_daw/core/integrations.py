@@ -7,9 +7,14 @@ from typing import List, Dict, Optional, Any, Tuple
 from dataclasses import dataclass
 import numpy as np
 from scipy import signal
-from scipy.fftpack import fft
 import logging
 
+from ..audio.key import estimate_key
+from ..audio.spectral import (
+    chromagram, fft_frequencies, frame_signal, magnitude_spectrogram
+)
+from ..audio.tempo import estimate_tempo, onset_envelope
+
 logger = logging.getLogger(__name__)
 
 
@@ -28,7 +33,10 @@ class AnalysisResult:
     zero_crossing_rate: float = 0.0
     onsets: Optional[List[float]] = None
     beats: Optional[List[float]] = None
-    chroma: Optional[np.ndarray] = None
+    chroma: Optional[np.ndarray] = None  # Pitch class energy (12, frames)
+    # Per-frame values of the spectral features, onset strength and RMS,
+    # plus "times", the center of each frame in seconds
+    frames: Optional[Dict[str, np.ndarray]] = None
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary"""
@@ -57,9 +65,23 @@ class AudioAnalyzer:
     - Key and mode detection
     - Spectral features
     - Onset detection
+    
+    Spectral features, onsets, tempo and key come from a single STFT of
+    the whole signal, so analysis cost grows linearly with its length.
     """
     
-    def __init__(self):
+    # Bump when analysis results change, so cached results are recomputed
+    VERSION = 2
+    
+    # Features derived from the STFT
+    SPECTRAL_FEATURES = (
+        "spectral_centroid", "spectral_rolloff", "spectral_flatness",
+        "onsets", "tempo", "beats", "key"
+    )
+    
+    def __init__(self, n_fft: int = 2048, hop_length: int = 512):
+        self.n_fft = n_fft
+        self.hop_length = hop_length
         self._librosa = None
         self._aubio = None
         self._load_backends()
@@ -130,31 +152,53 @@ class AudioAnalyzer:
         if "zero_crossing_rate" in features:
             result.zero_crossing_rate = self._compute_zcr(audio_mono)
         
-        if "spectral_centroid" in features:
-            result.spectral_centroid = self._compute_spectral_centroid(
-                audio_mono, sample_rate
-            )
+        frames = self._compute_frame_features(audio_mono, features)
         
-        if "spectral_rolloff" in features:
-            result.spectral_rolloff = self._compute_spectral_rolloff(
-                audio_mono, sample_rate
+        spectrogram = None
+        if any(x in features for x in self.SPECTRAL_FEATURES):
+            spectrogram = magnitude_spectrogram(
+                audio_mono, self.n_fft, self.hop_length
+            )
+            frames.update(
+                self._compute_spectral_features(
+                    spectrogram, sample_rate, features
+                )
             )
         
-        if "spectral_flatness" in features:
-            result.spectral_flatness = self._compute_spectral_flatness(audio_mono)
+        for name in (
+            "spectral_centroid", "spectral_rolloff", "spectral_flatness"
+        ):
+            if name in features:
+                setattr(result, name, float(np.mean(frames[name])))
+        
+        if "onsets" in features or "tempo" in features or "beats" in features:
+            frames["onset_strength"] = onset_envelope(
+                audio_mono, sample_rate, self.n_fft, self.hop_length,
+                spectrogram=spectrogram
+            )
         
         if "onsets" in features:
-            result.onsets = self._detect_onsets(audio_mono, sample_rate)
+            result.onsets = self._detect_onsets(
+                frames["onset_strength"], sample_rate
+            )
         
         if "tempo" in features or "beats" in features:
-            tempo, beats = self._detect_tempo_and_beats(audio_mono, sample_rate)
+            tempo, beats = self._detect_tempo_and_beats(
+                audio_mono, sample_rate, frames["onset_strength"]
+            )
             result.tempo = tempo
             result.beats = beats
         
         if "key" in features:
-            key, mode = self._detect_key(audio_mono, sample_rate)
-            result.key = key
-            result.mode = mode
+            result.chroma = self._compute_chroma(spectrogram, sample_rate)
+            result.key, result.mode = self._detect_key(result.chroma)
+        
+        if frames:
+            n_frames = len(next(iter(frames.values())))
+            frames["times"] = (
+                np.arange(n_frames) * self.hop_length / sample_rate
+            )
+            result.frames = frames
         
         return result
     
@@ -169,236 +213,158 @@ class AudioAnalyzer:
         crossings = np.where(np.diff(signs))[0]
         return len(crossings) / len(audio)
     
-    def _compute_spectral_centroid(
+    def _compute_frame_features(
         self,
         audio: np.ndarray,
-        sample_rate: int
-    ) -> float:
-        """Compute spectral centroid (brightness)"""
-        if self._librosa:
-            centroid = self._librosa.feature.spectral_centroid(
-                y=audio, sr=sample_rate
-            )
-            return float(np.mean(centroid))
-        
-        # Fallback implementation
-        n_fft = 2048
-        hop_length = 512
-        
-        # Compute magnitude spectrum
-        spectrum = np.abs(fft(audio[:n_fft]))[:n_fft // 2]
-        freqs = np.linspace(0, sample_rate / 2, len(spectrum))
-        
-        # Compute centroid
-        magnitude_sum = np.sum(spectrum)
-        if magnitude_sum > 0:
-            centroid = np.sum(freqs * spectrum) / magnitude_sum
-        else:
-            centroid = 0.0
-        
-        return float(centroid)
+        features: List[str]
+    ) -> Dict[str, np.ndarray]:
+        """Per-frame RMS and zero crossing rate, over the STFT frames"""
+        result = {}
+        names = [
+            x for x in ("rms", "zero_crossing_rate") if x in features
+        ]
+        if not names:
+            return result
+        framed = frame_signal(audio, self.n_fft, self.hop_length)
+        values = {x: np.empty(len(framed), dtype=np.float32) for x in names}
+        # Blocks of frames keep the temporaries small for long files
+        for start in range(0, len(framed), 512):
+            block = framed[start:start + 512]
+            end = start + len(block)
+            if "rms" in values:
+                values["rms"][start:end] = np.sqrt(
+                    np.mean(np.square(block), axis=1)
+                )
+            if "zero_crossing_rate" in values:
+                signs = np.signbit(block)
+                values["zero_crossing_rate"][start:end] = np.mean(
+                    signs[:, 1:] != signs[:, :-1], axis=1
+                )
+        return values
     
-    def _compute_spectral_rolloff(
+    def _compute_spectral_features(
         self,
-        audio: np.ndarray,
+        spectrogram: np.ndarray,
         sample_rate: int,
+        features: List[str],
         rolloff_percent: float = 0.85
-    ) -> float:
-        """Compute spectral rolloff frequency"""
-        if self._librosa:
-            rolloff = self._librosa.feature.spectral_rolloff(
-                y=audio, sr=sample_rate, roll_percent=rolloff_percent
-            )
-            return float(np.mean(rolloff))
+    ) -> Dict[str, np.ndarray]:
+        """
+        Per-frame spectral centroid, rolloff and flatness
         
-        # Fallback implementation
-        n_fft = 2048
-        spectrum = np.abs(fft(audio[:n_fft]))[:n_fft // 2]
-        freqs = np.linspace(0, sample_rate / 2, len(spectrum))
+        Args:
+            spectrogram: Magnitude STFT (frames, bins)
+            sample_rate: Sample rate in Hz
+            features: Requested feature names
+            rolloff_percent: Energy fraction below the rolloff frequency
+        
+        Returns:
+            {feature name: float32 array (frames,)}
+        """
+        result = {}
+        freqs = fft_frequencies(self.n_fft, sample_rate)
+        totals = spectrogram.sum(axis=1)
+        silent = totals <= 0
+        safe_totals = np.where(silent, 1.0, totals)
         
-        total_energy = np.sum(spectrum)
-        if total_energy == 0:
-            return 0.0
+        if "spectral_centroid" in features:
+            centroid = (spectrogram @ freqs) / safe_totals
+            centroid[silent] = 0.0
+            result["spectral_centroid"] = centroid.astype(np.float32)
         
-        cumsum = np.cumsum(spectrum)
-        threshold = rolloff_percent * total_energy
-        rolloff_idx = np.searchsorted(cumsum, threshold)
+        if "spectral_rolloff" in features:
+            cumulative = np.cumsum(spectrogram, axis=1)
+            index = np.argmax(
+                cumulative >= (rolloff_percent * totals)[:, np.newaxis],
+                axis=1
+            )
+            rolloff = freqs[index]
+            rolloff[silent] = 0.0
+            result["spectral_rolloff"] = rolloff.astype(np.float32)
         
-        if rolloff_idx < len(freqs):
-            return float(freqs[rolloff_idx])
-        return float(sample_rate / 2)
-    
-    def _compute_spectral_flatness(self, audio: np.ndarray) -> float:
-        """Compute spectral flatness (noisiness)"""
-        if self._librosa:
-            flatness = self._librosa.feature.spectral_flatness(y=audio)
-            return float(np.mean(flatness))
-        
-        # Fallback implementation
-        n_fft = 2048
-        spectrum = np.abs(fft(audio[:n_fft]))[:n_fft // 2]
-        spectrum = spectrum + 1e-10  # Avoid log(0)
-        
-        geometric_mean = np.exp(np.mean(np.log(spectrum)))
-        arithmetic_mean = np.mean(spectrum)
-        
-        if arithmetic_mean > 0:
-            return float(geometric_mean / arithmetic_mean)
-        return 0.0
+        if "spectral_flatness" in features:
+            # Geometric over arithmetic mean of the power spectrum
+            power = np.maximum(np.square(spectrogram), 1e-10)
+            flatness = (
+                np.exp(np.mean(np.log(power), axis=1))
+                / np.mean(power, axis=1)
+            )
+            result["spectral_flatness"] = flatness.astype(np.float32)
+        
+        return result
     
     def _detect_onsets(
         self,
-        audio: np.ndarray,
+        onset_strength: np.ndarray,
         sample_rate: int
     ) -> List[float]:
-        """Detect note onsets"""
-        if self._librosa:
-            onset_frames = self._librosa.onset.onset_detect(
-                y=audio, sr=sample_rate
-            )
-            onset_times = self._librosa.frames_to_time(onset_frames, sr=sample_rate)
-            return onset_times.tolist()
-        
-        # Fallback using energy-based detection
-        hop_length = 512
-        n_frames = len(audio) // hop_length
-        
-        energy = np.array([
-            np.sum(audio[i * hop_length:(i + 1) * hop_length] ** 2)
-            for i in range(n_frames)
-        ])
-        
-        # Compute onset envelope (difference of energy)
-        onset_env = np.diff(energy)
-        onset_env = np.maximum(0, onset_env)  # Half-wave rectifier
-        
-        # Peak picking
-        peaks, _ = signal.find_peaks(onset_env, height=np.mean(onset_env) * 2)
-        
-        # Convert to time
-        onset_times = peaks * hop_length / sample_rate
+        """Pick note onsets from the spectral flux onset strength"""
+        peak = np.max(onset_strength) if len(onset_strength) else 0.0
+        if peak <= 0:
+            return []
+        
+        # Peaks above a tenth of the strongest, at least 30 ms apart
+        peaks, _ = signal.find_peaks(
+            onset_strength,
+            height=0.1 * peak,
+            distance=max(int(0.03 * sample_rate / self.hop_length), 1)
+        )
+        
+        onset_times = peaks * self.hop_length / sample_rate
         return onset_times.tolist()
     
     def _detect_tempo_and_beats(
         self,
         audio: np.ndarray,
-        sample_rate: int
+        sample_rate: int,
+        onset_strength: Optional[np.ndarray] = None
     ) -> Tuple[float, List[float]]:
         """Detect tempo and beat positions"""
-        if self._librosa:
-            tempo, beat_frames = self._librosa.beat.beat_track(
-                y=audio, sr=sample_rate
-            )
-            beat_times = self._librosa.frames_to_time(beat_frames, sr=sample_rate)
-            return float(tempo), beat_times.tolist()
-        
-        # Fallback implementation using autocorrelation
-        hop_length = 512
-        
-        # Compute onset envelope
-        n_frames = len(audio) // hop_length
-        onset_env = np.array([
-            np.sum(np.abs(audio[i * hop_length:(i + 1) * hop_length]))
-            for i in range(n_frames)
-        ])
-        
-        # Autocorrelation
-        autocorr = np.correlate(onset_env, onset_env, mode='full')
-        autocorr = autocorr[len(autocorr) // 2:]
-        
-        # Find peaks in autocorrelation
-        min_lag = int(60 / 200 * sample_rate / hop_length)  # 200 BPM max
-        max_lag = int(60 / 60 * sample_rate / hop_length)   # 60 BPM min
-        
-        peaks, _ = signal.find_peaks(autocorr[min_lag:max_lag])
-        
-        if len(peaks) > 0:
-            # Find strongest peak
-            peak_idx = peaks[np.argmax(autocorr[min_lag:max_lag][peaks])]
-            period_frames = min_lag + peak_idx
-            tempo = 60 * sample_rate / hop_length / period_frames
-        else:
-            tempo = 120.0  # Default tempo
-        
-        # Generate beat times
+        # The shared tempo engine is used with or without librosa, it is
+        # fast enough to run on every file of a sample library
+        estimate = estimate_tempo(
+            audio, sample_rate,
+            hop_length=self.hop_length, n_fft=self.n_fft,
+            envelope=onset_strength
+        )
+        tempo = estimate.tempo
+        if len(estimate.beats):
+            return float(tempo), estimate.beats.tolist()
+        
+        # No onsets to track, generate beats on the tempo grid
         beat_period = 60.0 / tempo
         duration = len(audio) / sample_rate
         beats = np.arange(0, duration, beat_period).tolist()
         
         return float(tempo), beats
     
-    def _detect_key(
+    def _compute_chroma(
         self,
-        audio: np.ndarray,
-        sample_rate: int
-    ) -> Tuple[str, str]:
-        """Detect musical key and mode"""
-        if self._librosa:
-            chroma = self._librosa.feature.chroma_cqt(y=audio, sr=sample_rate)
-            chroma_mean = np.mean(chroma, axis=1)
-        else:
-            # Simple FFT-based chroma
-            chroma_mean = self._compute_simple_chroma(audio, sample_rate)
-        
-        # Key profiles (Krumhansl-Kessler)
-        major_profile = np.array([6.35, 2.23, 3.48, 2.33, 4.38, 4.09, 
-                                  2.52, 5.19, 2.39, 3.66, 2.29, 2.88])
-        minor_profile = np.array([6.33, 2.68, 3.52, 5.38, 2.60, 3.53, 
-                                  2.54, 4.75, 3.98, 2.69, 3.34, 3.17])
-        
-        note_names = ['C', 'C#', 'D', 'D#', 'E', 'F', 
-                      'F#', 'G', 'G#', 'A', 'A#', 'B']
-        
-        best_corr = -1
-        best_key = 'C'
-        best_mode = 'major'
-        
-        # Try all keys and modes
-        for i in range(12):
-            # Rotate chroma to start from this key
-            rotated = np.roll(chroma_mean, -i)
-            
-            # Correlate with profiles
-            major_corr = np.corrcoef(rotated, major_profile)[0, 1]
-            minor_corr = np.corrcoef(rotated, minor_profile)[0, 1]
-            
-            if major_corr > best_corr:
-                best_corr = major_corr
-                best_key = note_names[i]
-                best_mode = 'major'
-            
-            if minor_corr > best_corr:
-                best_corr = minor_corr
-                best_key = note_names[i]
-                best_mode = 'minor'
-        
-        return best_key, best_mode
-    
-    def _compute_simple_chroma(
-        self,
-        audio: np.ndarray,
+        spectrogram: np.ndarray,
         sample_rate: int
     ) -> np.ndarray:
-        """Simple FFT-based chroma computation"""
-        n_fft = 4096
-        spectrum = np.abs(fft(audio[:n_fft]))[:n_fft // 2]
-        freqs = np.linspace(0, sample_rate / 2, len(spectrum))
-        
-        # Map frequencies to pitch classes
-        chroma = np.zeros(12)
-        for i, (freq, mag) in enumerate(zip(freqs, spectrum)):
-            if freq > 0:
-                # Convert frequency to MIDI note
-                midi_note = 12 * np.log2(freq / 440) + 69
-                pitch_class = int(midi_note) % 12
-                if 0 <= pitch_class < 12:
-                    chroma[pitch_class] += mag
+        """
+        Pitch class energy of every STFT frame
         
-        # Normalize
-        if np.max(chroma) > 0:
-            chroma = chroma / np.max(chroma)
+        Args:
+            spectrogram: Magnitude STFT (frames, bins)
+            sample_rate: Sample rate in Hz
         
+        Returns:
+            float32 array (12, frames), normalized so the loudest pitch
+            class of the whole signal is 1.0
+        """
+        chroma = chromagram(spectrogram, sample_rate, self.n_fft)
+        peak = chroma.max() if chroma.size else 0.0
+        if peak > 0:
+            chroma /= peak
         return chroma
+    
+    def _detect_key(self, chroma: np.ndarray) -> Tuple[str, str]:
+        """Detect musical key and mode from a (12, frames) chromagram"""
+        if not chroma.shape[1]:
+            return "C", "major"
+        return estimate_key(chroma.mean(axis=1))
 
 
 class PatternBuilder:
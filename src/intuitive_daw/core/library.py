@@ -0,0 +1,265 @@
+"""Batch analysis of sample libraries
+
+Files are analyzed in a process pool and their features are cached in
+the DAW database, keyed by path, size, modification time and analyzer
+version, so re-scanning a library only analyzes new or changed files.
+"""
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+import json
+import logging
+import os
+import numpy as np
+
+from .integrations import AudioAnalyzer
+from ..db.models import DatabaseManager
+
+logger = logging.getLogger(__name__)
+
+AUDIO_EXTENSIONS = ('.wav', '.flac', '.aif', '.aiff', '.ogg', '.mp3')
+
+
+@dataclass
+class LibraryEntry:
+    """Analysis of one file in a library scan"""
+    path: str
+    features: Optional[Dict[str, Any]] = None  # AnalysisResult.to_dict()
+    error: Optional[str] = None
+    cached: bool = False  # Came from the cache instead of being analyzed
+
+
+def find_audio_files(
+    paths: Iterable[str],
+    extensions: Tuple[str, ...] = AUDIO_EXTENSIONS
+) -> List[str]:
+    """
+    Audio files among paths, searching directories recursively
+
+    Returns:
+        Sorted, de-duplicated absolute paths
+    """
+    found = set()
+    for path in paths:
+        path = os.path.abspath(path)
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                found.update(
+                    os.path.join(root, name) for name in names
+                    if name.lower().endswith(extensions)
+                )
+        elif os.path.isfile(path):
+            found.add(path)
+    return sorted(found)
+
+
+def load_audio_file(path: str) -> Tuple[np.ndarray, int]:
+    """
+    Read an audio file at its own sample rate
+
+    Uses soundfile, and librosa for formats soundfile cannot read.
+
+    Returns:
+        (float32 audio (samples,) or (samples, channels), sample rate)
+    """
+    import soundfile as sf
+    try:
+        return sf.read(path, dtype='float32')
+    except Exception as error:
+        # Report soundfile's error if librosa cannot read the file either
+        try:
+            import librosa
+            audio, sample_rate = librosa.load(path, sr=None, mono=False)
+        except Exception:
+            raise error
+        return audio.T, sample_rate
+
+
+# The analyzer of this worker process, created once by _init_worker
+_worker_analyzer: Optional[AudioAnalyzer] = None
+
+
+def _init_worker(n_fft: int, hop_length: int) -> None:
+    global _worker_analyzer
+    _worker_analyzer = AudioAnalyzer(n_fft=n_fft, hop_length=hop_length)
+
+
+def _analyze_file(
+    path: str,
+    features: Optional[List[str]]
+) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """Analyze one file in a worker, returning (features, error)"""
+    try:
+        audio, sample_rate = load_audio_file(path)
+        result = _worker_analyzer.analyze(audio, sample_rate, features)
+        # Plain Python values, the same as results read back from the cache
+        return {
+            name: value.item() if isinstance(value, np.generic) else value
+            for name, value in result.to_dict().items()
+        }, None
+    except Exception as e:
+        return None, f"{type(e).__name__}: {e}"
+
+
+class LibraryAnalyzer:
+    """
+    Analyze folders of audio files with a persistent feature cache.
+
+    Example:
+        library = LibraryAnalyzer(DatabaseManager('sqlite:///library.db'))
+        for entry in library.scan(['~/Samples']):
+            print(entry.path, entry.features['tempo'])
+    """
+
+    def __init__(
+        self,
+        database: Optional[DatabaseManager] = None,
+        workers: Optional[int] = None,
+        features: Optional[List[str]] = None,
+        n_fft: int = 2048,
+        hop_length: int = 512,
+        batch_size: int = 100
+    ):
+        """
+        Args:
+            database: Cache database, a default DatabaseManager if None
+            workers: Analysis processes, os.cpu_count() if None.  1
+                analyzes in this process
+            features: Features to compute (None = all)
+            n_fft: FFT size of the analyzer
+            hop_length: Hop size of the analyzer
+            batch_size: Results written to the cache per transaction
+        """
+        self.database = database or DatabaseManager()
+        self.database.init_db()
+        self.workers = workers or os.cpu_count() or 1
+        self.features = sorted(features) if features else None
+        self.n_fft = n_fft
+        self.hop_length = hop_length
+        self.batch_size = batch_size
+
+    @property
+    def version(self) -> str:
+        """Cache key of the analyzer version and settings"""
+        features = ",".join(self.features) if self.features else "all"
+        return (
+            f"{AudioAnalyzer.VERSION}:{self.n_fft}:{self.hop_length}:"
+            f"{features}"
+        )
+
+    def scan(self, paths: Iterable[str]) -> Iterator[LibraryEntry]:
+        """
+        Analyze audio files and directories, yielding results as they are
+        ready
+
+        Cached results of unchanged files come first, then new and changed
+        files in the order they finish.  Results are saved to the cache
+        as they arrive, so an interrupted scan keeps its progress.
+
+        Errors are not cached, files that failed are analyzed again by the
+        next scan: loading also fails when the optional librosa is needed
+        for a format, which says nothing about the file.
+        """
+        files = find_audio_files(paths)
+        cached = self.database.get_cached_analyses(files)
+        version = self.version
+
+        stale = []
+        for path in files:
+            try:
+                stat = os.stat(path)
+            except OSError as e:
+                yield LibraryEntry(path, error=str(e))
+                continue
+            row = cached.get(path)
+            if (
+                row is not None
+                and row.error is None
+                and row.size == stat.st_size
+                and row.mtime == stat.st_mtime
+                and row.analyzer_version == version
+            ):
+                yield LibraryEntry(
+                    path,
+                    features=json.loads(row.features),
+                    cached=True,
+                )
+            else:
+                stale.append((path, stat))
+
+        if not stale:
+            return
+        logger.info(
+            "Analyzing %d of %d files with %d workers",
+            len(stale), len(files), self.workers
+        )
+
+        records = []
+        try:
+            for (path, stat), (features, error) in self._analyze(stale):
+                if error is not None:
+                    yield LibraryEntry(path, error=error)
+                    continue
+                records.append({
+                    'path': path,
+                    'size': stat.st_size,
+                    'mtime': stat.st_mtime,
+                    'analyzer_version': version,
+                    'features': json.dumps(features),
+                    'error': None,
+                })
+                if len(records) >= self.batch_size:
+                    self.database.save_analyses(records)
+                    records = []
+                yield LibraryEntry(path, features=features)
+        finally:
+            if records:
+                self.database.save_analyses(records)
+
+    def _analyze(
+        self,
+        items: List[Tuple[str, os.stat_result]]
+    ) -> Iterator[Tuple[Tuple[str, os.stat_result], Tuple]]:
+        """Analyze (path, stat) items, yielding (item, result) pairs"""
+        if self.workers <= 1 or len(items) == 1:
+            _init_worker(self.n_fft, self.hop_length)
+            for item in items:
+                yield item, _analyze_file(item[0], self.features)
+            return
+
+        # Keep a few files queued per worker rather than submitting the
+        # whole library up front
+        max_pending = self.workers * 4
+        todo = iter(items)
+        pending = {}
+        with ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_worker,
+            initargs=(self.n_fft, self.hop_length),
+        ) as executor:
+            try:
+                while True:
+                    for item in todo:
+                        future = executor.submit(
+                            _analyze_file, item[0], self.features
+                        )
+                        pending[future] = item
+                        if len(pending) >= max_pending:
+                            break
+                    if not pending:
+                        break
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield pending.pop(future), future.result()
+            finally:
+                for future in pending:
+                    future.cancel()
+
+
+def analyze_library(
+    paths: Iterable[str],
+    database_url: str = 'sqlite:///intuitive_music.db',
+    workers: Optional[int] = None
+) -> Iterator[LibraryEntry]:
+    """Quick cached analysis of audio files and directories"""
+    return LibraryAnalyzer(DatabaseManager(database_url), workers).scan(paths)
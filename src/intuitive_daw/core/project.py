@@ -38,6 +38,7 @@ class Project:
     def add_track(self, track: Any) -> None:
         """Add a track to the project"""
         self.tracks.append(track)
+        self._sync_track_tempo(track)
         self.is_modified = True
         self.metadata.modified_at = datetime.now()
     
@@ -66,9 +67,17 @@ class Project:
     def set_tempo(self, tempo: float) -> None:
         """Set project tempo"""
         self.metadata.tempo = tempo
+        for track in self.tracks:
+            self._sync_track_tempo(track)
         self.is_modified = True
         self.metadata.modified_at = datetime.now()
     
+    def _sync_track_tempo(self, track: Any) -> None:
+        """Pass the project tempo to tempo-aware effects on a track"""
+        for effect in getattr(track, 'effects', []):
+            if hasattr(effect, 'set_tempo'):
+                effect.set_tempo(self.metadata.tempo)
+    
     def set_time_signature(self, numerator: int, denominator: int) -> None:
         """Set project time signature"""
         self.metadata.time_signature = (numerator, denominator)
@@ -1,5 +1,5 @@
 """Track management for the DAW"""
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Union
 from dataclasses import dataclass, field
 from enum import Enum
 import numpy as np
@@ -25,6 +25,70 @@ class TrackSettings:
     monitoring: bool = False
 
 
+class AutomationLane:
+    """
+    Automation points for one parameter compiled into sorted arrays
+    
+    Values are linearly interpolated between points and held constant
+    before the first and after the last point.
+    """
+    
+    def __init__(self, points: List[tuple]):
+        self.source = points
+        self.source_len = len(points)
+        if points:
+            data = np.asarray(points, dtype=np.float64)
+            order = np.argsort(data[:, 0], kind='stable')
+            self.times = data[order, 0]
+            self.values = data[order, 1]
+        else:
+            self.times = np.empty(0)
+            self.values = np.empty(0)
+    
+    def is_stale(self, points: List[tuple]) -> bool:
+        """
+        Whether the lane no longer reflects the given point list
+
+        Only a replaced list or a changed number of points is detected,
+        changing a point in place needs Track.invalidate_automation()
+        """
+        return points is not self.source or len(points) != self.source_len
+    
+    def value_at(self, time: float) -> Optional[float]:
+        """Get the interpolated value at a time in seconds"""
+        if not len(self.times):
+            return None
+        return float(np.interp(time, self.times, self.values))
+    
+    def render(
+        self,
+        start_time: float,
+        frames: int,
+        sample_rate: int
+    ) -> Union[float, np.ndarray]:
+        """
+        Evaluate the lane for a block of samples
+        
+        Args:
+            start_time: Time of the first sample in seconds
+            frames: Number of samples
+            sample_rate: Sample rate
+            
+        Returns:
+            A float if the value is constant over the block, otherwise
+            an array with one value per sample
+        """
+        end_time = start_time + (frames - 1) / sample_rate
+        first = np.searchsorted(self.times, start_time, side='right')
+        last = np.searchsorted(self.times, end_time, side='left')
+        if first == last and (first == 0 or first == len(self.times)):
+            # Block lies entirely before the first or after the last point
+            return float(self.values[min(first, len(self.values) - 1)])
+        
+        times = start_time + np.arange(frames) / sample_rate
+        return np.interp(times, self.times, self.values)
+
+
 class Track:
     """
     Base track class for audio and MIDI tracks
@@ -41,8 +105,12 @@ class Track:
         self.index = index
         self.settings = TrackSettings()
         self.clips: List[Any] = []
+        self._clip_index: Optional[tuple] = None
+        self._clip_cursor = (0.0, 0)
         self.effects: List[Any] = []
+        # Call invalidate_automation() after editing these lists in place
         self.automation: Dict[str, List[tuple]] = {}
+        self._automation_lanes: Dict[str, AutomationLane] = {}
         self.color: str = "#3498db"
         self.is_enabled = True
         
@@ -51,11 +119,83 @@ class Track:
         self.clips.append(clip)
         # Sort clips by position
         self.clips.sort(key=lambda c: getattr(c, 'position', 0))
+        self._clip_index = None
     
     def remove_clip(self, clip: Any) -> None:
         """Remove a clip from the track"""
         if clip in self.clips:
             self.clips.remove(clip)
+            self._clip_index = None
+    
+    def move_clip(self, clip: Any, position: float) -> None:
+        """Move a clip to a new position in seconds"""
+        clip.position = position
+        self.clips.sort(key=lambda c: getattr(c, 'position', 0))
+        self._clip_index = None
+    
+    def invalidate_clip_index(self) -> None:
+        """Rebuild the clip index on next use (after editing clips in place)"""
+        self._clip_index = None
+    
+    def _build_clip_index(self) -> tuple:
+        """
+        Build sorted start/end arrays for the clips
+        
+        Clips are kept sorted by start, and the running maximum of their
+        end times is monotonic, so both bounds of a time window can be
+        found by binary search. Clips without timing information are
+        treated as always active.
+        """
+        count = len(self.clips)
+        starts = np.empty(count)
+        ends = np.empty(count)
+        for i, clip in enumerate(self.clips):
+            if hasattr(clip, 'position') and hasattr(clip, 'get_end_time'):
+                starts[i] = clip.position
+                ends[i] = clip.get_end_time()
+            else:
+                starts[i] = -np.inf
+                ends[i] = np.inf
+        order = np.argsort(starts, kind='stable')
+        clips = [self.clips[i] for i in order]
+        starts = starts[order]
+        ends = ends[order]
+        max_ends = np.maximum.accumulate(ends) if count else ends
+        
+        self._clip_index = (clips, starts, ends, max_ends, count)
+        self._clip_cursor = (-np.inf, 0)
+        return self._clip_index
+    
+    def get_clips_in_range(self, start_time: float, end_time: float) -> List[Any]:
+        """
+        Get clips overlapping the window [start_time, end_time)
+        
+        Args:
+            start_time: Window start in seconds
+            end_time: Window end in seconds
+            
+        Returns:
+            Overlapping clips in start order
+        """
+        index = self._clip_index
+        if index is None or index[4] != len(self.clips):
+            index = self._build_clip_index()
+        clips, starts, ends, max_ends, _ = index
+        
+        # Every clip before `first` has ended by start_time. Playback
+        # usually moves forward, so continue from the previous block.
+        last_time, first = self._clip_cursor
+        if start_time >= last_time:
+            first += int(np.searchsorted(max_ends[first:], start_time, side='right'))
+        else:
+            first = int(np.searchsorted(max_ends, start_time, side='right'))
+        self._clip_cursor = (start_time, first)
+        
+        last = int(np.searchsorted(starts, end_time, side='left'))
+        if first >= last:
+            return []
+        active = np.nonzero(ends[first:last] > start_time)[0]
+        return [clips[first + i] for i in active]
     
     def add_effect(self, effect: Any, position: Optional[int] = None) -> None:
         """Add an effect to the track's effect chain"""
@@ -102,33 +242,108 @@ class Track:
         Returns:
             Audio buffer or None
         """
-        if self.settings.mute or not self.is_enabled:
+        buffer = np.empty((frames, 2))
+        if not self.render_into(buffer, position, sample_rate):
             return None
+        return buffer
+    
+    def render_into(
+        self,
+        out: np.ndarray,
+        position: int,
+        sample_rate: int
+    ) -> bool:
+        """
+        Render this track in place into a caller-owned buffer
         
-        # Initialize buffer
-        buffer = np.zeros((frames, 2))
+        Same contract as `get_audio`, but the block is written into `out`
+        (shape (frames, 2)) instead of a newly allocated array.
         
-        # Get audio from active clips
-        for clip in self.clips:
-            if hasattr(clip, 'get_audio'):
+        Args:
+            out: Output buffer, overwritten
+            position: Starting position in samples
+            sample_rate: Sample rate
+            
+        Returns:
+            True if audio was rendered, False if the track is silent
+        """
+        if self.settings.mute or not self.is_enabled:
+            return False
+        
+        frames = len(out)
+        start_time = position / sample_rate
+        out.fill(0.0)
+        
+        # Get audio from clips overlapping this block
+        window = self.get_clips_in_range(
+            start_time, (position + frames) / sample_rate
+        )
+        for clip in window:
+            if hasattr(clip, 'accumulate_into'):
+                clip.accumulate_into(
+                    out, position, frames, getattr(clip, 'gain', 1.0), sample_rate
+                )
+            elif hasattr(clip, 'get_audio'):
                 clip_audio = clip.get_audio(position, frames, sample_rate)
                 if clip_audio is not None:
-                    buffer += clip_audio
+                    out += clip_audio
+        
+        # Effect parameter automation is applied once per block
+        if self.automation:
+            self._apply_effect_automation(start_time)
         
         # Apply effects chain
         for effect in self.effects:
             if hasattr(effect, 'process') and getattr(effect, 'is_enabled', True):
-                buffer = effect.process(buffer)
+                out[:] = effect.process(out)
         
-        # Apply volume
-        volume_linear = self._db_to_linear(self.settings.volume)
-        buffer *= volume_linear
+        # Apply volume (sample accurate when automated)
+        volume = self._render_parameter(
+            'volume', self.settings.volume, start_time, frames, sample_rate
+        )
+        if np.ndim(volume):
+            out *= self._db_to_linear(volume)[:, np.newaxis]
+        else:
+            out *= self._db_to_linear(volume)
         
-        # Apply pan
-        if self.settings.pan != 0.0:
-            buffer = self._apply_pan(buffer, self.settings.pan)
+        # Apply pan (sample accurate when automated)
+        pan = self._render_parameter(
+            'pan', self.settings.pan, start_time, frames, sample_rate
+        )
+        if np.ndim(pan):
+            out[:, 0] *= np.where(pan > 0, 1.0 - pan, 1.0)
+            out[:, 1] *= np.where(pan < 0, 1.0 + pan, 1.0)
+        elif pan != 0.0:
+            self._apply_pan_inplace(out, pan)
         
-        return buffer
+        return True
+    
+    def _render_parameter(
+        self,
+        parameter: str,
+        default: float,
+        start_time: float,
+        frames: int,
+        sample_rate: int
+    ) -> Union[float, np.ndarray]:
+        """Evaluate an automated parameter for a block, or its static value"""
+        lane = self._get_automation_lane(parameter)
+        if lane is None or not len(lane.times):
+            return default
+        return lane.render(start_time, frames, sample_rate)
+    
+    def _apply_effect_automation(self, time: float) -> None:
+        """Set automated effect parameters ('<effect name>.<attribute>')"""
+        for parameter in self.automation:
+            effect_name, _, attribute = parameter.partition('.')
+            if not attribute:
+                continue
+            value = self.get_automation_value(parameter, time)
+            if value is None:
+                continue
+            for effect in self.effects:
+                if getattr(effect, 'name', None) == effect_name:
+                    setattr(effect, attribute, value)
     
     def get_duration(self) -> float:
         """Get track duration in seconds"""
@@ -153,6 +368,37 @@ class Track:
             points: List of (time, value) tuples
         """
         self.automation[parameter] = sorted(points, key=lambda x: x[0])
+        self._automation_lanes[parameter] = AutomationLane(
+            self.automation[parameter]
+        )
+    
+    def remove_automation(self, parameter: str) -> None:
+        """Remove automation for a parameter"""
+        self.automation.pop(parameter, None)
+        self._automation_lanes.pop(parameter, None)
+    
+    def invalidate_automation(self, parameter: Optional[str] = None) -> None:
+        """
+        Recompile automation on next use (after editing points in place)
+
+        Args:
+            parameter: Parameter whose points changed, or None for all
+        """
+        if parameter is None:
+            self._automation_lanes.clear()
+        else:
+            self._automation_lanes.pop(parameter, None)
+    
+    def _get_automation_lane(self, parameter: str) -> Optional[AutomationLane]:
+        """Get the compiled lane for a parameter, recompiling if stale"""
+        points = self.automation.get(parameter)
+        if points is None:
+            return None
+        lane = self._automation_lanes.get(parameter)
+        if lane is None or lane.is_stale(points):
+            lane = AutomationLane(points)
+            self._automation_lanes[parameter] = lane
+        return lane
     
     def get_automation_value(
         self, 
@@ -160,26 +406,10 @@ class Track:
         time: float
     ) -> Optional[float]:
         """Get interpolated automation value at given time"""
-        if parameter not in self.automation:
-            return None
-        
-        points = self.automation[parameter]
-        if not points:
+        lane = self._get_automation_lane(parameter)
+        if lane is None:
             return None
-        
-        # Find surrounding points
-        for i in range(len(points) - 1):
-            if points[i][0] <= time <= points[i + 1][0]:
-                # Linear interpolation
-                t1, v1 = points[i]
-                t2, v2 = points[i + 1]
-                ratio = (time - t1) / (t2 - t1)
-                return v1 + (v2 - v1) * ratio
-        
-        # Return first or last value if outside range
-        if time < points[0][0]:
-            return points[0][1]
-        return points[-1][1]
+        return lane.value_at(time)
     
     @staticmethod
     def _db_to_linear(db: float) -> float:
@@ -190,11 +420,16 @@ class Track:
     def _apply_pan(buffer: np.ndarray, pan: float) -> np.ndarray:
         """Apply pan to stereo buffer"""
         result = buffer.copy()
+        Track._apply_pan_inplace(result, pan)
+        return result
+    
+    @staticmethod
+    def _apply_pan_inplace(buffer: np.ndarray, pan: float) -> None:
+        """Apply pan to stereo buffer in place"""
         if pan < 0:  # Pan left
-            result[:, 1] *= (1.0 + pan)
+            buffer[:, 1] *= (1.0 + pan)
         elif pan > 0:  # Pan right
-            result[:, 0] *= (1.0 - pan)
-        return result
+            buffer[:, 0] *= (1.0 - pan)
 
 
 class AudioTrack(Track):
@@ -3,6 +3,7 @@ from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime,
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
 from datetime import datetime
+from typing import Any, Dict, List
 
 Base = declarative_base()
 
@@ -72,9 +73,26 @@ class PresetModel(Base):
     tags = Column(Text)  # Comma-separated tags
 
 
+class AnalysisCacheModel(Base):
+    """Database model for cached audio file analysis"""
+    __tablename__ = 'analysis_cache'
+    
+    id = Column(Integer, primary_key=True)
+    path = Column(String(1024), nullable=False, unique=True)
+    size = Column(Integer, nullable=False)
+    mtime = Column(Float, nullable=False)
+    analyzer_version = Column(String(255), nullable=False)
+    features = Column(Text)  # JSON string
+    error = Column(Text)  # Only in older caches, such rows are re-analyzed
+    analyzed_at = Column(DateTime, default=datetime.now)
+
+
 class DatabaseManager:
     """Manage database connections and operations"""
     
+    # Paths per IN (...) query, below SQLite's variable limit
+    QUERY_CHUNK_SIZE = 500
+    
     def __init__(self, database_url: str = 'sqlite:///intuitive_music.db'):
         self.engine = create_engine(database_url)
         self.Session = sessionmaker(bind=self.engine)
@@ -142,3 +160,60 @@ class DatabaseManager:
             return session.query(ProjectModel).all()
         finally:
             session.close()
+    
+    def _query_analyses(
+        self,
+        session,
+        paths: List[str]
+    ) -> Dict[str, AnalysisCacheModel]:
+        """Analysis rows of paths, querying a chunk of paths at a time"""
+        rows = {}
+        for start in range(0, len(paths), self.QUERY_CHUNK_SIZE):
+            chunk = paths[start:start + self.QUERY_CHUNK_SIZE]
+            for row in session.query(AnalysisCacheModel).filter(
+                AnalysisCacheModel.path.in_(chunk)
+            ):
+                rows[row.path] = row
+        return rows
+    
+    def get_cached_analyses(
+        self,
+        paths: List[str]
+    ) -> Dict[str, AnalysisCacheModel]:
+        """Cached analysis rows of the given file paths, by path"""
+        session = self.get_session()
+        try:
+            return self._query_analyses(session, paths)
+        finally:
+            session.close()
+    
+    def save_analyses(self, records: List[Dict[str, Any]]) -> bool:
+        """
+        Insert or replace cached analyses in one transaction
+        
+        Args:
+            records: AnalysisCacheModel column values, one dict per file
+        """
+        session = self.get_session()
+        try:
+            existing = self._query_analyses(
+                session, [record['path'] for record in records]
+            )
+            
+            for record in records:
+                row = existing.get(record['path'])
+                if row is None:
+                    session.add(AnalysisCacheModel(**record))
+                else:
+                    for name, value in record.items():
+                        setattr(row, name, value)
+                    row.analyzed_at = datetime.now()
+            
+            session.commit()
+            return True
+        except Exception as e:
+            print(f"Failed to save analyses to database: {e}")
+            session.rollback()
+            return False
+        finally:
+            session.close()
@@ -189,32 +189,24 @@ class ImageToSound:
         self.config = config or ImageToSoundConfig()
         self.chroma = ChromaSynesthesia()
     
-    def load_image(self, path: Union[str, Path]) -> Optional[List[List[Tuple[int, int, int]]]]:
+    def load_image(self, path: Union[str, Path]) -> Optional["np.ndarray"]:
         """
-        Load and resize image, return as 2D array of RGB tuples.
+        Load and resize image, return as an RGB pixel array.
         
         Args:
             path: Path to image file
         
         Returns:
-            2D list of (R, G, B) tuples, or None if loading failed
+            uint8 array (height, width, 3), or None if loading failed
         """
-        if not HAS_PIL:
-            logger.error("PIL required for image loading")
+        if not HAS_PIL or not HAS_NUMPY:
+            logger.error("PIL and NumPy required for image loading")
             return None
         
         try:
             img = Image.open(path).convert('RGB')
             img = img.resize((self.config.width, self.config.height))
-            
-            pixels = []
-            for y in range(self.config.height):
-                row = []
-                for x in range(self.config.width):
-                    row.append(img.getpixel((x, y)))
-                pixels.append(row)
-            
-            return pixels
+            return np.asarray(img, dtype=np.uint8)
         except Exception as e:
             logger.error(f"Failed to load image: {e}")
             return None
@@ -223,64 +215,72 @@ class ImageToSound:
         """
         Analyze image and return synthesis parameters.
         
+        See analyze_pixels() for the result.
+        """
+        pixels = self.load_image(path)
+        if pixels is None:
+            return {}
+        return self.analyze_pixels(pixels)
+    
+    def analyze_pixels(self, pixels: "np.ndarray") -> Dict:
+        """
+        Analyze an RGB pixel array and return synthesis parameters.
+        
+        Args:
+            pixels: uint8 array (height, width, 3), row 0 is the top,
+                highest frequency
+        
         Returns dict with:
-            - frames: List of spectral frames
+            - amplitudes: float32 array (frames, bins), the brightness of
+              each column, one frame per column
+            - frequencies: Frequency of each bin (Hz)
             - notes: List of SynthNote objects
             - dominant_colors: Top colors in image
             - suggested_key: Musical key based on colors
         """
-        pixels = self.load_image(path)
-        if not pixels:
-            return {}
+        pixels = np.asarray(pixels, dtype=np.uint8)
+        height, width = pixels.shape[:2]
+        
+        # Log-spaced frequencies, the top row is the highest
+        freq_ratio = (height - 1 - np.arange(height)) / max(height - 1, 1)
+        frequencies = self.config.min_freq * (
+            (self.config.max_freq / self.config.min_freq) ** freq_ratio
+        )
+        
+        # Brightness as amplitude, one frame per column
+        brightness = pixels.sum(axis=2, dtype=np.float32) / (3 * 255)
+        amplitudes = np.ascontiguousarray(brightness.T)
         
-        frames = []
         notes = []
-        color_counts = {}
-        
-        time_per_column = self.config.duration / self.config.width
-        
-        for x in range(self.config.width):
-            frame = []
-            for y in range(self.config.height):
-                r, g, b = pixels[y][x]
-                
-                # Calculate frequency for this row
-                freq_ratio = (self.config.height - 1 - y) / (self.config.height - 1)
-                freq = self.config.min_freq * (
-                    (self.config.max_freq / self.config.min_freq) ** freq_ratio
-                )
-                
-                # Calculate amplitude from brightness
-                brightness = (r + g + b) / (3 * 255)
-                
-                frame.append({
-                    'frequency': freq,
-                    'amplitude': brightness,
-                    'color': (r, g, b)
-                })
-                
-                # Track colors
-                color_key = (r // 32, g // 32, b // 32)
-                color_counts[color_key] = color_counts.get(color_key, 0) + 1
-            
-            frames.append(frame)
-            
-            # Generate melodic notes for this column
-            if self.config.mode == "melodic":
-                # Find brightest pixel
-                brightest = max(frame, key=lambda f: f['amplitude'])
-                if brightest['amplitude'] > 0.1:
-                    notes.append(SynthNote(
-                        frequency=self.chroma.color_to_freq(*brightest['color']),
-                        amplitude=brightest['amplitude'],
-                        start_time=x * time_per_column,
-                        duration=time_per_column * 1.5,  # Slight overlap
-                        color=brightest['color']
-                    ))
-        
-        # Find dominant colors
-        sorted_colors = sorted(color_counts.items(), key=lambda x: -x[1])[:5]
-        dominant = [(c[0] * 32, c[1] * 32, c[2] * 32) for c, _ in sorted_colors]
+        if self.config.mode == "melodic":
+            # Brightest pixel of each column
+            time_per_column = self.config.duration / width
+            rows = np.argmax(brightness, axis=0)
+            for x in np.flatnonzero(brightness[rows, np.arange(width)] > 0.1):
+                color = tuple(int(c) for c in pixels[rows[x], x])
+                notes.append(SynthNote(
+                    frequency=self.chroma.color_to_freq(*color),
+                    amplitude=float(brightness[rows[x], x]),
+                    start_time=x * time_per_column,
+                    duration=time_per_column * 1.5,  # Slight overlap
+                    color=color
+                ))
+        
+        # Count colors quantized to 8 levels per channel, in column order
+        quantized = pixels.transpose(1, 0, 2).reshape(-1, 3) // 32
+        codes = (
+            quantized[:, 0].astype(np.int64) * 64
+            + quantized[:, 1] * 8 + quantized[:, 2]
+        )
+        unique, first_seen, counts = np.unique(
+            codes, return_index=True, return_counts=True
+        )
+        # Most common first, ties in the order the colors first appear
+        top = np.lexsort((first_seen, -counts))[:5]
+        dominant = [
+            (int(code // 64) * 32, int(code // 8 % 8) * 32, int(code % 8) * 32)
+            for code in unique[top]
+        ]
         
         # Suggest key based on dominant color
         if dominant:
@@ -292,12 +292,13 @@ class ImageToSound:
             suggested_key = 'C'
         
         return {
-            'frames': frames,
+            'amplitudes': amplitudes,
+            'frequencies': frequencies,
             'notes': notes,
             'dominant_colors': dominant,
             'suggested_key': suggested_key,
             'duration': self.config.duration,
-            'num_frames': len(frames),
+            'num_frames': width,
         }
     
     def to_midi(self, path: Union[str, Path]) -> List[Dict]:
@@ -324,11 +325,11 @@ class ImageToSound:
         
         return midi_notes
     
-    def process(self, path: Union[str, Path]) -> Optional[List[float]]:
+    def process(self, path: Union[str, Path]) -> Optional["np.ndarray"]:
         """
         Process image and generate audio samples.
         
-        Returns list of audio samples (mono, -1 to 1 range).
+        Returns float32 array of audio samples (mono, -1 to 1 range).
         """
         if not HAS_NUMPY:
             logger.error("NumPy required for audio synthesis")
@@ -337,55 +338,43 @@ class ImageToSound:
         analysis = self.analyze(path)
         if not analysis:
             return None
+        return self.synthesize(analysis)
+    
+    def synthesize(self, analysis: Dict) -> "np.ndarray":
+        """
+        Additive synthesis of the loudest bins of each frame of an
+        analyze() result.
         
-        frames = analysis['frames']
+        Returns float32 array of audio samples (mono, -1 to 1 range).
+        """
+        amplitudes = analysis['amplitudes']
         num_samples = int(self.config.duration * self.config.sample_rate)
-        audio = np.zeros(num_samples)
-        
-        # Additive synthesis from spectral frames
-        samples_per_frame = num_samples / len(frames)
-        
-        for frame_idx, frame in enumerate(frames):
-            frame_start = int(frame_idx * samples_per_frame)
-            frame_end = min(num_samples, int((frame_idx + 1) * samples_per_frame))
-            frame_len = frame_end - frame_start
-            
-            if frame_len <= 0:
-                continue
-            
-            # Select top N oscillators by amplitude
-            sorted_bins = sorted(frame, key=lambda x: -x['amplitude'])
-            top_bins = sorted_bins[:self.config.num_oscillators]
-            
-            t = np.linspace(0, frame_len / self.config.sample_rate, frame_len)
-            
-            for bin_data in top_bins:
-                if bin_data['amplitude'] < 0.01:
-                    continue
-                
-                freq = bin_data['frequency']
-                amp = bin_data['amplitude'] * 0.5 / self.config.num_oscillators
-                
-                # Simple sine oscillator with envelope
-                envelope = np.ones(frame_len)
-                attack_samples = int(self.config.attack * self.config.sample_rate)
-                release_samples = int(self.config.release * self.config.sample_rate)
-                
-                if attack_samples > 0 and attack_samples < frame_len:
-                    envelope[:attack_samples] = np.linspace(0, 1, attack_samples)
-                if release_samples > 0 and release_samples < frame_len:
-                    envelope[-release_samples:] = np.linspace(1, 0, release_samples)
-                
-                audio[frame_start:frame_end] += amp * envelope * np.sin(2 * np.pi * freq * t)
-        
-        # Normalize
-        max_val = np.max(np.abs(audio))
-        if max_val > 0:
-            audio = audio / max_val * 0.9
-        
-        return audio.tolist()
+        num_oscillators = min(self.config.num_oscillators, amplitudes.shape[1])
+        
+        # Keep the top N bins of each frame, skipping near-silent ones
+        gains = np.zeros_like(amplitudes)
+        if num_oscillators > 0:
+            top = np.argpartition(
+                -amplitudes, num_oscillators - 1, axis=1
+            )[:, :num_oscillators]
+            top_amps = np.take_along_axis(amplitudes, top, axis=1)
+            top_amps[top_amps < 0.01] = 0.0
+            np.put_along_axis(
+                gains, top,
+                top_amps * (0.5 / self.config.num_oscillators), axis=1
+            )
+        
+        audio = synthesize_oscillator_bank(
+            gains,
+            analysis['frequencies'],
+            num_samples,
+            self.config.sample_rate,
+            attack=self.config.attack,
+            release=self.config.release,
+        )
+        return normalize(audio)
     
-    def save_wav(self, audio: List[float], path: Union[str, Path]) -> bool:
+    def save_wav(self, audio: "np.ndarray", path: Union[str, Path]) -> bool:
         """Save audio to WAV file"""
         if not HAS_NUMPY:
             return False
@@ -426,7 +415,7 @@ class SpectralSonifier:
         duration: float = 10.0,
         min_freq: float = 55.0,
         max_freq: float = 14080.0
-    ) -> Optional[List[float]]:
+    ) -> Optional["np.ndarray"]:
         """
         Sonify image using spectral representation.
         
@@ -437,63 +426,113 @@ class SpectralSonifier:
             max_freq: Highest frequency (top of image)
         
         Returns:
-            Audio samples or None
+            float32 audio samples or None
         """
         if not HAS_PIL or not HAS_NUMPY:
             return None
         
         # Load grayscale image
         img = Image.open(image_path).convert('L')
-        width, height = img.size
-        
-        # Get pixel data as 2D array
-        pixels = np.array(img) / 255.0
-        
-        # Calculate synthesis parameters
-        num_samples = int(duration * self.sample_rate)
-        samples_per_column = num_samples / width
-        
-        # Output buffer
-        audio = np.zeros(num_samples)
+        pixels = np.asarray(img, dtype=np.float32) / 255.0
+        height = pixels.shape[0]
         
         # Frequency array (logarithmic scale)
         freqs = min_freq * (max_freq / min_freq) ** (np.arange(height) / (height - 1))
         freqs = freqs[::-1]  # Flip so low frequencies at bottom
         
-        # Phase accumulators
-        phases = np.zeros(height)
+        # One frame per column, skipping near-silent pixels
+        gains = pixels.T * (0.1 / height)
+        gains[pixels.T < 0.01] = 0.0
         
-        # Process each column
-        for col in range(width):
-            col_start = int(col * samples_per_column)
-            col_end = min(num_samples, int((col + 1) * samples_per_column))
-            col_len = col_end - col_start
-            
-            if col_len <= 0:
-                continue
-            
-            # Get amplitudes for this column
-            amplitudes = pixels[:, col]
-            
-            # Synthesize
-            t = np.arange(col_len) / self.sample_rate
-            
-            for i, (freq, amp) in enumerate(zip(freqs, amplitudes)):
-                if amp < 0.01:
-                    continue
-                
-                phase_inc = 2 * np.pi * freq * t + phases[i]
-                audio[col_start:col_end] += amp * 0.1 / height * np.sin(phase_inc)
-                
-                # Update phase for continuity
-                phases[i] = phase_inc[-1] if len(phase_inc) > 0 else phases[i]
-        
-        # Normalize
-        max_val = np.max(np.abs(audio))
-        if max_val > 0:
-            audio = audio / max_val * 0.9
-        
-        return audio.tolist()
+        audio = synthesize_oscillator_bank(
+            gains, freqs, int(duration * self.sample_rate), self.sample_rate
+        )
+        return normalize(audio)
+
+
+def synthesize_oscillator_bank(
+    gains: "np.ndarray",
+    frequencies: "np.ndarray",
+    num_samples: int,
+    sample_rate: int,
+    attack: float = 0.0,
+    release: float = 0.0,
+    block_size: int = 8192
+) -> "np.ndarray":
+    """
+    Phase-continuous additive synthesis of a bank of sine oscillators.
+    
+    Frames are spread evenly over the output, and each oscillator keeps
+    its phase across frames, so only its amplitude changes.  Blocks of
+    frames are rendered in one broadcast over the oscillators that sound
+    in each frame, so the cost follows the number of sounding oscillators
+    rather than the size of the bank.
+    
+    Args:
+        gains: Amplitude of each oscillator per frame (frames, oscillators)
+        frequencies: Frequency of each oscillator (Hz)
+        num_samples: Output length
+        sample_rate: Output sample rate
+        attack: Seconds for an amplitude to rise to a new frame's value
+        release: Seconds for an amplitude to fall to a new frame's value
+        block_size: Samples rendered per broadcast, about
+    
+    Returns:
+        float32 array (num_samples,)
+    """
+    gains = np.asarray(gains, dtype=np.float32)
+    omega = 2 * np.pi * np.asarray(frequencies, dtype=np.float64) / sample_rate
+    num_frames = len(gains)
+    audio = np.zeros(num_samples, dtype=np.float32)
+    if num_frames == 0 or num_samples == 0:
+        return audio
+    
+    # Sample where each frame starts, plus the end
+    starts = (np.arange(num_frames + 1) * (num_samples / num_frames)).astype(np.int64)
+    starts[-1] = num_samples
+    # Amplitudes glide from the previous frame's value, silence before
+    # the first frame
+    previous = np.vstack([np.zeros_like(gains[:1]), gains[:-1]])
+    ramps = np.maximum(
+        np.array([attack, release]) * sample_rate, 1.0
+    ).astype(np.float32)
+    # Oscillators sounding in each frame first, padded with silent ones
+    sounding = (gains != 0) | (previous != 0)
+    width = max(int(sounding.sum(axis=1).max()), 1)
+    order = np.argsort(~sounding, axis=1, kind='stable')[:, :width]
+    gains = np.take_along_axis(gains, order, axis=1)
+    previous = np.take_along_axis(previous, order, axis=1)
+    
+    frames_per_block = max(1, int(block_size * num_frames / num_samples))
+    for first in range(0, num_frames, frames_per_block):
+        last = min(first + frames_per_block, num_frames)
+        block_start, block_end = starts[first], starts[last]
+        if block_end <= block_start:
+            continue
+        if not sounding[first:last].any():
+            continue
+        
+        n = np.arange(block_start, block_end)
+        frame = np.searchsorted(starts, n, side='right') - 1
+        target = gains[frame]
+        start = previous[frame]
+        ramp = np.where(target > start, ramps[0], ramps[1])
+        elapsed = (n - starts[frame]).astype(np.float32)[:, np.newaxis]
+        amplitude = start + (target - start) * np.minimum(elapsed / ramp, 1.0)
+        # Wrap the phase in float64 so float32 sin stays accurate
+        phase = np.mod(n[:, np.newaxis] * omega[order[frame]], 2 * np.pi)
+        audio[block_start:block_end] = np.einsum(
+            'ij,ij->i', amplitude, np.sin(phase.astype(np.float32))
+        )
+    return audio
+
+
+def normalize(audio: "np.ndarray", peak: float = 0.9) -> "np.ndarray":
+    """Scale audio in place to the given peak, unless it is silent"""
+    max_val = np.max(np.abs(audio)) if len(audio) else 0.0
+    if max_val > 0:
+        audio *= peak / max_val
+    return audio
 
 
 # Convenience functions
@@ -503,7 +542,7 @@ def image_to_midi(image_path: str, duration: float = 10.0) -> List[Dict]:
     return converter.to_midi(image_path)
 
 
-def image_to_audio(image_path: str, duration: float = 10.0) -> Optional[List[float]]:
+def image_to_audio(image_path: str, duration: float = 10.0) -> Optional["np.ndarray"]:
     """Quick image to audio conversion"""
     converter = ImageToSound(ImageToSoundConfig(duration=duration))
     return converter.process(image_path)
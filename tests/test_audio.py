@@ -0,0 +1,340 @@
+"""Test suite for audio effects"""
+import os
+import pytest
+import numpy as np
+import soundfile as sf
+from scipy import signal
+from src.intuitive_daw.audio.processor import (
+    AudioAnalyzer, AudioClip, CompressorEffect, DelayEffect, EQBandType,
+    EQEffect, PartitionedConvolver, ReverbEffect
+)
+from src.intuitive_daw.audio.tempo import autocorrelate, estimate_tempo
+from src.intuitive_daw.core.engine import AudioConfig, AudioEngine
+from src.intuitive_daw.core.project import Project
+from src.intuitive_daw.core.track import Track
+from src.intuitive_daw.generators.image_to_sound import (
+    ImageToSound, ImageToSoundConfig, synthesize_oscillator_bank
+)
+
+
+def _process_in_blocks(effect, audio, block_size):
+    """Run audio through an effect block by block"""
+    return np.vstack([
+        effect.process(audio[i:i + block_size])
+        for i in range(0, len(audio), block_size)
+    ])
+
+
+def _click_track(bpm, seconds, sample_rate=44100):
+    """Short decaying clicks on every beat over a little noise"""
+    rng = np.random.default_rng(0)
+    audio = rng.standard_normal(int(seconds * sample_rate)) * 0.01
+    click = np.sin(np.arange(1000) * 0.15) * np.exp(-np.arange(1000) / 200)
+    for start in np.arange(0.1, seconds - 0.1, 60.0 / bpm):
+        index = int(start * sample_rate)
+        audio[index:index + len(click)] += click
+    return audio
+
+
+class TestAudioClip:
+    """Test audio clip reads"""
+
+    def test_accumulate_into_partial_block(self):
+        """Test a clip starting mid-block adds only its overlap"""
+        clip = AudioClip("clip", np.ones((100, 2)), 48000, position=50 / 48000)
+        out = np.full((128, 2), 0.5)
+        assert clip.accumulate_into(out, 0, 128, gain=2.0)
+        assert np.all(out[:50] == 0.5)
+        assert np.all(out[50:128] == 2.5)
+        assert not clip.accumulate_into(out, 1000, 128)
+
+    def test_get_audio_pads_end(self):
+        """Test reads past the clip end are zero padded"""
+        clip = AudioClip("clip", np.ones((100, 2)), 48000)
+        chunk = clip.get_audio(90, 32, 48000)
+        assert chunk.shape == (32, 2)
+        assert np.all(chunk[:10] == 1.0) and np.all(chunk[10:] == 0.0)
+        assert clip.get_audio(100, 32, 48000) is None
+
+    def test_float32_end_to_end(self):
+        """Test float32 clips mix into float32 engine buffers"""
+        engine = AudioEngine(AudioConfig(dtype="float32"))
+        track = Track("Test")
+        data = np.full((1024, 2), 0.25, dtype=np.float32)
+        track.add_clip(AudioClip("clip", data, 48000, gain=2.0))
+        engine.add_track(track)
+        result = engine.process_audio(512)
+        assert result.dtype == np.float32
+        assert np.allclose(result, 0.5)
+
+
+class TestCompressorEffect:
+    """Test compressor functionality"""
+
+    def test_reduces_loud_signal(self):
+        """Test signals above threshold are attenuated"""
+        audio = np.full((4800, 2), 0.9)
+        result = CompressorEffect(threshold_db=-20.0, ratio=4.0).process(audio)
+        assert np.max(np.abs(result[-100:])) < 0.9
+
+    def test_quiet_signal_untouched(self):
+        """Test signals below threshold pass unchanged"""
+        audio = np.full((4800, 2), 0.01)
+        result = CompressorEffect(threshold_db=-20.0).process(audio)
+        assert np.allclose(result, audio)
+
+    @pytest.mark.parametrize("kwargs", [
+        {},
+        {"stereo_link": False},
+        {"lookahead_ms": 5.0},
+    ])
+    def test_streaming_matches_offline(self, kwargs):
+        """Test block-by-block processing equals a single call"""
+        audio = np.random.randn(9600, 2) * 0.5
+        offline = CompressorEffect(**kwargs).process(audio)
+        streamed = _process_in_blocks(CompressorEffect(**kwargs), audio, 128)
+        assert np.allclose(streamed, offline)
+
+    def test_envelope_state_kept(self):
+        """Test envelope carries over between calls"""
+        comp = CompressorEffect()
+        comp.process(np.full((4800, 2), 0.9))
+        assert comp.envelope > 0.5
+
+
+class TestDelayEffect:
+    """Test delay functionality"""
+
+    def test_impulse_echo(self):
+        """Test an impulse comes back after the delay time"""
+        audio = np.zeros((1000, 2))
+        audio[0] = 1.0
+        delay = DelayEffect(delay_time=100 / 48000, feedback=0.5, mix=1.0)
+        result = _process_in_blocks(delay, audio, 32)
+        assert result[100, 0] == pytest.approx(1.0)
+        assert result[200, 0] == pytest.approx(0.5)
+        assert np.count_nonzero(result[:, 0]) == 9
+
+    def test_block_longer_than_delay(self):
+        """Test feedback is exact when the block exceeds the delay"""
+        audio = np.random.randn(2048, 2)
+        offline = DelayEffect(delay_time=37 / 48000).process(audio)
+        streamed = _process_in_blocks(DelayEffect(delay_time=37 / 48000), audio, 7)
+        assert np.allclose(streamed, offline)
+
+    def test_modulated_streaming_matches_offline(self):
+        """Test chorus-style modulation keeps state across calls"""
+        kwargs = {"delay_time": 0.007, "mod_depth_ms": 2.0, "mod_rate_hz": 0.5}
+        audio = np.random.randn(4096, 2)
+        offline = DelayEffect(**kwargs).process(audio)
+        streamed = _process_in_blocks(DelayEffect(**kwargs), audio, 128)
+        assert np.allclose(streamed, offline)
+
+    def test_tempo_sync(self):
+        """Test synced delay follows the project tempo"""
+        delay = DelayEffect(sync="1/8d")
+        track = Track("Test")
+        track.add_effect(delay)
+        project = Project("Test")
+        project.add_track(track)
+        project.set_tempo(100.0)
+        assert delay.get_delay_time() == pytest.approx(0.45)
+
+
+class TestReverbEffect:
+    """Test convolution reverb functionality"""
+
+    def test_convolver_matches_direct_convolution(self):
+        """Test partitioned convolution equals one long convolution"""
+        ir = np.random.randn(3000, 1)
+        audio = np.random.randn(4000, 2)
+        convolver = PartitionedConvolver(
+            PartitionedConvolver.compute_spectra(ir, 256), 256
+        )
+        result = _process_in_blocks(convolver, audio, 100)
+        expected = np.stack([
+            np.convolve(audio[:, ch], ir[:, 0])[:len(audio)] for ch in range(2)
+        ], axis=1)
+        assert np.allclose(result, expected)
+
+    def test_streaming_matches_offline(self):
+        """Test the tail carries across block boundaries"""
+        audio = np.random.randn(9600, 2)
+        offline = ReverbEffect().process(audio)
+        streamed = _process_in_blocks(ReverbEffect(), audio, 128)
+        assert np.allclose(streamed, offline)
+
+    def test_ir_spectra_cached(self):
+        """Test instances with equal settings share IR spectra"""
+        audio = np.zeros((64, 2))
+        a = ReverbEffect(room_size=0.7)
+        b = ReverbEffect(room_size=0.7)
+        a.process(audio)
+        b.process(audio)
+        assert a._convolver.spectra is b._convolver.spectra
+
+    def test_load_impulse_response(self, tmp_path):
+        """Test convolving with a user-supplied IR file"""
+        ir = np.zeros((100, 2))
+        ir[10] = 1.0
+        path = str(tmp_path / "ir.wav")
+        sf.write(path, ir, 48000, subtype='FLOAT')
+
+        reverb = ReverbEffect(wet_level=1.0)
+        reverb.load_impulse_response(path)
+        audio = np.random.randn(256, 2)
+        result = reverb.process(audio)
+        assert np.allclose(result[10:], audio[:-10])
+
+    def test_impulse_response_file_removed(self, tmp_path, monkeypatch):
+        """Test processing neither stats nor needs the IR file"""
+        ir = np.zeros((100, 1))
+        ir[5] = 1.0
+        path = str(tmp_path / "ir.wav")
+        sf.write(path, ir, 48000, subtype='FLOAT')
+        reverb = ReverbEffect(wet_level=1.0, ir_path=path)
+        audio = np.random.randn(256, 2)
+        reverb.process(audio)
+        
+        def no_stat(path):
+            raise AssertionError("stat in process()")
+        monkeypatch.setattr(os.path, "getmtime", no_stat)
+        os.remove(path)
+        reverb.process(audio)
+        # New settings need the file again, the playing IR is kept while
+        # it is missing
+        convolver = reverb._convolver
+        reverb.sample_rate = 44100
+        reverb.process(audio)
+        assert reverb._convolver is convolver
+
+
+class TestEQEffect:
+    """Test parametric EQ functionality"""
+
+    def test_flat_eq_is_passthrough(self):
+        """Test an EQ with no gain leaves audio unchanged"""
+        audio = np.random.randn(1024, 2)
+        assert np.allclose(EQEffect().process(audio), audio)
+
+    def test_band_response(self):
+        """Test band gains match their settings"""
+        eq = EQEffect(low_gain=6.0, mid_gain=-3.0)
+        eq.process(np.zeros((16, 2)))
+        _, response = signal.sosfreqz(eq._sos, [10.0, 1000.0], fs=48000)
+        assert 20 * np.log10(np.abs(response[0])) == pytest.approx(6.0, abs=0.1)
+        assert 20 * np.log10(np.abs(response[1])) == pytest.approx(-3.0, abs=0.2)
+
+    def test_streaming_matches_offline(self):
+        """Test filter state carries over between blocks"""
+        audio = np.random.randn(4800, 2)
+
+        def make_eq():
+            eq = EQEffect(low_gain=4.0, high_gain=-6.0)
+            eq.add_band(EQBandType.HIGHPASS, 40.0)
+            return eq
+
+        offline = make_eq().process(audio)
+        streamed = _process_in_blocks(make_eq(), audio, 128)
+        assert np.allclose(streamed, offline)
+
+    def test_coefficients_cached(self):
+        """Test coefficients are only redesigned on parameter changes"""
+        eq = EQEffect(low_gain=3.0)
+        eq.process(np.zeros((16, 2)))
+        sos = eq._sos
+        eq.process(np.zeros((16, 2)))
+        assert eq._sos is sos
+
+        eq.mid_gain = 2.0
+        eq.process(np.zeros((16, 2)))
+        assert eq._sos is not sos
+        assert len(eq._sos) == 2
+
+
+class TestTempoEstimation:
+    """Test the shared tempo engine"""
+
+    def test_autocorrelate_matches_numpy(self):
+        """Test the FFT autocorrelation against np.correlate"""
+        x = np.random.randn(300)
+        expected = np.correlate(x, x, mode='full')[len(x) - 1:]
+        expected /= np.arange(len(x), 0, -1)
+        assert np.allclose(autocorrelate(x), expected)
+        assert np.allclose(autocorrelate(x, 50), expected[:50])
+
+    @pytest.mark.parametrize("bpm", [72.0, 100.0, 128.0, 140.0])
+    def test_click_track_tempo_and_beats(self, bpm):
+        """Test tempo and beat spacing of a click track"""
+        estimate = estimate_tempo(_click_track(bpm, 20.0), 44100)
+        assert estimate.tempo == pytest.approx(bpm, abs=1.0)
+        intervals = np.diff(estimate.beats)
+        assert np.median(intervals) == pytest.approx(60.0 / bpm, abs=0.02)
+        assert len(estimate.beats) >= 20.0 * bpm / 60.0 - 3
+
+    def test_silence_returns_default(self):
+        """Test silence and very short input fall back to 120 BPM"""
+        assert estimate_tempo(np.zeros(44100), 44100).tempo == 120.0
+        assert estimate_tempo(np.zeros(10), 44100).tempo == 120.0
+        assert not len(estimate_tempo(np.zeros(44100), 44100).beats)
+
+    def test_processor_detect_tempo(self):
+        """Test the stereo processor API stays within 60-180 BPM"""
+        audio = _click_track(128.0, 10.0)
+        stereo = np.stack([audio, audio], axis=1)
+        assert AudioAnalyzer.detect_tempo(stereo, 44100) == pytest.approx(
+            128.0, abs=1.0
+        )
+
+
+class TestImageToSound:
+    """Test image sonification synthesis"""
+
+    def test_oscillator_bank_is_phase_continuous(self):
+        """Test a steady oscillator equals one uninterrupted sine"""
+        gains = np.full((16, 1), 0.5)
+        audio = synthesize_oscillator_bank(
+            gains, [441.0], 44100, 44100, block_size=1000
+        )
+        expected = 0.5 * np.sin(2 * np.pi * 441.0 * np.arange(44100) / 44100)
+        assert audio.dtype == np.float32
+        assert np.allclose(audio, expected, atol=1e-5)
+
+    def test_oscillator_bank_glides_between_frames(self):
+        """Test amplitude changes ramp over the attack and release"""
+        gains = np.array([[1.0], [0.0]])
+        audio = synthesize_oscillator_bank(
+            gains, [0.25 * 1000], 2000, 1000, attack=0.1, release=0.2
+        )
+        # A quarter of the sample rate gives peaks at every 4th sample
+        peaks = np.abs(audio[1::4])
+        assert peaks[0] == pytest.approx(0.01, abs=1e-4)
+        assert np.allclose(peaks[25:250], 1.0)
+        assert peaks[250 + 25] == pytest.approx(0.5, abs=0.01)
+        assert not audio[1250:].any()
+
+    def test_top_bins_per_column(self):
+        """Test only the brightest rows of each column sound"""
+        pixels = np.zeros((8, 4, 3), dtype=np.uint8)
+        pixels[2, :] = 255
+        pixels[5, :] = 128
+        pixels[6, 2:] = 200
+        config = ImageToSoundConfig(
+            width=4, height=8, duration=0.5, sample_rate=8000,
+            num_oscillators=2, mode="melodic"
+        )
+        converter = ImageToSound(config)
+        analysis = converter.analyze_pixels(pixels)
+        assert analysis['amplitudes'].shape == (4, 8)
+        assert analysis['frequencies'][0] == pytest.approx(config.max_freq)
+        assert len(analysis['notes']) == 4
+        assert analysis['dominant_colors'][0] == (0, 0, 0)
+
+        audio = converter.synthesize(analysis)
+        assert audio.dtype == np.float32 and len(audio) == 4000
+        assert np.max(np.abs(audio)) == pytest.approx(0.9)
+        spectrum = np.abs(np.fft.rfft(audio[2000:]))
+        freqs = np.fft.rfftfreq(2000, 1 / 8000)
+        loudest = freqs[np.argsort(spectrum)[-2:]]
+        expected = analysis['frequencies'][[2, 6]]
+        assert np.allclose(np.sort(loudest), np.sort(expected), atol=8)
@@ -1,9 +1,19 @@
 """Test suite for core DAW functionality"""
+import os
 import pytest
 import numpy as np
-from src.intuitive_daw.core.engine import AudioEngine, AudioConfig
+import soundfile as sf
+from src.intuitive_daw.core.engine import AudioEngine, AudioConfig, CallbackStats
+from src.intuitive_daw.audio.processor import AudioClip, GainEffect
 from src.intuitive_daw.core.project import Project
 from src.intuitive_daw.core.track import Track, AudioTrack, MIDITrack
+from src.intuitive_daw.audio.key import (
+    MAJOR_PROFILE, MINOR_PROFILE, estimate_key, key_scores
+)
+from src.intuitive_daw.audio.spectral import chroma_filter
+from src.intuitive_daw.core.integrations import AudioAnalyzer
+from src.intuitive_daw.core.library import LibraryAnalyzer, analyze_library
+from src.intuitive_daw.db.models import DatabaseManager
 
 
 class TestAudioEngine:
@@ -55,6 +65,73 @@ class TestAudioEngine:
         
         engine.remove_track(track)
         assert len(engine.tracks) == 0
+    
+    def test_process_into_reuses_buffers(self):
+        """Test block rendering into preallocated buffers"""
+        engine = AudioEngine(AudioConfig(sample_rate=48000, buffer_size=128))
+        track = Track("Test")
+        track.add_clip(AudioClip("clip", np.full((1000, 2), 0.5), 48000))
+        engine.add_track(track)
+        
+        master = engine._master_buffer
+        out = np.zeros((128, 2), dtype=np.float32)
+        engine.process_into(out)
+        assert np.allclose(out, 0.5)
+        assert engine._master_buffer is master
+        assert engine.get_position() == 128
+    
+    def test_process_audio_matches_get_audio(self):
+        """Test engine mix equals the track's own output"""
+        engine = AudioEngine()
+        track = Track("Test")
+        track.set_pan(0.5)
+        track.add_clip(AudioClip("clip", np.random.randn(2048, 2), 48000))
+        engine.add_track(track)
+        
+        expected = track.get_audio(0, 512, 48000)
+        assert np.allclose(engine.process_audio(512), expected)
+    
+    def test_parallel_render_matches_serial(self):
+        """Test threaded track rendering gives the same mix"""
+        results = []
+        for workers in (1, 4):
+            engine = AudioEngine(AudioConfig(render_threads=workers))
+            for i in range(8):
+                track = Track(f"Track {i}")
+                data = np.random.default_rng(i).standard_normal((4096, 2))
+                track.add_clip(AudioClip("clip", data, 48000))
+                engine.add_track(track)
+            results.append(np.vstack([engine.process_audio(512) for _ in range(8)]))
+            engine.shutdown()
+        assert np.array_equal(results[0], results[1])
+    
+    def test_render_streams_to_file(self, tmp_path):
+        """Test offline render writes blocks and reports progress"""
+        engine = AudioEngine(AudioConfig(bit_depth=24))
+        track = Track("Test")
+        track.add_clip(AudioClip("clip", np.full((48000, 2), 0.25), 48000))
+        engine.add_track(track)
+        
+        calls = []
+        path = str(tmp_path / "out.wav")
+        assert engine.render(path, 0.5, block_size=10000,
+                             progress=lambda done, total: calls.append(done))
+        
+        audio, rate = sf.read(path)
+        assert rate == 48000
+        assert audio.shape == (24000, 2)
+        assert np.allclose(audio, 0.25, atol=1e-6)
+        assert calls == [10000, 20000, 24000]
+    
+    def test_callback_stats(self):
+        """Test callback timing statistics"""
+        stats = CallbackStats()
+        stats.record(0.001, 0.002)
+        stats.record(0.003, 0.002)
+        assert stats.callbacks == 2
+        assert stats.late_callbacks == 1
+        assert stats.max_time == 0.003
+        assert abs(stats.mean_time - 0.002) < 1e-9
 
 
 class TestProject:
@@ -150,6 +227,236 @@ class TestTrack:
         
         value = track.get_automation_value("volume", 0.5)
         assert value is not None
+    
+    def test_automation_interpolation(self):
+        """Test automation values are interpolated and clamped"""
+        track = Track("Test")
+        track.add_automation("volume", [(2.0, 0.0), (0.0, 0.0), (1.0, -6.0)])
+        assert track.get_automation_value("volume", 0.5) == pytest.approx(-3.0)
+        assert track.get_automation_value("volume", -1.0) == 0.0
+        assert track.get_automation_value("volume", 5.0) == 0.0
+        assert track.get_automation_value("pan", 0.0) is None
+    
+    def test_volume_automation_is_sample_accurate(self):
+        """Test volume automation is applied per sample"""
+        track = Track("Test")
+        track.add_clip(AudioClip("clip", np.ones((48000, 2)), 48000))
+        track.add_automation("volume", [(0.0, 0.0), (1.0, -60.0)])
+        
+        audio = track.get_audio(24000, 512, 48000)
+        expected_db = -60.0 * (24000 + np.arange(512)) / 48000
+        assert np.allclose(audio[:, 0], 10.0 ** (expected_db / 20.0))
+    
+    def test_pan_automation(self):
+        """Test pan automation moves the signal between channels"""
+        track = Track("Test")
+        track.add_clip(AudioClip("clip", np.ones((48000, 2)), 48000))
+        track.add_automation("pan", [(0.0, -1.0), (1.0, 1.0)])
+        
+        start = track.get_audio(0, 16, 48000)
+        end = track.get_audio(48000 - 16, 16, 48000)
+        assert start[0, 1] == pytest.approx(0.0)
+        assert end[-1, 0] == pytest.approx(0.0, abs=1e-3)
+    
+    def test_automation_edited_in_place(self):
+        """Test in-place point edits apply after invalidate_automation"""
+        track = Track("Test")
+        track.add_automation("volume", [(0.0, 0.0), (1.0, -6.0)])
+        assert track.get_automation_value("volume", 1.0) == -6.0
+        track.automation["volume"].append((2.0, -12.0))
+        assert track.get_automation_value("volume", 2.0) == -12.0
+        track.automation["volume"][1] = (1.0, -3.0)
+        track.invalidate_automation("volume")
+        assert track.get_automation_value("volume", 1.0) == -3.0
+        track.automation["volume"][0] = (0.0, -1.0)
+        track.invalidate_automation()
+        assert track.get_automation_value("volume", 0.0) == -1.0
+    
+    def test_clips_in_range(self):
+        """Test the clip index returns only overlapping clips"""
+        track = Track("Test")
+        clips = [
+            AudioClip(str(i), np.ones((4800, 2)), 48000, position=i * 0.2)
+            for i in range(50)
+        ]
+        for clip in reversed(clips):
+            track.add_clip(clip)
+        
+        assert track.get_clips_in_range(1.05, 1.15) == [clips[5]]
+        assert track.get_clips_in_range(1.05, 1.25) == [clips[5], clips[6]]
+        # Seeking backwards after forward playback
+        assert track.get_clips_in_range(0.0, 0.01) == [clips[0]]
+        
+        track.remove_clip(clips[5])
+        assert track.get_clips_in_range(1.05, 1.15) == []
+        track.move_clip(clips[0], 1.1)
+        assert track.get_clips_in_range(1.05, 1.15) == [clips[0]]
+    
+    def test_effect_parameter_automation(self):
+        """Test automation of '<effect>.<parameter>' values"""
+        track = Track("Test")
+        gain = GainEffect()
+        track.add_effect(gain)
+        track.add_automation("Gain.gain_db", [(0.0, -12.0), (1.0, 0.0)])
+        track.get_audio(24000, 128, 48000)
+        assert gain.gain_db == pytest.approx(-6.0)
+
+
+
+class TestAudioAnalyzer:
+    """Test the integrations analyzer feature pipeline"""
+
+    def test_frame_features_cover_whole_file(self):
+        """Test per-frame features describe the whole signal"""
+        sample_rate = 22050
+        t = np.arange(sample_rate * 4) / sample_rate
+        audio = np.sin(2 * np.pi * 440.0 * t)
+        audio[sample_rate * 2:] = np.sin(2 * np.pi * 3000.0 * t[sample_rate * 2:])
+        result = AudioAnalyzer().analyze(
+            audio, sample_rate, features=["spectral_centroid", "rms"]
+        )
+        frames = result.frames
+        assert len(frames["times"]) == len(frames["spectral_centroid"])
+        assert frames["times"][-1] == pytest.approx(4.0, abs=0.05)
+        first = frames["spectral_centroid"][frames["times"] < 1.5]
+        last = frames["spectral_centroid"][frames["times"] > 2.5]
+        assert np.median(first) == pytest.approx(440.0, rel=0.1)
+        assert np.median(last) == pytest.approx(3000.0, rel=0.1)
+        assert first.mean() < result.spectral_centroid < last.mean()
+        assert np.allclose(frames["rms"][10:-10], np.sqrt(0.5), rtol=0.01)
+
+    def test_onsets_and_tempo(self):
+        """Test onsets and beats from the shared onset envelope"""
+        sample_rate = 22050
+        audio = np.zeros(sample_rate * 8)
+        click = np.hanning(200)
+        starts = np.arange(0.25, 7.5, 0.5)
+        for start in starts:
+            index = int(start * sample_rate)
+            audio[index:index + 200] += click
+        result = AudioAnalyzer().analyze(
+            audio, sample_rate, features=["onsets", "tempo"]
+        )
+        assert result.tempo == pytest.approx(120.0, abs=1.0)
+        assert len(result.onsets) == len(starts)
+        assert np.allclose(result.onsets, starts, atol=0.05)
+        assert "onset_strength" in result.frames
+
+    def test_silence(self):
+        """Test silent input gives zero features instead of errors"""
+        result = AudioAnalyzer().analyze(
+            np.zeros(4096), 48000,
+            features=["spectral_centroid", "spectral_rolloff", "onsets"]
+        )
+        assert result.spectral_centroid == 0.0
+        assert result.spectral_rolloff == 0.0
+        assert result.onsets == []
+
+    @pytest.mark.parametrize("notes, key, mode", [
+        ((60, 64, 67), "C", "major"),
+        ((57, 60, 64), "A", "minor"),
+        ((62, 65, 69), "D", "minor"),
+    ])
+    def test_key_of_triad(self, notes, key, mode):
+        """Test the key of a sustained triad"""
+        sample_rate = 22050
+        t = np.arange(sample_rate * 3) / sample_rate
+        audio = sum(
+            np.sin(2 * np.pi * 440.0 * 2 ** ((note - 69) / 12) * t)
+            for note in notes
+        )
+        result = AudioAnalyzer().analyze(audio, sample_rate, features=["key"])
+        assert (result.key, result.mode) == (key, mode)
+        assert result.chroma.shape[0] == 12
+        assert np.argmax(result.chroma.mean(axis=1)) in [n % 12 for n in notes]
+
+    def test_key_scores_match_corrcoef(self):
+        """Test the matrix correlation against one np.corrcoef per key"""
+        chroma = np.random.rand(12)
+        scores = key_scores(chroma)
+        for tonic in range(12):
+            rotated = np.roll(chroma, -tonic)
+            for mode, profile in enumerate((MAJOR_PROFILE, MINOR_PROFILE)):
+                expected = np.corrcoef(rotated, profile)[0, 1]
+                assert scores[tonic, mode] == pytest.approx(expected)
+        assert estimate_key(np.zeros(12)) == ("C", "major")
+
+    def test_chroma_filter_cached(self):
+        """Test each bin maps to the nearest pitch class, once per size"""
+        matrix = chroma_filter(4096, 44100)
+        assert matrix is chroma_filter(4096, 44100)
+        assert matrix.shape == (12, 2049)
+        assert not matrix[:, 0].any()
+        assert np.all(matrix[:, 1:].sum(axis=0) == 1.0)
+        a440 = int(round(440.0 * 4096 / 44100))
+        assert matrix[9, a440] == 1.0
+
+
+class TestLibraryAnalyzer:
+    """Test cached batch analysis of audio files"""
+
+    def _write_library(self, root, count=3):
+        sample_rate = 22050
+        t = np.arange(sample_rate) / sample_rate
+        (root / "sub").mkdir()
+        for i in range(count):
+            audio = 0.5 * np.sin(2 * np.pi * (220.0 + 50.0 * i) * t)
+            sf.write(str(root / "sub" / f"tone{i}.wav"), audio, sample_rate)
+        (root / "broken.wav").write_text("not audio")
+        (root / "notes.txt").write_text("ignored")
+
+    def test_rescan_only_analyzes_changed_files(self, tmp_path):
+        """Test unchanged files come from the cache"""
+        self._write_library(tmp_path)
+        database = DatabaseManager(f"sqlite:///{tmp_path / 'cache.db'}")
+        library = LibraryAnalyzer(database, workers=1)
+
+        first = list(library.scan([str(tmp_path)]))
+        assert len(first) == 4
+        assert not any(entry.cached for entry in first)
+        errors = [entry for entry in first if entry.error]
+        assert [entry.path for entry in errors] == [
+            str(tmp_path / "broken.wav")
+        ]
+        tone = next(e for e in first if e.path.endswith("tone0.wav"))
+        assert tone.features["duration"] == pytest.approx(1.0)
+
+        changed = tmp_path / "sub" / "tone1.wav"
+        stat = changed.stat()
+        os.utime(changed, (stat.st_atime, stat.st_mtime + 10))
+        second = {entry.path: entry for entry in library.scan([str(tmp_path)])}
+        assert not second[str(changed)].cached
+        assert sum(entry.cached for entry in second.values()) == 2
+        # Errors are not cached, the file is tried again
+        broken = second[str(tmp_path / "broken.wav")]
+        assert broken.error and not broken.cached
+        assert second[tone.path].features == tone.features
+
+    def test_version_change_invalidates(self, tmp_path):
+        """Test different analyzer settings do not share results"""
+        self._write_library(tmp_path, count=1)
+        database = DatabaseManager(f"sqlite:///{tmp_path / 'cache.db'}")
+        paths = [str(tmp_path / "sub")]
+        list(LibraryAnalyzer(database, workers=1).scan(paths))
+        entries = list(
+            LibraryAnalyzer(database, workers=1, hop_length=256).scan(paths)
+        )
+        assert not entries[0].cached
+
+    def test_process_pool(self, tmp_path):
+        """Test worker processes give the same results as in-process"""
+        self._write_library(tmp_path)
+        pooled = analyze_library(
+            [str(tmp_path)], f"sqlite:///{tmp_path / 'pool.db'}", workers=2
+        )
+        inline = analyze_library(
+            [str(tmp_path)], f"sqlite:///{tmp_path / 'inline.db'}", workers=1
+        )
+        pooled = {entry.path: entry for entry in pooled}
+        inline = {entry.path: entry for entry in inline}
+        assert pooled.keys() == inline.keys()
+        for path, entry in inline.items():
+            assert pooled[path].features == entry.features
 
 
 if __name__ == '__main__':